@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ActionFlight:
+    """一次正在执行的操作"""
+
+    def __init__(self, action, key):
+        self.action = action
+        self.key = key
+        self.started = time.monotonic()
+        self.future = None
+
+
+class ActionExecutor:
+    """界面操作执行器
+
+    把按钮操作作为可取消的异步任务放到页面事件循环中执行，界面不会因为请求而卡住。
+    同一操作、同一参数的重复提交（如双击）合并为一次请求；同一操作换了参数再次提交时，
+    取消之前的任务只保留最新的一次。执行期间按固定间隔回调进度，超时后取消任务并回调超时；
+    操作抛出异常时记录日志并回调出错，不会让异常留在无人等待的 Future 中。
+    """
+
+    def __init__(self, run_task, timeout=20.0, progress_interval=1.0, on_progress=None, on_timeout=None, on_error=None):
+        # run_task(coroutine_function, *args) 在事件循环中调度协程并返回 concurrent.futures.Future，
+        # 例如 page.run_task
+        self.run_task = run_task
+        self.timeout = timeout
+        self.progress_interval = progress_interval
+        self.on_progress = on_progress
+        self.on_timeout = on_timeout
+        self.on_error = on_error
+        self.in_flight = {}  # 操作名 -> ActionFlight
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "collapsed": 0, "superseded": 0, "timeouts": 0, "errors": 0}
+
+    @staticmethod
+    def make_key(action, payload):
+        """操作和参数的指纹，只保存哈希而不保存密码等原始参数"""
+        data = json.dumps([action, payload], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def submit(self, action, handler, payload=None, timeout=None):
+        """提交操作，handler 为无参数的协程函数，返回任务的 Future"""
+        key = self.make_key(action, payload)
+        with self._lock:
+            self.stats["submitted"] += 1
+            current = self.in_flight.get(action)
+            if current and current.key == key:
+                self.stats["collapsed"] += 1
+                return current.future
+            if current:
+                self.stats["superseded"] += 1
+                current.future.cancel()
+
+            flight = ActionFlight(action, key)
+            self.in_flight[action] = flight
+            flight.future = self.run_task(self._run, flight, handler, timeout or self.timeout)
+            return flight.future
+
+    async def _run(self, flight, handler, timeout):
+        progress = asyncio.ensure_future(self._report_progress(flight)) if self.on_progress else None
+        try:
+            return await asyncio.wait_for(handler(), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.stats["timeouts"] += 1
+            if self.on_timeout:
+                self.on_timeout(flight.action, timeout)
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            logger.exception("操作 %s 执行失败", flight.action)
+            if self.on_error:
+                self.on_error(flight.action, e)
+        finally:
+            if progress:
+                progress.cancel()
+            with self._lock:
+                if self.in_flight.get(flight.action) is flight:
+                    del self.in_flight[flight.action]
+
+    async def _report_progress(self, flight):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            self.on_progress(flight.action, time.monotonic() - flight.started)
+
+    def is_running(self, action=None):
+        """是否有操作（或指定操作）正在执行"""
+        with self._lock:
+            return action in self.in_flight if action else bool(self.in_flight)
+
+    def cancel(self, action):
+        """取消指定操作"""
+        with self._lock:
+            flight = self.in_flight.get(action)
+        if flight:
+            flight.future.cancel()
+        return flight is not None
+
+    def cancel_all(self):
+        """取消所有正在执行的操作"""
+        with self._lock:
+            flights = list(self.in_flight.values())
+        for flight in flights:
+            flight.future.cancel()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self.in_flight))
@@ -0,0 +1,246 @@
+import logging
+import threading
+import time
+import weakref
+
+import flet as ft
+
+from metrics import metrics
+from update_batcher import get_batcher
+
+logger = logging.getLogger(__name__)
+
+
+class AnimationScheduler:
+    """全局动画调度器
+
+    所有文本动画共用一个后台线程驱动，动画只在控件挂载期间参与调度，
+    没有动画时线程挂起等待，tick频率受 max_fps 限制。
+    """
+
+    def __init__(self, max_fps=20):
+        self.max_fps = max_fps
+        self.tick_count = 0
+        self._animations = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    @property
+    def min_interval(self):
+        """两次tick之间的最小间隔"""
+        return 1.0 / self.max_fps if self.max_fps > 0 else 0
+
+    def set_max_fps(self, max_fps):
+        """设置tick频率上限"""
+        self.max_fps = max_fps
+        self._wakeup.set()
+
+    def register(self, animation):
+        """注册动画（控件挂载时调用）"""
+        with self._lock:
+            if animation not in self._animations:
+                self._animations.append(animation)
+            self._ensure_thread()
+        self._wakeup.set()
+
+    def unregister(self, animation):
+        """注销动画（控件卸载时调用）"""
+        with self._lock:
+            if animation in self._animations:
+                self._animations.remove(animation)
+
+    def active_count(self):
+        """当前参与调度的动画数量"""
+        with self._lock:
+            return len(self._animations)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="animation-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        """调度循环"""
+        while True:
+            with self._lock:
+                animations = list(self._animations)
+
+            if not animations:
+                # 没有动画时挂起，直到有新动画注册
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            now = time.monotonic()
+            next_due = now + 1.0
+            pending = {}
+            for animation in animations:
+                try:
+                    if animation.tick(now):
+                        pending.setdefault(id(animation.page), (animation.page, []))[1].append(
+                            animation.get_control()
+                        )
+                except Exception as e:
+                    logger.warning("动画执行错误: %s", e)
+                next_due = min(next_due, animation.next_due)
+            self.tick_count += 1
+
+            # 交给页面的更新合并器，与其他线程的写入合并为一次同步
+            for page, controls in pending.values():
+                get_batcher(page).request(*controls)
+
+            delay = max(next_due - time.monotonic(), self.min_interval)
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """获取全局动画调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AnimationScheduler()
+        return _scheduler
+
+
+# 存活的打字机实例，供运行指标统计
+_typewriters = weakref.WeakSet()
+
+metrics.gauge("typewriter_instances", lambda: len(_typewriters), help="存活的打字机效果实例数")
+metrics.gauge("animations_active", lambda: _scheduler.active_count() if _scheduler else 0, help="参与调度的动画数")
+
+
+class AnimatedText(ft.Text):
+    """随挂载/卸载自动注册/注销动画的文本控件"""
+
+    def __init__(self, animation, **kwargs):
+        super().__init__(**kwargs)
+        self.animation = animation
+
+    def did_mount(self):
+        self.animation.mount()
+
+    def will_unmount(self):
+        self.animation.unmount()
+
+
+class TypewriterText:
+    """打字机效果文本组件
+
+    动画状态按时间推进，由全局调度器驱动，不再为每个实例创建线程。
+    界面重建时复用同一个控件即可继续原动画。
+    """
+
+    TYPE_INTERVAL = 0.1     # 打字间隔
+    HOLD_TIME = 2           # 停留时间
+    DELETE_INTERVAL = 0.05  # 删除间隔
+    PAUSE_TIME = 0.5        # 切换句子前的停顿
+    BLINK_INTERVAL = 0.5    # 光标闪烁间隔
+
+    def __init__(self, page, sentences, size=16, color=ft.Colors.GREY_600, scheduler=None):
+        self.page = page
+        self.sentences = sentences
+        self.size = size
+        self.color = color
+        self.scheduler = scheduler or get_scheduler()
+        _typewriters.add(self)
+        self.current_text = ""
+        self.cursor_visible = True
+        self.is_running = True
+        self.next_due = 0
+
+        # 动画状态
+        self._sentence_index = 0
+        self._phase = "typing"  # typing, hold, deleting, pause
+        self._position = 0
+        self._step_at = None
+        self._blink_at = None
+
+        # 创建文本控件
+        self.text_control = AnimatedText(
+            self,
+            value="",
+            size=self.size,
+            color=self.color,
+            font_family="SourceHanFont",
+        )
+
+    def get_control(self):
+        """获取文本控件"""
+        return self.text_control
+
+    def mount(self):
+        """控件挂载后加入调度"""
+        if self.is_running:
+            self.scheduler.register(self)
+
+    def unmount(self):
+        """控件卸载后退出调度"""
+        self.scheduler.unregister(self)
+
+    def tick(self, now):
+        """推进动画状态，返回显示内容是否发生变化"""
+        if self._step_at is None:
+            self._step_at = now
+            self._blink_at = now + self.BLINK_INTERVAL
+
+        while now >= self._step_at:
+            self._step_at += self._advance()
+
+        while now >= self._blink_at:
+            self.cursor_visible = not self.cursor_visible
+            self._blink_at += self.BLINK_INTERVAL
+
+        self.next_due = min(self._step_at, self._blink_at)
+        return self.update_display()
+
+    def _advance(self):
+        """执行一步动画，返回到下一步的间隔"""
+        sentence = self.sentences[self._sentence_index]
+
+        if self._phase == "typing":
+            self.current_text = sentence[:self._position]
+            if self._position < len(sentence):
+                self._position += 1
+                return self.TYPE_INTERVAL
+            self._phase = "hold"
+            return self.TYPE_INTERVAL + self.HOLD_TIME
+
+        if self._phase == "hold":
+            self._phase = "deleting"
+            self._position = len(sentence)
+
+        if self._phase == "deleting":
+            self.current_text = sentence[:self._position]
+            if self._position > 0:
+                self._position -= 1
+                return self.DELETE_INTERVAL
+            self._phase = "pause"
+            return self.DELETE_INTERVAL + self.PAUSE_TIME
+
+        # 切换到下一个句子
+        self._sentence_index = (self._sentence_index + 1) % len(self.sentences)
+        self._phase = "typing"
+        self._position = 0
+        return 0
+
+    def update_display(self):
+        """更新显示文本，返回是否有变化"""
+        cursor = "|" if self.cursor_visible else " "
+        display_text = self.current_text + cursor
+        if self.text_control.value == display_text:
+            return False
+        self.text_control.value = display_text
+        return True
+
+    def stop(self):
+        """停止打字机效果"""
+        self.is_running = False
+        self.scheduler.unregister(self)
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DEFAULT_PORT = 8700
+
+# 不占用工作槽位的路由，负载高时也能立即响应
+EXEMPT_PATHS = ("/health", "/metrics")
+
+# 本机地址，/api/status 只回应来自本机的请求
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+class ApiHost:
+    """进程内 API 服务
+
+    在后台线程的独立事件循环中运行 uvicorn，不占用界面线程。同时执行的请求数
+    不超过 workers（同步路由在线程池中执行，线程池大小同为 workers），
+    超出的请求在有界队列中等待，队列满时直接返回 503。
+
+    服务默认只监听本机地址。/api/status 返回当前登录的用户名和微信路径，
+    即使 host 改为对外监听也只回应来自本机的请求，其他来源返回 403。
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=4, queue_size=64, context=None):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        # 提供给路由使用的共享数据（如当前登录用户），路由中通过 request.app.state.host 访问
+        self.context = dict(context or {})
+        self.routers = []
+        self.server = None
+        self.thread = None
+        self.started_at = None
+        self._lock = threading.Lock()
+        self._slots = None
+        self.pending = 0   # 已接收但未完成的请求（执行中 + 排队中）
+        self.in_flight = 0
+        self.stats = {"requests": 0, "rejected": 0, "errors": 0}
+        self.latencies = deque(maxlen=1000)
+        self.routes = {}   # 路由 -> 请求次数
+
+    def register(self, router: APIRouter):
+        """注册路由，需在 start 之前调用"""
+        self.routers.append(router)
+
+    @property
+    def running(self):
+        return self.server is not None and self.server.started and not self.server.should_exit
+
+    def create_app(self):
+        @asynccontextmanager
+        async def lifespan(app):
+            # 工作池：同步路由使用的线程池和同时执行的请求数都限制为 workers
+            import anyio.to_thread
+            anyio.to_thread.current_default_thread_limiter().total_tokens = self.workers
+            self._slots = asyncio.Semaphore(self.workers)
+            yield
+
+        app = FastAPI(title="WxQuantum API", docs_url=None, redoc_url=None, lifespan=lifespan)
+        app.state.host = self
+
+        @app.middleware("http")
+        async def bounded_queue(request: Request, call_next):
+            path = request.url.path
+            if path in EXEMPT_PATHS:
+                return await call_next(request)
+
+            with self._lock:
+                if self.pending >= self.workers + self.queue_size:
+                    self.stats["rejected"] += 1
+                    return JSONResponse({"ok": False, "message": "服务繁忙，请稍后重试"}, status_code=503, headers={"Retry-After": "1"})
+                self.pending += 1
+
+            start = time.perf_counter()
+            try:
+                async with self._slots:
+                    with self._lock:
+                        self.in_flight += 1
+                    try:
+                        response = await call_next(request)
+                    finally:
+                        with self._lock:
+                            self.in_flight -= 1
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+                raise
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                    self.stats["requests"] += 1
+                    self.routes[path] = self.routes.get(path, 0) + 1
+                    self.latencies.append(time.perf_counter() - start)
+            return response
+
+        @app.get("/health")
+        async def health():
+            return {
+                "ok": True,
+                "uptime": time.time() - self.started_at if self.started_at else 0,
+                "in_flight": self.in_flight,
+                "queued": max(0, self.pending - self.in_flight),
+            }
+
+        @app.get("/metrics")
+        async def metrics():
+            return self.get_metrics()
+
+        @app.get("/api/status")
+        def status(request: Request):
+            if not request.client or request.client.host not in LOOPBACK_HOSTS:
+                return JSONResponse({"ok": False, "message": "只允许本机访问"}, status_code=403)
+            return {"ok": True, **self.context}
+
+        for router in self.routers:
+            app.include_router(router)
+        return app
+
+    def start(self, timeout=10.0):
+        """启动服务并等待端口就绪，失败时抛出 RuntimeError"""
+        import uvicorn
+
+        if self.running:
+            return
+        config = uvicorn.Config(
+            self.create_app(),
+            host=self.host,
+            port=self.port,
+            log_level="warning",
+            access_log=False,
+            # 协议层的兜底上限，正常情况下由中间件的有界队列先行拒绝
+            limit_concurrency=self.workers + self.queue_size + len(EXEMPT_PATHS) * 4,
+        )
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="api-host", daemon=True)
+        self.thread.start()
+
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                self.server.should_exit = True
+                raise RuntimeError(f"API 服务启动失败（{self.host}:{self.port}）")
+            time.sleep(0.02)
+        self.started_at = time.time()
+
+    def stop(self, timeout=5.0):
+        """优雅停止：不再接受新连接，等待正在执行的请求完成"""
+        if self.server is None:
+            return
+        self.server.should_exit = True
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                # 超时后强制关闭剩余连接
+                self.server.force_exit = True
+                self.thread.join(1.0)
+        self.server = None
+        self.thread = None
+
+    def get_metrics(self):
+        """请求数、拒绝数、排队情况和延迟分位数"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            metrics = dict(
+                self.stats,
+                in_flight=self.in_flight,
+                queued=max(0, self.pending - self.in_flight),
+                workers=self.workers,
+                queue_size=self.queue_size,
+                routes=dict(self.routes),
+            )
+        if latencies:
+            metrics["latency_p50"] = latencies[len(latencies) // 2]
+            metrics["latency_p95"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return metrics
@@ -0,0 +1,204 @@
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from config_manager import get_app_dir
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+# 第三方库只记录警告及以上
+QUIET_LOGGERS = ("flet", "flet_core", "flet_desktop", "uvicorn", "uvicorn.access", "urllib3", "asyncio", "httpx")
+
+
+class LogEntry:
+    """环形缓冲区中的一条日志"""
+
+    __slots__ = ("seq", "created", "levelno", "levelname", "name", "message")
+
+    def __init__(self, seq, created, levelno, levelname, name, message):
+        self.seq = seq
+        self.created = created
+        self.levelno = levelno
+        self.levelname = levelname
+        self.name = name
+        self.message = message
+
+    def format(self):
+        return f"{time.strftime('%H:%M:%S', time.localtime(self.created))} {self.levelname:<7} {self.name}: {self.message}"
+
+
+def repeat_suffix(record):
+    """RepeatFilter 省略过重复记录时附加在消息后的说明"""
+    count = getattr(record, "repeat_count", 0)
+    return f"（此前 {count} 次重复已省略）" if count else ""
+
+
+class RepeatFilter(logging.Filter):
+    """合并重复日志
+
+    同一位置、同一内容的日志在 window 秒内只记录第一次，其余的只计数，
+    窗口过后的下一次记录在 repeat_count 中带上省略的次数（由 RepeatFormatter 附加到消息后），
+    不修改记录本身的消息。同一个实例挂在所有 handler 上，每条记录只判断一次。
+    记录的键数有上限，内存不会随运行时间增长。
+    """
+
+    def __init__(self, window=5.0, max_keys=512):
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self.seen = {}  # 键 -> [窗口开始时间, 省略次数]
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        # 记录依次经过各个 handler，第一次的判断结果保存在记录上
+        allowed = getattr(record, "repeat_allowed", None)
+        if allowed is not None:
+            return allowed
+
+        key = (record.name, record.levelno, record.pathname, record.lineno, record.getMessage())
+        now = record.created
+        with self._lock:
+            state = self.seen.get(key)
+            if state and now - state[0] < self.window:
+                state[1] += 1
+                self.suppressed += 1
+                record.repeat_allowed = False
+                return False
+
+            record.repeat_count = state[1] if state else 0
+            if len(self.seen) >= self.max_keys:
+                # 丢弃窗口已过的键，仍然太多时整体清空
+                self.seen = {k: v for k, v in self.seen.items() if now - v[0] < self.window}
+                if len(self.seen) >= self.max_keys:
+                    self.seen.clear()
+            self.seen[key] = [now, 0]
+        record.repeat_allowed = True
+        return True
+
+
+class RepeatFormatter(logging.Formatter):
+    """在消息后附加 RepeatFilter 省略的重复次数"""
+
+    def formatMessage(self, record):
+        return super().formatMessage(record) + repeat_suffix(record)
+
+
+class RingBufferHandler(logging.Handler):
+    """固定容量的内存日志，供界面日志控制台读取，超出容量时丢弃最旧的记录"""
+
+    def __init__(self, capacity=5000, level=logging.DEBUG):
+        super().__init__(level)
+        self.entries = deque(maxlen=capacity)
+        self.seq = 0
+        self.listeners = []
+        self._entries_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            message = record.getMessage() + repeat_suffix(record)
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            if record.exc_text:
+                message = f"{message}\n{record.exc_text}"
+            with self._entries_lock:
+                self.seq += 1
+                entry = LogEntry(self.seq, record.created, record.levelno, record.levelname, record.name, message)
+                self.entries.append(entry)
+            for callback in list(self.listeners):
+                callback(entry)
+        except Exception:
+            self.handleError(record)
+
+    def subscribe(self, callback):
+        """订阅新日志，callback(entry) 在记录日志的线程中调用，应尽快返回；返回取消订阅的函数"""
+        self.listeners.append(callback)
+        return lambda: self.listeners.remove(callback) if callback in self.listeners else None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_entries(self, start=0, count=None, min_level=logging.NOTSET):
+        """按位置读取日志（0 为缓冲区中最旧的一条）"""
+        with self._entries_lock:
+            if min_level <= logging.NOTSET:
+                stop = None if count is None else start + count
+                return list(islice(self.entries, start, stop))
+            entries = [e for e in self.entries if e.levelno >= min_level]
+        return entries[start:None if count is None else start + count]
+
+    def count(self, min_level=logging.NOTSET):
+        with self._entries_lock:
+            if min_level <= logging.NOTSET:
+                return len(self.entries)
+            return sum(1 for e in self.entries if e.levelno >= min_level)
+
+
+_ring_buffer = None
+_setup_lock = threading.Lock()
+
+
+def get_log_dir():
+    return os.path.join(get_app_dir(), "logs")
+
+
+def setup_logging(log_dir=None, level=logging.INFO, capacity=5000, max_bytes=1024 * 1024, backup_count=5, repeat_window=5.0):
+    """配置日志：内存环形缓冲区 + 按大小滚动的日志文件 + 控制台（窗口程序没有控制台时跳过）
+
+    可重复调用，只有第一次生效。返回环形缓冲区。
+    """
+    global _ring_buffer
+    with _setup_lock:
+        if _ring_buffer is not None:
+            return _ring_buffer
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        formatter = RepeatFormatter(LOG_FORMAT)
+        repeat_filter = RepeatFilter(repeat_window)
+        handlers = []
+
+        ring = RingBufferHandler(capacity)
+        handlers.append(ring)
+
+        log_dir = log_dir or get_log_dir()
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, "wxquantum.log"),
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf-8",
+                delay=True,
+            )
+            handlers.append(file_handler)
+        except OSError as e:
+            file_handler = None
+            file_error = e
+
+        # 打包成窗口程序后 sys.stderr 为 None
+        if sys.stderr is not None:
+            handlers.append(logging.StreamHandler(sys.stderr))
+
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            handler.addFilter(repeat_filter)
+            root.addHandler(handler)
+
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        _ring_buffer = ring
+        if file_handler is None:
+            logging.getLogger(__name__).warning("日志文件不可用，只保留内存日志: %s", file_error)
+        return ring
+
+
+def get_ring_buffer():
+    """获取内存日志缓冲区（未配置日志时为 None）"""
+    return _ring_buffer
@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import threading
+
+from config_manager import get_app_dir
+
+logger = logging.getLogger(__name__)
+
+# 资源构建结果目录和清单（相对于程序目录），由 build_assets.py 生成
+ASSET_CACHE_DIR = "assets/cache"
+MANIFEST_NAME = "manifest.json"
+
+# 界面使用的字体：字体族 -> 源字体文件
+FONT_FAMILIES = {
+    "AlimamaFont": "font/阿里妈妈数黑体.ttf",
+    "SourceHanFont": "font/SourceHanSansSC-Normal-2.otf",
+}
+
+# 界面中图片的显示尺寸（宽, 高），构建时按此尺寸预缩放
+IMAGE_SIZES = {
+    "logo.png": (200, 100),
+}
+
+
+class AssetResolver:
+    """运行时资源解析器
+
+    优先使用构建缓存中按内容哈希命名的资源（预缩放的图片、裁剪后的字体），
+    缓存不存在或文件缺失时回退到源文件，源文件也不存在时返回 None。
+    返回的路径均相对于程序目录，与原先直接写路径的用法一致。
+    """
+
+    def __init__(self, base_dir=None, cache_dir=ASSET_CACHE_DIR):
+        self.base_dir = base_dir or get_app_dir()
+        self.cache_dir = cache_dir
+        self._manifest = None
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.base_dir, self.cache_dir, MANIFEST_NAME)
+
+    def load_manifest(self):
+        """读取构建清单，只读取一次"""
+        with self._lock:
+            if self._manifest is None:
+                try:
+                    with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                        self._manifest = json.load(f).get("assets", {})
+                except FileNotFoundError:
+                    self._manifest = {}
+                except Exception as e:
+                    logger.warning("资源清单加载失败: %s", e)
+                    self._manifest = {}
+            return self._manifest
+
+    def invalidate(self):
+        """重新构建资源后丢弃已读取的清单"""
+        with self._lock:
+            self._manifest = None
+
+    def exists(self, path):
+        return os.path.isfile(os.path.join(self.base_dir, path))
+
+    def resolve(self, name):
+        """解析资源路径：构建缓存 -> 源文件 -> None"""
+        entry = self.load_manifest().get(name)
+        if entry and self.exists(entry["path"]):
+            return entry["path"]
+        if self.exists(name):
+            return name
+        return None
+
+    def is_built(self, name):
+        """资源是否来自构建缓存"""
+        entry = self.load_manifest().get(name)
+        return bool(entry) and self.exists(entry["path"])
+
+    def resolve_fonts(self, families=None):
+        """解析字体族，缺失的字体不注册，使用该字体族的控件回退到系统默认字体"""
+        fonts = {}
+        missing = []
+        for family, source in (families or FONT_FAMILIES).items():
+            path = self.resolve(source)
+            if path:
+                fonts[family] = path
+            else:
+                missing.append(family)
+        return fonts, missing
+
+
+_resolver = None
+
+
+def get_resolver():
+    """获取全局资源解析器"""
+    global _resolver
+    if _resolver is None:
+        _resolver = AssetResolver()
+    return _resolver
@@ -0,0 +1,203 @@
+import asyncio
+import gzip
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import tracer
+
+# 后端地址也可以通过 WXQ_BACKEND_URL 环境变量或配置项 backend_url 指定
+BACKEND_URL_ENV = "WXQ_BACKEND_URL"
+DEFAULT_BACKEND_URL = "http://127.0.0.1:8600"
+
+# 请求体超过该大小时使用 gzip 压缩
+COMPRESS_MIN_SIZE = 1024
+
+# 可以重试的状态码（服务暂时不可用或限流）
+RETRY_STATUS = (429, 502, 503, 504)
+
+
+class Endpoint:
+    """后端接口定义：路径、超时（连接, 读取）和最大重试次数"""
+
+    def __init__(self, path, connect_timeout=3.0, read_timeout=5.0, retries=2, method="POST"):
+        self.path = path
+        self.method = method
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+
+
+ENDPOINTS = {
+    "health": Endpoint("/health", 1.0, 2.0, retries=0, method="GET"),
+    "login": Endpoint("/api/login", 3.0, 5.0, retries=2),
+    "register": Endpoint("/api/register", 3.0, 8.0, retries=2),
+    "verify_account": Endpoint("/api/account/verify", 3.0, 5.0, retries=2),
+    "verify_session": Endpoint("/api/session/verify", 3.0, 5.0, retries=2),
+    "logout": Endpoint("/api/logout", 2.0, 3.0, retries=0),
+    # 充值涉及扣卡，读取超时给得更长，靠幂等键保证重试安全
+    "recharge": Endpoint("/api/recharge", 3.0, 15.0, retries=1),
+}
+
+
+class BackendError(Exception):
+    """后端调用失败，message 可以直接显示给用户"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class BackendClient:
+    """后端 HTTP 客户端
+
+    所有请求共用一个保持连接的连接池，每个接口有独立的超时和重试次数，
+    重试使用带随机抖动的指数退避。每次调用带一个幂等键，重试不会重复执行
+    注册、扣卡等操作。同步方法可以在任意线程中调用，*_async 方法在线程池中执行，
+    不阻塞界面事件循环。
+    """
+
+    def __init__(self, base_url=None, pool_size=8, backoff_base=0.2, backoff_max=2.0, compress_min_size=COMPRESS_MIN_SIZE):
+        self.base_url = (base_url or os.environ.get(BACKEND_URL_ENV) or DEFAULT_BACKEND_URL).rstrip("/")
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.compress_min_size = compress_min_size
+
+        self.session = requests.Session()
+        # 重试由客户端自己控制，连接池内部不重试
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": "WxQuantum",
+        })
+
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "time_total": 0.0}
+
+    def encode_body(self, payload):
+        """序列化请求体，较大的请求体使用 gzip 压缩"""
+        body = json.dumps(payload or {}, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if len(body) >= self.compress_min_size:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    def backoff(self, attempt):
+        """第 attempt 次重试前的等待时间（全抖动指数退避）"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, name, payload=None):
+        """调用后端接口，返回响应 JSON，失败时抛出 BackendError"""
+        endpoint = ENDPOINTS[name]
+        url = self.base_url + endpoint.path
+        body, headers = self.encode_body(payload) if endpoint.method == "POST" else (None, {})
+        headers["Idempotency-Key"] = uuid.uuid4().hex
+
+        with tracer.span(f"backend {name}", cat="backend") as span:
+            start = time.perf_counter()
+            last_error = None
+            try:
+                for attempt in range(endpoint.retries + 1):
+                    if attempt:
+                        with self._lock:
+                            self.stats["retries"] += 1
+                        span.set(retries=attempt)
+                        time.sleep(self.backoff(attempt - 1))
+                    try:
+                        response = self.session.request(endpoint.method, url, data=body, headers=headers, timeout=endpoint.timeout)
+                    except requests.ConnectionError:
+                        last_error = BackendError("无法连接服务器，请检查网络")
+                        continue
+                    except requests.Timeout:
+                        last_error = BackendError("服务器响应超时，请稍后重试")
+                        continue
+                    except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError):
+                        last_error = BackendError("服务器连接中断，请稍后重试")
+                        continue
+                    except requests.RequestException as e:
+                        # 地址无效（如配置的 backend_url 有误）、重定向过多等，重试也不会成功
+                        last_error = BackendError(f"无法访问服务器，请检查服务器地址 ({e.__class__.__name__})")
+                        break
+
+                    if response.status_code in RETRY_STATUS:
+                        last_error = BackendError("服务器繁忙，请稍后重试", response.status_code)
+                        continue
+                    span.set(status=response.status_code)
+                    return self.parse_response(response)
+
+                with self._lock:
+                    self.stats["failures"] += 1
+                raise last_error
+            finally:
+                with self._lock:
+                    self.stats["requests"] += 1
+                    self.stats["time_total"] += time.perf_counter() - start
+
+    def parse_response(self, response):
+        """解析响应，业务失败（ok 为 false）同样抛出 BackendError"""
+        try:
+            data = response.json()
+        except ValueError:
+            raise BackendError(f"服务器返回了无效的数据 ({response.status_code})", response.status_code)
+        if not isinstance(data, dict):
+            raise BackendError(f"服务器返回了无效的数据 ({response.status_code})", response.status_code)
+
+        if response.status_code >= 400 or not data.get("ok", False):
+            raise BackendError(data.get("message") or f"请求失败 ({response.status_code})", response.status_code)
+        return data
+
+    async def call_async(self, name, payload=None):
+        """在线程池中调用后端接口"""
+        return await asyncio.to_thread(self.call, name, payload)
+
+    async def login(self, username, password):
+        return await self.call_async("login", {"username": username, "password": password})
+
+    async def register(self, username, password):
+        return await self.call_async("register", {"username": username, "password": password})
+
+    async def verify_account(self, username, password):
+        return await self.call_async("verify_account", {"username": username, "password": password})
+
+    async def verify_session(self, username, token):
+        return await self.call_async("verify_session", {"username": username, "token": token})
+
+    async def logout(self, token):
+        return await self.call_async("logout", {"token": token})
+
+    async def recharge(self, username, card_key):
+        return await self.call_async("recharge", {"username": username, "card_key": card_key})
+
+    def get_stats(self):
+        """获取请求次数、重试次数、失败次数和平均耗时"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["avg_time"] = stats["time_total"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(base_url=None):
+    """获取全局后端客户端，整个程序共用一个连接池"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BackendClient(base_url)
+        return _client
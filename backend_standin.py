@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地后端替身服务
+实现登录、注册、会话校验、账号验证和充值接口（数据只保存在内存中），
+用于在没有正式服务的情况下联调界面和压测后端客户端
+
+用法: python backend_standin.py [--port 8600] [--latency 0.05] [--failure-rate 0.1] [--cards 100]
+测试卡密: python backend_standin.py --print-cards（每张 30 天）
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import random
+import secrets
+import threading
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+
+DEFAULT_PORT = 8600
+SESSION_TTL = 7 * 24 * 3600
+
+
+class StandinState:
+    """替身服务的内存数据"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, cards=100):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.users = {}       # 用户名 -> {"password": 哈希, "expires_at": 时间戳}
+        self.cards = {key: 30 for key in test_card_keys(cards)}  # 卡密 -> 天数
+        self.responses = {}   # 幂等键 -> 响应
+        self.sessions = {}    # 会话令牌 -> (用户名, 过期时间)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @staticmethod
+    def hash_password(password):
+        return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+    def revoke(self, username=None, token=None):
+        """使令牌失效（按令牌或按用户），用于模拟服务器端强制下线"""
+        with self.lock:
+            for key, (owner, _) in list(self.sessions.items()):
+                if key == token or owner == username:
+                    del self.sessions[key]
+
+
+def test_card_keys(count):
+    """替身服务内置的测试卡密"""
+    return [f"TEST-{i:08d}" for i in range(1, count + 1)]
+
+
+def ok(message, **data):
+    return {"ok": True, "message": message, **data}
+
+
+def fail(message, status=400):
+    return JSONResponse({"ok": False, "message": message}, status_code=status)
+
+
+def create_app(latency=0.0, failure_rate=0.0, cards=100):
+    """创建替身服务，latency 为每个请求的模拟延迟，failure_rate 为随机返回 503 的比例，cards 为测试卡密数量"""
+    app = FastAPI(title="WxQuantum 后端替身")
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+    state = app.state.standin = StandinState(latency, failure_rate, cards)
+
+    @app.middleware("http")
+    async def simulate(request: Request, call_next):
+        state.requests += 1
+        if state.latency:
+            await asyncio.sleep(state.latency)
+        if state.failure_rate and random.random() < state.failure_rate:
+            return fail("服务暂时不可用", 503)
+
+        # 相同幂等键的重试直接返回第一次的结果
+        key = request.headers.get("Idempotency-Key")
+        if key and key in state.responses:
+            body, status = state.responses[key]
+            return JSONResponse(body, status_code=status)
+        response = await call_next(request)
+        if key and request.method == "POST":
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            state.responses[key] = (json.loads(body), response.status_code)
+            return JSONResponse(json.loads(body), status_code=response.status_code)
+        return response
+
+    async def read_payload(request):
+        body = await request.body()
+        if request.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return json.loads(body or b"{}")
+
+    def check_account(payload):
+        user = state.users.get(payload.get("username", ""))
+        if not user or user["password"] != state.hash_password(payload.get("password", "")):
+            return None
+        return user
+
+    @app.get("/health")
+    async def health():
+        return ok("running", users=len(state.users), requests=state.requests)
+
+    @app.post("/api/register")
+    async def register(request: Request):
+        payload = await read_payload(request)
+        username, password = payload.get("username", ""), payload.get("password", "")
+        if not username or not password:
+            return fail("用户名和密码不能为空")
+        with state.lock:
+            if username in state.users:
+                return fail("用户名已存在", 409)
+            state.users[username] = {"password": state.hash_password(password), "expires_at": 0}
+        return ok("注册成功")
+
+    @app.post("/api/login")
+    async def login(request: Request):
+        payload = await read_payload(request)
+        user = check_account(payload)
+        if not user:
+            return fail("用户名或密码错误", 401)
+        token = secrets.token_hex(32)
+        token_expires_at = time.time() + SESSION_TTL
+        with state.lock:
+            state.sessions[token] = (payload["username"], token_expires_at)
+        return ok("登录成功", token=token, token_expires_at=token_expires_at, expires_at=user["expires_at"])
+
+    @app.post("/api/session/verify")
+    async def verify_session(request: Request):
+        payload = await read_payload(request)
+        session = state.sessions.get(payload.get("token", ""))
+        if not session or session[0] != payload.get("username") or session[1] <= time.time():
+            return fail("登录已失效，请重新登录", 401)
+        return ok("会话有效", expires_at=state.users[session[0]]["expires_at"])
+
+    @app.post("/api/logout")
+    async def logout(request: Request):
+        state.revoke(token=(await read_payload(request)).get("token"))
+        return ok("已退出登录")
+
+    @app.post("/api/account/verify")
+    async def verify_account(request: Request):
+        user = check_account(await read_payload(request))
+        if not user:
+            return fail("账号或密码错误", 401)
+        return ok("账号验证通过", expires_at=user["expires_at"])
+
+    @app.post("/api/recharge")
+    async def recharge(request: Request):
+        payload = await read_payload(request)
+        with state.lock:
+            user = state.users.get(payload.get("username", ""))
+            if not user:
+                return fail("账号不存在", 404)
+            days = state.cards.pop(payload.get("card_key", ""), None)
+            if days is None:
+                return fail("卡密无效或已被使用")
+            user["expires_at"] = max(user["expires_at"], time.time()) + days * 86400
+        return ok(f"充值成功，增加 {days} 天", expires_at=user["expires_at"])
+
+    return app
+
+
+def run_in_thread(app, host="127.0.0.1", port=DEFAULT_PORT):
+    """在后台线程中启动服务，返回 uvicorn.Server，设置 should_exit 即可停止"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="backend-standin", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"替身服务启动失败（端口 {port}）")
+        time.sleep(0.01)
+    return server
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="WxQuantum 后端替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="随机返回 503 的比例")
+    parser.add_argument("--cards", type=int, default=100, help="测试卡密数量")
+    parser.add_argument("--print-cards", action="store_true", help="打印测试卡密后退出")
+    args = parser.parse_args()
+
+    if args.print_cards:
+        print("\n".join(test_card_keys(args.cards)))
+        return
+    uvicorn.run(create_app(args.latency, args.failure_rate, args.cards), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内 API 服务压测
+在本进程中启动 ApiHost，由独立进程持续发送模拟自动化调用，
+同时在主线程模拟界面帧循环，测量 API 吞吐、延迟、拒绝数以及界面帧延迟
+
+用法: python benchmarks/bench_api_host.py [--clients 16] [--duration 5] [--work 0.02] [--workers 4] [--queue 64]
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FRAME_INTERVAL = 1 / 60
+
+
+def load_client(url, duration, results):
+    """单个负载进程：持续调用接口，统计成功、拒绝和延迟"""
+    import requests
+
+    session = requests.Session()
+    ok = rejected = 0
+    timings = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        response = session.get(url, timeout=10)
+        timings.append(time.perf_counter() - start)
+        if response.status_code == 503:
+            rejected += 1
+            time.sleep(0.05)
+        else:
+            ok += 1
+    results.put((ok, rejected, timings))
+
+
+def measure_frames(duration):
+    """模拟界面帧循环，返回每帧的延迟（实际间隔 - 期望间隔）"""
+    lateness = []
+    deadline = time.monotonic() + duration
+    expected = time.monotonic() + FRAME_INTERVAL
+    while time.monotonic() < deadline:
+        time.sleep(max(0.0, expected - time.monotonic()))
+        now = time.monotonic()
+        lateness.append(max(0.0, now - expected))
+        expected = now + FRAME_INTERVAL
+    return lateness
+
+
+def main():
+    from fastapi import APIRouter
+
+    from api_host import ApiHost
+
+    parser = argparse.ArgumentParser(description="进程内 API 服务压测")
+    parser.add_argument("--clients", type=int, default=16, help="并发负载进程数")
+    parser.add_argument("--duration", type=float, default=5.0, help="压测时长（秒）")
+    parser.add_argument("--work", type=float, default=0.02, help="每次自动化调用的阻塞时间（秒）")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8796)
+    args = parser.parse_args()
+
+    router = APIRouter()
+
+    @router.get("/api/automation")
+    def automation():
+        # 模拟阻塞的微信自动化操作
+        time.sleep(args.work)
+        return {"ok": True}
+
+    host = ApiHost(port=args.port, workers=args.workers, queue_size=args.queue)
+    host.register(router)
+    host.start()
+
+    idle = measure_frames(1.0)
+
+    results = multiprocessing.Queue()
+    url = f"http://127.0.0.1:{args.port}/api/automation"
+    clients = [multiprocessing.Process(target=load_client, args=(url, args.duration, results)) for _ in range(args.clients)]
+    for process in clients:
+        process.start()
+    loaded = measure_frames(args.duration)
+
+    ok = rejected = 0
+    timings = []
+    for _ in clients:
+        client_ok, client_rejected, client_timings = results.get()
+        ok += client_ok
+        rejected += client_rejected
+        timings.extend(client_timings)
+    for process in clients:
+        process.join()
+
+    stop_start = time.perf_counter()
+    metrics = host.get_metrics()
+    host.stop()
+    stop_time = time.perf_counter() - stop_start
+
+    timings.sort()
+    print(f"API: {ok / args.duration:.0f} 次/秒（理论上限 {args.workers / args.work:.0f}），拒绝 {rejected}")
+    print(f"API 延迟: p50 {statistics.median(timings) * 1000:.1f}ms  p95 {timings[int(len(timings) * 0.95)] * 1000:.1f}ms")
+    print(f"服务端统计: {metrics}")
+    for name, lateness in (("空闲", idle), ("负载", loaded)):
+        lateness.sort()
+        print(f"界面帧延迟（{name}）: p50 {statistics.median(lateness) * 1000:.2f}ms  p99 {lateness[int(len(lateness) * 0.99)] * 1000:.2f}ms")
+    print(f"停止耗时: {stop_time * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
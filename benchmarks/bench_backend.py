@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端客户端压测
+启动本地替身服务，对比每次请求新建连接与共用连接池的延迟，
+并测量并发吞吐量和在随机失败下的重试效果
+
+用法: python benchmarks/bench_backend.py [--requests 200] [--concurrency 8] [--latency 0.0]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import requests  # noqa: E402
+
+from backend_client import BackendClient, BackendError  # noqa: E402
+from backend_standin import create_app, run_in_thread  # noqa: E402
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def report(name, timings, elapsed, errors=0):
+    print(
+        f"{name:<28}p50 {statistics.median(timings) * 1000:>7.2f}ms  "
+        f"p95 {percentile(timings, 0.95) * 1000:>7.2f}ms  "
+        f"{len(timings) / elapsed:>8.0f} req/s  失败 {errors}"
+    )
+
+
+def bench_new_connection(base_url, count):
+    """旧方式：每次点击 requests.post，新建一条连接"""
+    timings = []
+    start = time.perf_counter()
+    for i in range(count):
+        begin = time.perf_counter()
+        requests.post(f"{base_url}/api/login", json={"username": "bench", "password": "bench"}, timeout=5)
+        timings.append(time.perf_counter() - begin)
+    report("每次新建连接", timings, time.perf_counter() - start)
+
+
+def bench_pooled(client, count):
+    timings = []
+    start = time.perf_counter()
+    for _ in range(count):
+        begin = time.perf_counter()
+        client.call("login", {"username": "bench", "password": "bench"})
+        timings.append(time.perf_counter() - begin)
+    report("连接池（顺序）", timings, time.perf_counter() - start)
+
+
+async def bench_concurrent(client, count, concurrency, name):
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            begin = time.perf_counter()
+            try:
+                await client.login("bench", "bench")
+            except BackendError:
+                errors += 1
+            timings.append(time.perf_counter() - begin)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    report(name, timings, time.perf_counter() - start, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后端客户端压测")
+    parser.add_argument("--requests", type=int, default=200, help="每个场景的请求数")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发请求数")
+    parser.add_argument("--latency", type=float, default=0.0, help="替身服务的模拟延迟（秒）")
+    parser.add_argument("--port", type=int, default=8699)
+    args = parser.parse_args()
+
+    app = create_app(latency=args.latency)
+    server = run_in_thread(app, port=args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    app.state.standin.users["bench"] = {"password": app.state.standin.hash_password("bench"), "expires_at": 0}
+
+    try:
+        client = BackendClient(base_url, pool_size=args.concurrency)
+        client.call("health")  # 预热连接
+
+        bench_new_connection(base_url, args.requests)
+        bench_pooled(client, args.requests)
+        asyncio.run(bench_concurrent(client, args.requests, args.concurrency, f"连接池（并发 {args.concurrency}）"))
+
+        # 20% 的请求返回 503，观察重试后的成功率和尾延迟
+        app.state.standin.failure_rate = 0.2
+        retry_client = BackendClient(base_url, pool_size=args.concurrency, backoff_base=0.05)
+        asyncio.run(bench_concurrent(retry_client, args.requests, args.concurrency, "20% 失败 + 重试"))
+        print(f"重试统计: {retry_client.get_stats()}")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
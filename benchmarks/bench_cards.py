@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量卡密兑换压测
+在本地替身服务上用不同并发数兑换同一批卡密（混入已使用、格式错误和重复的卡密），
+报告吞吐量（张/秒）和失败分类
+
+用法: python benchmarks/bench_cards.py [--cards 300] [--latency 0.05] [--concurrency 1 4 8 16]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend_client import BackendClient  # noqa: E402
+from backend_standin import create_app, run_in_thread, test_card_keys  # noqa: E402
+from card_batch import CardBatch, parse_card_keys  # noqa: E402
+
+
+def build_input(keys, used_keys):
+    """模拟经销商粘贴的列表：有效卡密 + 已使用 + 重复 + 无效字符 + 输错（由服务器拒绝）的卡密"""
+    lines = list(keys) + list(used_keys)
+    lines += keys[:5]                                          # 重复
+    lines += ["卡密：", "TEST－０１"]                           # 无效字符
+    lines += [key + "X" for key in keys[5:10]]                 # 输错，服务器判定无效
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量卡密兑换压测")
+    parser.add_argument("--cards", type=int, default=300, help="每轮兑换的卡密数")
+    parser.add_argument("--latency", type=float, default=0.05, help="替身服务的模拟延迟（秒）")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--port", type=int, default=8697)
+    args = parser.parse_args()
+
+    rounds = len(args.concurrency)
+    app = create_app(latency=args.latency, cards=(args.cards + 10) * rounds)
+    server = run_in_thread(app, port=args.port)
+    state = app.state.standin
+    state.users["reseller"] = {"password": state.hash_password("secret"), "expires_at": 0}
+    all_keys = test_card_keys((args.cards + 10) * rounds)
+
+    try:
+        print(f"{'并发':>4}{'本地拒绝':>10}{'兑换':>8}{'成功':>8}{'张/秒':>10}  失败分类")
+        for index, concurrency in enumerate(args.concurrency):
+            offset = index * (args.cards + 10)
+            keys = all_keys[offset:offset + args.cards]
+            # 每轮有 10 张卡密预先被用掉
+            used = all_keys[offset + args.cards:offset + args.cards + 10]
+            for key in used:
+                state.cards.pop(key, None)
+
+            valid, rejected = parse_card_keys(build_input(keys, used))
+            client = BackendClient(f"http://127.0.0.1:{args.port}", pool_size=max(concurrency, 1))
+            batch = CardBatch(client, "reseller", concurrency)
+            asyncio.run(batch.run(valid))
+            print(
+                f"{concurrency:>4}{len(rejected):>10}{len(valid):>8}{batch.succeeded:>8}"
+                f"{batch.throughput():>10.1f}  {batch.failures()}"
+            )
+            client.close()
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
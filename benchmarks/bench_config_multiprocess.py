@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程共享配置压测
+多个进程同时读写同一个配置文件，统计丢失的更新、文件锁竞争和热加载延迟
+
+用法: python benchmarks/bench_config_multiprocess.py [--processes 8] [--writes 50]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_manager import ConfigManager  # noqa: E402
+
+
+def writer(config_file, index, writes, results):
+    """每个进程：写自己的键（合并写盘）并对共享计数器做读-改-写"""
+    config = ConfigManager(config_file, flush_delay=0.01, watch_interval=0)
+    start = time.perf_counter()
+    for i in range(writes):
+        config.set(f"worker_{index}", i)
+        config.modify("counter", lambda value: (value or 0) + 1)
+    config.close()
+    results.put({
+        "index": index,
+        "elapsed": time.perf_counter() - start,
+        "contended": config.file_lock.contended,
+        "acquisitions": config.file_lock.acquisitions,
+        "wait_total": config.file_lock.wait_total,
+    })
+
+
+def watcher(config_file, rounds, interval, results):
+    """观察进程：测量其他进程写盘后多久能热加载到新值"""
+    config = ConfigManager(config_file, watch_interval=interval)
+    latencies = []
+    seen = multiprocessing.Event()
+
+    def on_change(key, value):
+        if value is not None:
+            latencies.append(time.time() - value)
+            seen.set()
+    config.subscribe(on_change, key="ping")
+
+    results.put("ready")
+    deadline = time.monotonic() + rounds * (interval * 4 + 1)
+    while len(latencies) < rounds and time.monotonic() < deadline:
+        seen.wait(0.1)
+        seen.clear()
+    config.close()
+    results.put(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程共享配置压测")
+    parser.add_argument("--processes", type=int, default=8, help="并发写入的进程数")
+    parser.add_argument("--writes", type=int, default=50, help="每个进程的写入次数")
+    parser.add_argument("--watch-interval", type=float, default=0.1, help="配置文件监视间隔（秒）")
+    parser.add_argument("--pings", type=int, default=10, help="热加载延迟采样次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        config_file = os.path.join(directory, "config.json")
+
+        # 并发写入
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=writer, args=(config_file, i, args.writes, results))
+            for i in range(args.processes)
+        ]
+        start = time.perf_counter()
+        for p in workers:
+            p.start()
+        stats = [results.get() for _ in workers]
+        for p in workers:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        final = ConfigManager(config_file, watch_interval=0)
+        expected = args.processes * args.writes
+        counter = final.get_int("counter")
+        lost_keys = [i for i in range(args.processes) if final.get(f"worker_{i}") != args.writes - 1]
+        acquisitions = sum(s["acquisitions"] for s in stats)
+        contended = sum(s["contended"] for s in stats)
+        wait_total = sum(s["wait_total"] for s in stats)
+
+        print(f"进程数: {args.processes}  每进程写入: {args.writes}  总耗时: {elapsed:.2f}s")
+        print(f"共享计数器: {counter}/{expected}  丢失更新: {expected - counter}  丢失的独立键: {len(lost_keys)}")
+        print(f"加锁次数: {acquisitions}  发生竞争: {contended} ({contended / max(acquisitions, 1):.1%})"
+              f"  平均等待: {wait_total / max(contended, 1) * 1000:.2f}ms")
+
+        # 热加载延迟
+        queue = multiprocessing.Queue()
+        observer = multiprocessing.Process(
+            target=watcher, args=(config_file, args.pings, args.watch_interval, queue)
+        )
+        observer.start()
+        queue.get()
+        for _ in range(args.pings):
+            final.set("ping", time.time())
+            final.flush()
+            time.sleep(args.watch_interval * 2)
+        latencies = queue.get()
+        observer.join()
+        final.close()
+
+        if latencies:
+            print(f"热加载延迟: 中位数 {statistics.median(latencies) * 1000:.1f}ms"
+                  f"  最大 {max(latencies) * 1000:.1f}ms  ({len(latencies)}/{args.pings} 次)")
+        else:
+            print("热加载延迟: 未观察到配置变化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+微信路径检测压测
+使用模拟后端在任意平台上对比顺序检测与并发检测流程的耗时，并测量路径校验缓存命中的耗时
+（缓存和变更通知的正确性见 tests/test_path_validator.py）
+
+用法: python benchmarks/bench_detection.py [--slow-drive-delay 2.0] [--rounds 5] [--validations 10000]
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from path_validator import PathValidator  # noqa: E402
+
+from wechat_detector import (  # noqa: E402
+    HKEY_LOCAL_MACHINE,
+    CandidatePathProbe,
+    FakeBackend,
+    RegistryProbe,
+    WeChatPathDetector,
+)
+
+SCENARIOS = {
+    # 只装了新版 Weixin，注册表中有记录
+    "registry_weixin": dict(
+        registry={(HKEY_LOCAL_MACHINE, r"SOFTWARE\Tencent\Weixin", "InstallPath"): r"C:\Program Files\Tencent\Weixin"},
+        files=[r"C:\Program Files\Tencent\Weixin\Weixin.exe"],
+    ),
+    # 注册表无记录，微信装在 C 盘，D 盘是休眠的机械盘
+    "c_drive_with_sleeping_d": dict(
+        files=[r"C:\Program Files (x86)\Tencent\Weixin\Weixin.exe"],
+        slow_drive="D:",
+    ),
+    # 只能通过开始菜单快捷方式找到
+    "start_menu_only": dict(
+        files=[r"E:\Apps\WeChat\WeChat.exe"],
+        shortcuts={r"C:\ProgramData\Microsoft\Windows\Start Menu\Programs\微信\微信.lnk": r"E:\Apps\WeChat\WeChat.exe"},
+        slow_drive="D:",
+    ),
+    # 完全没有安装
+    "not_installed": dict(slow_drive="D:"),
+}
+
+
+def sequential_detect(detector):
+    """旧的顺序检测：注册表 -> 常见路径"""
+    cancel = threading.Event()
+    return RegistryProbe().find(detector.backend, cancel) or CandidatePathProbe(
+        detector.common_paths
+    ).find(detector.backend, cancel)
+
+
+def make_detector(scenario, delay):
+    backend = FakeBackend(
+        registry=scenario.get("registry"),
+        files=scenario.get("files"),
+        shortcuts=scenario.get("shortcuts"),
+        delays={scenario["slow_drive"]: delay} if scenario.get("slow_drive") else None,
+    )
+    return WeChatPathDetector(
+        backend=backend,
+        start_menu_dirs=[r"C:\ProgramData\Microsoft\Windows\Start Menu\Programs"],
+    )
+
+
+def measure(func, rounds):
+    timings = []
+    result = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings)
+
+
+def measure_validator(validations):
+    """路径校验缓存命中：返回 (每次校验耗时, 校验时访问磁盘的次数)"""
+    weixin = r"C:\Program Files\Tencent\Weixin\Weixin.exe"
+    validator = PathValidator(FakeBackend(files={weixin: (1024, 1)}))
+    try:
+        validator.validate(weixin)
+        # 监视线程自己的 stat 不算在内，只统计校验时访问磁盘的次数
+        checked = validator.stats["checked"]
+        start = time.perf_counter()
+        for _ in range(validations):
+            validator.validate(weixin)
+        elapsed = time.perf_counter() - start
+        return elapsed / validations, validator.stats["checked"] - checked
+    finally:
+        validator.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="微信路径检测压测")
+    parser.add_argument("--slow-drive-delay", type=float, default=2.0, help="慢速磁盘每次 stat 的阻塞时间（秒）")
+    parser.add_argument("--rounds", type=int, default=3, help="每个场景重复次数")
+    parser.add_argument("--validations", type=int, default=10_000, help="缓存命中测量的校验次数")
+    args = parser.parse_args()
+
+    print(f"{'场景':<28}{'顺序检测':>12}{'并发检测':>12}  命中策略 / 结果")
+    for name, scenario in SCENARIOS.items():
+        detector = make_detector(scenario, args.slow_drive_delay)
+        seq_result, seq_time = measure(lambda: sequential_detect(detector), args.rounds)
+        par_result, par_time = measure(detector.auto_detect, args.rounds)
+        hit = detector.pipeline.last_hit if detector.pipeline else None
+        print(f"{name:<28}{seq_time * 1000:>10.1f}ms{par_time * 1000:>10.1f}ms  {hit} / {par_result}")
+        if seq_result and par_result is None:
+            print(f"  警告: 并发检测未找到顺序检测的结果 {seq_result}")
+
+    per_call, disk = measure_validator(args.validations)
+    print(f"\n路径校验缓存命中: {args.validations} 次校验，每次 {per_call * 1e6:.2f}µs，访问磁盘 {disk} 次")
+
+if __name__ == "__main__":
+    main()
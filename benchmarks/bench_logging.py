@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志子系统压测
+1. 不同内容和重复内容的日志写入耗时（重复日志被合并，只计数）
+2. 写入大量日志后环形缓冲区的内存占用（应当有上限）
+3. 日志控制台刷新一次可见行的耗时，与缓冲区中的日志数量无关
+
+用法: python benchmarks/bench_logging.py [--records 100000] [--capacity 5000]
+"""
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app_logging import RepeatFilter, RingBufferHandler  # noqa: E402
+
+
+def make_logger(capacity):
+    logger = logging.getLogger("bench")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    ring = RingBufferHandler(capacity)
+    ring.addFilter(RepeatFilter())
+    logger.addHandler(ring)
+    return logger, ring
+
+
+def bench_write(records, capacity):
+    logger, ring = make_logger(capacity)
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info("消息 %d", i)
+    unique = (time.perf_counter() - start) / records
+
+    start = time.perf_counter()
+    for _ in range(records):
+        logger.warning("动画执行错误: %s", "boom")
+    repeated = (time.perf_counter() - start) / records
+    print(f"写入不同日志: {unique * 1e6:.1f}us/条，重复日志: {repeated * 1e6:.1f}us/条")
+    print(f"缓冲区: {len(ring)} 条（容量 {capacity}），重复日志只保留 {ring.count(logging.WARNING)} 条")
+
+
+def bench_memory(records, capacity):
+    tracemalloc.start()
+    logger, ring = make_logger(capacity)
+    for i in range(records // 10):
+        logger.info("消息 %d", i)
+    early = tracemalloc.get_traced_memory()[0]
+    for i in range(records):
+        logger.info("消息 %d", i)
+    late = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"内存: 写入 {records // 10} 条后 {early / 1024:.0f}KB，再写入 {records} 条后 {late / 1024:.0f}KB")
+
+
+def bench_console(capacity):
+    try:
+        from log_console import LogConsole
+    except ImportError:
+        print("未安装 flet，跳过控制台刷新测试")
+        return
+
+    class Updater:
+        requests = 0
+
+        def request(self, *controls):
+            Updater.requests += len(controls)
+
+    logger, ring = make_logger(capacity)
+    console = LogConsole(ring, Updater())
+    console._mounted = True  # 不连接页面，只统计需要同步的控件
+    for filled in (100, capacity):
+        while len(ring) < filled:
+            logger.info("消息 %d", ring.seq)
+        rounds = 200
+        start = time.perf_counter()
+        for i in range(rounds):
+            logger.info("新消息 %d", i)
+            console.refresh()
+        cost = (time.perf_counter() - start) / rounds
+        print(f"控制台刷新（缓冲区 {filled} 条）: {cost * 1000:.3f}ms/次，"
+              f"平均同步 {Updater.requests / rounds:.1f} 个控件")
+        Updater.requests = 0
+        console.level_checkbox.value = True
+        console.on_level_change(None)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            console.refresh()
+        print(f"  只看警告和错误时刷新: {(time.perf_counter() - start) / rounds * 1000:.3f}ms/次")
+        console.level_checkbox.value = False
+        console.on_level_change(None)
+        Updater.requests = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日志子系统压测")
+    parser.add_argument("--records", type=int, default=100_000, help="写入的日志条数")
+    parser.add_argument("--capacity", type=int, default=5000, help="环形缓冲区容量")
+    args = parser.parse_args()
+
+    bench_write(args.records, args.capacity)
+    bench_memory(args.records, args.capacity)
+    bench_console(args.capacity)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多开启动压测
+为每个账号生成一个虚拟的 WeChat.exe（Python 脚本：启动时占用 CPU 一段时间后写入就绪文件），
+用不同的并发数和错峰间隔启动全部账号，报告总用时和每个实例的启动耗时（仅 Linux/macOS）
+
+虚拟微信和真实微信一样是单实例程序：用一个共享的锁文件模拟单实例互斥量，已有实例持有锁时新进程立即退出。
+启动器每次启动前删除锁文件（模拟关闭互斥量）；--no-release 时不解除，只有第一个实例能启动。
+
+用法: python benchmarks/bench_multi_launch.py [--profiles 12] [--concurrency 1 2 4 12] [--stagger 0.1] [--no-release]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config_manager import ConfigManager  # noqa: E402
+from multi_launcher import MultiLauncher  # noqa: E402
+from process_supervisor import ProcessSupervisor  # noqa: E402
+from wechat_detector import WeChatPathDetector  # noqa: E402
+
+# 虚拟微信：检查单实例锁，启动阶段做固定量的计算（并发启动时互相争抢 CPU），然后写入就绪文件
+DUMMY_WECHAT = """#!{python}
+import os, sys, time
+try:
+    os.close(os.open({lock!r}, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+except FileExistsError:
+    sys.exit(0)  # 已有实例：把启动请求交给它后退出
+sum(i * i for i in range({work}))
+open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ready"), "w").close()
+time.sleep(3600)
+"""
+
+
+def file_ready_check(supervised, profile):
+    return os.path.exists(os.path.join(os.path.dirname(profile["wechat_path"]), "ready"))
+
+
+def instance_lock_path(root):
+    return os.path.join(root, "instance.lock")
+
+
+def make_release(root):
+    """模拟 release_wechat_mutex：删除单实例锁文件"""
+    def release():
+        try:
+            os.remove(instance_lock_path(root))
+            return 1
+        except FileNotFoundError:
+            return 0
+    return release
+
+
+def make_profiles(root, count, work):
+    config = ConfigManager(os.path.join(root, "config.json"), flush_delay=0)
+    for i in range(count):
+        directory = os.path.join(root, f"account{i}")
+        os.makedirs(directory)
+        path = os.path.join(directory, "WeChat.exe")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(DUMMY_WECHAT.format(python=sys.executable, work=work, lock=instance_lock_path(root)))
+        os.chmod(path, 0o755)
+        config.set_profile(f"account{i}", wechat_path=path)
+    # 一个路径无效的账号，预检时应当被拒绝
+    config.set_profile("broken", wechat_path=os.path.join(root, "missing", "WeChat.exe"))
+    config.flush()
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多开启动压测")
+    parser.add_argument("--profiles", type=int, default=12, help="账号数")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 12])
+    parser.add_argument("--stagger", type=float, default=0.1, help="相邻两次启动的最小间隔（秒）")
+    parser.add_argument("--work", type=int, default=10_000_000, help="虚拟微信启动阶段的计算量")
+    parser.add_argument("--no-release", action="store_true", help="启动前不解除单实例限制")
+    args = parser.parse_args()
+
+    if os.name == "nt":
+        print("虚拟微信是 Python 脚本，需要在 Linux/macOS 上运行")
+        return
+
+    print(f"CPU 核心数: {os.cpu_count()}，账号数: {args.profiles}，错峰 {args.stagger}s")
+    print(f"{'并发':>4}{'总用时':>10}{'启动耗时 p50':>14}{'最长':>10}{'排队 p50':>12}{'重新启动':>10}  失败")
+    for concurrency in args.concurrency:
+        root = tempfile.mkdtemp()
+        config = make_profiles(root, args.profiles, args.work)
+        supervisor = ProcessSupervisor()
+        launcher = MultiLauncher(
+            config,
+            WeChatPathDetector(),
+            supervisor,
+            concurrency=concurrency,
+            stagger=args.stagger,
+            ready_timeout=60,
+            ready_check=file_ready_check,
+            poll_interval=0.05,
+            release_instance_lock=None if args.no_release else make_release(root),
+            supervise_options={"backoff_base": 0.1},
+        )
+        report = launcher.launch_all()
+        latencies = [r.launch_time for r in report.succeeded] or [0.0]
+        waits = [r.wait_time for r in report.succeeded] or [0.0]
+        retries = sum(max(0, r.attempts - 1) for r in report.results)
+        failed = {r.name: r.error for r in report.failed}
+        print(
+            f"{concurrency:>4}{report.elapsed:>9.2f}s{statistics.median(latencies):>13.2f}s"
+            f"{max(latencies):>9.2f}s{statistics.median(waits):>11.2f}s{retries:>10}  {failed}"
+        )
+        supervisor.stop(kill=True)
+        config.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
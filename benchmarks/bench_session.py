@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话缓存压测
+对本地替身服务完整走一遍：登录并保存会话 -> 离线恢复 -> 后台复核 -> 服务器强制下线，
+并对比离线恢复与完整登录往返的耗时
+
+用法: python benchmarks/bench_session.py [--latency 0.15] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend_client import BackendClient, BackendError  # noqa: E402
+from backend_standin import create_app, run_in_thread  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+
+def median_ms(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话缓存压测")
+    parser.add_argument("--latency", type=float, default=0.15, help="替身服务的模拟网络延迟（秒）")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8698)
+    args = parser.parse_args()
+
+    app = create_app(latency=args.latency)
+    server = run_in_thread(app, port=args.port)
+    client = BackendClient(f"http://127.0.0.1:{args.port}")
+    directory = tempfile.mkdtemp()
+    store = SessionStore(f"{directory}/session.dat", f"{directory}/session.key")
+
+    try:
+        client.call("register", {"username": "operator", "password": "secret"})
+        result = client.call("login", {"username": "operator", "password": "secret"})
+        store.save("operator", result["token"], result["token_expires_at"])
+
+        login_ms = median_ms(lambda: client.call("login", {"username": "operator", "password": "secret"}), args.rounds)
+        resume_ms = median_ms(store.load, args.rounds)
+        print(f"完整登录往返: {login_ms:.1f}ms")
+        print(f"离线恢复会话: {resume_ms:.2f}ms")
+
+        session = store.load()
+        asyncio.run(client.verify_session(session["username"], session["token"]))
+        print("后台复核: 会话有效")
+
+        app.state.standin.revoke(username="operator")
+        try:
+            asyncio.run(client.verify_session(session["username"], session["token"]))
+            print("错误: 令牌已吊销但复核通过")
+        except BackendError as e:
+            store.clear()
+            print(f"后台复核: {e.message}（状态码 {e.status}），已清除本地会话 -> {store.load()}")
+
+        # 篡改文件后应当无法通过离线校验
+        store.save("operator", "token", time.time() + 60)
+        with open(store.store_file, "r+", encoding="utf-8") as f:
+            content = f.read()
+            f.seek(0)
+            f.write(content.replace('"data": "', '"data": "AAAA', 1))
+        print(f"篡改后离线校验: {store.load()} ({store.last_error})")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
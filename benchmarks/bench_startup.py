@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时压测
+在全新的子进程中构建登录页面（无窗口），记录首帧时间和最慢的模块导入，
+结果追加到 benchmarks/results/startup_history.jsonl 并与上一次运行对比
+
+用法: python benchmarks/bench_startup.py [--rounds 5] [--config 临时配置路径]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HISTORY_FILE = Path(__file__).resolve().parent / "results" / "startup_history.jsonl"
+
+# 子进程：启用分析 -> 导入登录模块 -> 在无窗口页面上构建界面
+CHILD_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+sys.path.insert(0, {bench!r})
+from startup_profiler import profiler
+profiler.start()
+from headless import make_page
+import login
+page, connection = make_page()
+login.LoginPage(page)
+"""
+
+
+def run_once(config_file):
+    """运行一次冷启动，返回分析报告"""
+    with tempfile.TemporaryDirectory() as tmp:
+        report_file = os.path.join(tmp, "startup.json")
+        env = dict(os.environ, WXQ_PROFILE_STARTUP=report_file, WXQ_CONFIG=config_file)
+        script = CHILD_SCRIPT.format(root=str(ROOT), bench=str(Path(__file__).resolve().parent))
+        subprocess.run([sys.executable, "-c", script], env=env, check=True, cwd=str(ROOT))
+        with open(report_file, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def load_previous():
+    """读取上一次的运行结果"""
+    if not HISTORY_FILE.exists():
+        return None
+    lines = HISTORY_FILE.read_text(encoding="utf-8").strip().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时压测")
+    parser.add_argument("--rounds", type=int, default=5, help="冷启动次数")
+    parser.add_argument("--config", help="使用的配置文件（默认为临时空配置）")
+    args = parser.parse_args()
+
+    config_dir = tempfile.mkdtemp()
+    config_file = args.config or os.path.join(config_dir, "config.json")
+
+    reports = [run_once(config_file) for _ in range(args.rounds)]
+    marks = {}
+    for report in reports:
+        for name, elapsed in report["marks"].items():
+            marks.setdefault(name, []).append(elapsed)
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "rounds": args.rounds,
+        "marks": {name: statistics.median(values) for name, values in marks.items()},
+        "import_total": statistics.median(r["import_total"] for r in reports),
+        "slowest_imports": reports[-1]["imports"][:10],
+    }
+
+    previous = load_previous()
+    print(f"{'节点':<24}{'本次(中位数)':>14}{'上次':>12}")
+    for name, elapsed in result["marks"].items():
+        before = previous["marks"].get(name) if previous else None
+        before_text = f"{before * 1000:.1f}ms" if before is not None else "-"
+        print(f"{name:<24}{elapsed * 1000:>12.1f}ms{before_text:>12}")
+    print(f"模块导入自身耗时合计: {result['import_total'] * 1000:.1f}ms")
+    print("最慢的模块导入:")
+    for item in result["slowest_imports"]:
+        print(f"  {item['module']:<36}{item['self'] * 1000:>8.1f}ms")
+
+    HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
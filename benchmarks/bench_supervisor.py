@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程监管压测
+用 Python 虚拟子进程模拟几十个被监管的程序（常驻、崩溃、派生子进程、卡死），
+统计监管器本身的 CPU 开销、采样间隔以及崩溃和卡死后的重启情况
+
+用法: python benchmarks/bench_supervisor.py [--processes 40] [--duration 15] [--kinds steady forker]
+只用 steady 和 forker 时可以观察稳定状态下采样间隔放宽后的开销
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import psutil  # noqa: E402
+
+from process_supervisor import ProcessSupervisor  # noqa: E402
+
+# 虚拟子进程
+DUMMIES = {
+    # 常驻，偶尔占用一点 CPU
+    "steady": "import time\nwhile True:\n    sum(range(20000))\n    time.sleep(0.2)",
+    # 运行 1~3 秒后崩溃
+    "crasher": "import random, sys, time\ntime.sleep(random.uniform(1, 3))\nsys.exit(1)",
+    # 派生 3 个子进程
+    "forker": (
+        "import subprocess, sys, time\n"
+        "children = [subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(3600)']) for _ in range(3)]\n"
+        "time.sleep(3600)"
+    ),
+    # 1 秒后暂停自己（模拟卡死，仅 Linux/macOS）
+    "hanger": "import os, signal, time\ntime.sleep(1)\nos.kill(os.getpid(), signal.SIGSTOP)\ntime.sleep(3600)",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="进程监管压测")
+    parser.add_argument("--processes", type=int, default=40, help="被监管的进程数")
+    parser.add_argument("--duration", type=float, default=15.0, help="压测时长（秒）")
+    parser.add_argument("--kinds", nargs="+", choices=list(DUMMIES), default=list(DUMMIES), help="使用的虚拟子进程类型")
+    args = parser.parse_args()
+
+    kinds = [kind for kind in args.kinds if kind != "hanger" or os.name != "nt"]
+    supervisor = ProcessSupervisor(min_interval=0.5, max_interval=5.0)
+    events = {}
+    supervisor.subscribe(lambda supervised, event: events.__setitem__(event, events.get(event, 0) + 1))
+
+    me = psutil.Process()
+    cpu_before = sum(me.cpu_times()[:2])
+    start = time.monotonic()
+    for i in range(args.processes):
+        kind = kinds[i % len(kinds)]
+        supervisor.add(
+            f"{kind}-{i}",
+            [sys.executable, "-c", DUMMIES[kind]],
+            hang_timeout=2.0,
+            backoff_base=0.5,
+            backoff_max=4.0,
+        )
+
+    intervals = []
+    while time.monotonic() - start < args.duration:
+        time.sleep(0.5)
+        intervals.append(supervisor.interval)
+
+    elapsed = time.monotonic() - start
+    cpu_used = sum(me.cpu_times()[:2]) - cpu_before
+    snapshot = supervisor.snapshot()
+    overhead = supervisor.get_overhead()
+    forker = supervisor.get(next(name for name in snapshot if name.startswith("forker")))
+    supervisor.stop(kill=True)
+
+    print(f"被监管进程: {args.processes}，时长 {elapsed:.1f}s，采样 {overhead['cycles']} 轮")
+    print(f"每轮采样耗时: {overhead['avg_cycle_time'] * 1000:.2f}ms，采样间隔 {min(intervals):.2f}~{max(intervals):.2f}s")
+    print(f"监管进程 CPU 占用: {cpu_used / elapsed * 100:.2f}%（含启动子进程）")
+    print(f"事件: {events}")
+    for kind in kinds:
+        items = [status for name, status in snapshot.items() if name.startswith(kind)]
+        restarts = sum(status["restarts"] for status in items)
+        print(f"  {kind:<8} {len(items):>3} 个，重启 {restarts:>3} 次，状态 {sorted({s['state'] for s in items})}")
+    series = forker.get_series()
+    if series:
+        _, cpu, rss, processes = series[-1]
+        print(f"forker 时间序列: {len(series)} 个采样，最新 进程数 {processes}，RSS {rss / 1024 / 1024:.1f}MB，CPU {cpu:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
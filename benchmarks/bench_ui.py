@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录界面性能基准
+在无窗口页面上构建 LoginPage，测量构建界面、各模式切换、get_content_area 和 handle_* 的耗时，
+以及每个操作后的控件数和内存分配量，与保存的基线对比，超过阈值时以退出码 1 结束（可用于 CI）
+
+handle_* 的成功路径使用本地后端替身（需要 fastapi、uvicorn），未安装时只测量本地校验失败的路径
+
+用法: python benchmarks/bench_ui.py [--repeat 5] [--threshold 0.5] [--baseline 路径] [--update-baseline]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = Path(__file__).resolve().parent / "ui_baseline.json"
+BACKEND_PORT = 8611
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+MODES = ["login", "register", "recharge", "about", "manual", "disclaimer"]
+
+# 差值小于这些值时不算退化：线程调度抖动可达数毫秒，毫秒级以下的操作只看控件数和分配量
+MIN_DELTA = {"time": 0.003, "alloc": 16 * 1024, "controls": 0}
+
+# 耗时取中位数，轮数太少时中位数本身就不稳定
+MIN_GATE_REPEAT = 5
+
+
+class Bench:
+    """收集每个操作的耗时、内存分配和控件数"""
+
+    def __init__(self, trace_alloc):
+        self.trace_alloc = trace_alloc
+        self.samples = {}  # 操作名 -> {"time": [], "alloc": [], "controls": []}
+
+    def measure(self, name, func, page=None):
+        if self.trace_alloc:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        sample = self.samples.setdefault(name, {"time": [], "alloc": [], "controls": []})
+        if self.trace_alloc:
+            # 分配量取峰值增量，不受之后垃圾回收的影响
+            sample["alloc"].append(tracemalloc.get_traced_memory()[1] - before)
+        else:
+            sample["time"].append(elapsed)
+        if page is not None:
+            sample["controls"].append(count_controls(page.main_container))
+        return result
+
+
+def count_controls(control):
+    from metrics import count_controls as count
+    return count(control)
+
+
+def start_page():
+    """创建无窗口页面并在后台线程中运行它的事件循环"""
+    from headless import make_page
+
+    page, _ = make_page()
+    threading.Thread(target=page.loop.run_forever, name="bench-page-loop", daemon=True).start()
+    return page
+
+
+def stop_page(login_page):
+    login_page.executor.cancel_all()
+    login_page.workers.shutdown(timeout=1.0)
+    login_page.config_manager.close()
+    login_page.page.loop.call_soon_threadsafe(login_page.page.loop.stop)
+
+
+def run_async(login_page, coro_func):
+    return asyncio.run_coroutine_threadsafe(coro_func(), login_page.page.loop).result(30)
+
+
+def run_round(bench, login, with_backend, card_keys, round_index):
+    # 完整构建（含字体、打字机、表单和首帧同步）
+    page = start_page()
+    login_page = bench.measure("init", lambda: login.LoginPage(page), None)
+    bench.samples["init"]["controls"].append(count_controls(login_page.main_container))
+    # 单独重建界面结构
+    bench.measure("build_ui", login_page.build_ui, login_page)
+    stop_page(login_page)
+
+    page = start_page()
+    login_page = login.LoginPage(page)
+
+    # 首次进入各模式（冷）和再次进入（热）
+    for phase in ("cold", "warm"):
+        previous = login_page.current_mode
+        for mode in MODES[1:] + MODES[:1]:
+            bench.measure(f"switch {phase} {previous}→{mode}", lambda: login_page.switch_mode(mode), login_page)
+            previous = mode
+
+    for mode in MODES:
+        login_page.current_mode = mode
+        bench.measure(f"get_content_area {mode}", login_page.get_content_area, login_page)
+    login_page.switch_mode("login")
+
+    # 本地校验失败的路径
+    login_page.username_field.value = ""
+    bench.measure("handle_login invalid", lambda: run_async(login_page, login_page.handle_login), login_page)
+    login_page.switch_mode("recharge")
+    login_page.recharge_username_field.value = "bench"
+    login_page.recharge_password_field.value = "secret"
+    login_page.card_key_field.value = "无效卡密"
+    bench.measure("handle_recharge invalid", lambda: run_async(login_page, login_page.handle_recharge), login_page)
+
+    if with_backend:
+        username = f"bench{round_index}"
+        login_page.switch_mode("register")
+        login_page.username_field.value = username
+        login_page.password_field.value = "secret"
+        login_page.confirm_password_field.value = "secret"
+        bench.measure("handle_register", lambda: run_async(login_page, login_page.handle_register), login_page)
+
+        login_page.switch_mode("login")
+        login_page.wechat_path_field.value = WECHAT_PATH
+        bench.measure("handle_login", lambda: run_async(login_page, login_page.handle_login), login_page)
+
+        login_page.switch_mode("recharge")
+        login_page.recharge_username_field.value = username
+        login_page.card_key_field.value = card_keys.pop()
+        bench.measure("handle_recharge", lambda: run_async(login_page, login_page.handle_recharge), login_page)
+        login_page.card_key_field.value = "\n".join(card_keys.pop() for _ in range(8))
+        bench.measure("handle_recharge batch8", lambda: run_async(login_page, login_page.handle_recharge), login_page)
+
+    stop_page(login_page)
+
+
+def summarize(timing, alloc):
+    result = {}
+    for name, sample in timing.samples.items():
+        result[name] = {
+            "time": statistics.median(sample["time"]),
+            "alloc": statistics.median(alloc.samples[name]["alloc"]) if name in alloc.samples else 0,
+            "controls": max(sample["controls"]) if sample["controls"] else 0,
+        }
+    return result
+
+
+def compare(result, baseline, threshold):
+    """打印与基线的对比，返回退化的项目"""
+    regressions = []
+    print(f"{'操作':<34}{'耗时':>10}{'基线':>10}{'分配':>10}{'基线':>10}{'控件':>6}{'基线':>6}")
+    for name, current in result.items():
+        before = (baseline or {}).get(name)
+        marks = []
+        for key in ("time", "alloc", "controls"):
+            if before and key in before:
+                delta = current[key] - before[key]
+                if delta > MIN_DELTA[key] and delta > before[key] * threshold:
+                    marks.append(key)
+                    regressions.append((name, key, before[key], current[key]))
+        base_time = f"{before['time'] * 1000:.2f}ms" if before else "-"
+        base_alloc = f"{before['alloc'] / 1024:.0f}KB" if before else "-"
+        base_controls = str(before["controls"]) if before else "-"
+        print(
+            f"{name:<34}{current['time'] * 1000:>8.2f}ms{base_time:>10}"
+            f"{current['alloc'] / 1024:>8.0f}KB{base_alloc:>10}{current['controls']:>6}{base_controls:>6}"
+            + ("  ← 退化: " + ", ".join(marks) if marks else "")
+        )
+    return regressions
+
+
+def main():
+    global WECHAT_PATH
+    parser = argparse.ArgumentParser(description="登录界面性能基准")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数（耗时取中位数）")
+    parser.add_argument("--threshold", type=float, default=0.5, help="相对基线增加超过该比例视为退化")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE), help="基线文件")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    args = parser.parse_args()
+
+    # 隔离的配置：不启动微信和 API 服务
+    work_dir = tempfile.mkdtemp()
+    WECHAT_PATH = os.path.join(work_dir, "WeChat.exe")
+    open(WECHAT_PATH, "w").close()
+    config_file = os.path.join(work_dir, "config.json")
+    with open(config_file, "w", encoding="utf-8") as f:
+        json.dump({"wechat_supervise": False, "api_enabled": False, "wechat_path": WECHAT_PATH}, f)
+    os.environ["WXQ_CONFIG"] = config_file
+    os.environ["WXQ_BACKEND_URL"] = f"http://127.0.0.1:{BACKEND_PORT}"
+    os.chdir(ROOT)
+
+    import logging
+    logging.disable(logging.WARNING)
+    import login
+
+    card_keys = []
+    server = None
+    try:
+        from backend_standin import create_app, run_in_thread, test_card_keys
+        server = run_in_thread(create_app(cards=(args.repeat + 1) * 2 * 9), port=BACKEND_PORT)
+        card_keys = test_card_keys((args.repeat + 1) * 2 * 9)
+    except ImportError:
+        print("未安装 fastapi/uvicorn，跳过 handle_* 的后端路径")
+
+    # 预热一轮（模块导入、字体解析和连接池），不计入结果
+    run_round(Bench(False), login, server is not None, card_keys, "warmup")
+    timing = Bench(False)
+    for i in range(args.repeat):
+        run_round(timing, login, server is not None, card_keys, i)
+    alloc = Bench(True)
+    tracemalloc.start()
+    run_round(alloc, login, server is not None, card_keys, "alloc")
+    tracemalloc.stop()
+    if server:
+        server.should_exit = True
+
+    result = summarize(timing, alloc)
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else None
+    if baseline is None:
+        print(f"没有基线文件 {baseline_path}，只输出本次结果")
+    regressions = compare(result, baseline and baseline.get("operations"), args.threshold)
+
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps({
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+            "operations": result,
+        }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"基线已更新: {baseline_path}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} 项超过阈值 {args.threshold:.0%}:")
+        for name, key, before, current in regressions:
+            print(f"  {name} {key}: {before:.6g} → {current:.6g}")
+        if args.repeat < MIN_GATE_REPEAT and any(key == "time" for _, key, _, _ in regressions):
+            print(f"重复轮数少于 {MIN_GATE_REPEAT}，耗时退化只作提示，不影响退出码")
+            regressions = [item for item in regressions if item[1] != "time"]
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+无窗口的 Flet 页面
+把页面发出的指令序列化后计数而不真正发送，用于在没有客户端的环境下构建界面并统计传输量
+"""
+
+import asyncio
+import json
+
+import flet as ft
+from flet.core.connection import Connection
+from flet.core.protocol import PageCommandResponsePayload, PageCommandsBatchResponsePayload
+
+
+class HeadlessConnection(Connection):
+    """记录发送字节数和批次数的空连接"""
+
+    def __init__(self):
+        super().__init__()
+        self.next_id = 1
+        self.bytes = 0
+        self.batches = 0
+
+    def _assign_ids(self, command):
+        ids = []
+        for _ in command.commands:
+            ids.append(f"_{self.next_id}")
+            self.next_id += 1
+        return " ".join(ids)
+
+    def send_command(self, session_id, command):
+        self.bytes += len(json.dumps(command.__dict__, default=lambda o: o.__dict__))
+        return PageCommandResponsePayload(result="", error="")
+
+    def send_commands(self, session_id, commands):
+        self.batches += 1
+        self.bytes += len(json.dumps([c.__dict__ for c in commands], default=lambda o: o.__dict__))
+        return PageCommandsBatchResponsePayload(
+            results=[self._assign_ids(c) for c in commands if c.name == "add"],
+            error="",
+        )
+
+
+def make_page():
+    """创建一个使用空连接的页面，返回 (page, connection)"""
+    connection = HeadlessConnection()
+    page = ft.Page(connection, "headless", asyncio.new_event_loop())
+    # 没有真实窗口可以居中
+    page.window.center = lambda: None
+    return page, connection
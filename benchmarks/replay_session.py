@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话回放
+按录制文件（python main.py --record-session 路径）中的操作顺序，在无窗口页面上驱动 LoginPage，
+报告每种事件的 p50/p95/p99 延迟；保存结果后可以对比两个版本
+
+用法:
+  python benchmarks/replay_session.py 录制文件 [--repeat 5] [--realtime] [--output 结果.json]
+  python benchmarks/replay_session.py --diff 旧版本结果.json 新版本结果.json
+
+提交操作使用本地后端替身（需要 fastapi、uvicorn），未安装时提交会因连接失败而很快结束
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_PORT = 8612
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from session_trace import SessionReplayer, load_trace, summarize_latencies  # noqa: E402
+
+
+def prepare_environment():
+    """隔离的配置、虚拟微信程序和卡密文件，返回选择器结果 target -> 路径"""
+    work_dir = tempfile.mkdtemp()
+    wechat_path = os.path.join(work_dir, "WeChat.exe")
+    open(wechat_path, "w").close()
+    config_file = os.path.join(work_dir, "config.json")
+    with open(config_file, "w", encoding="utf-8") as f:
+        json.dump({"wechat_supervise": False, "api_enabled": False}, f)
+    os.environ["WXQ_CONFIG"] = config_file
+    os.environ["WXQ_BACKEND_URL"] = f"http://127.0.0.1:{BACKEND_PORT}"
+    os.environ.pop("WXQ_TRACE_SESSION", None)
+    return work_dir, {"wechat": wechat_path}
+
+
+def start_backend(card_count):
+    try:
+        from backend_standin import create_app, run_in_thread, test_card_keys
+    except ImportError:
+        print("未安装 fastapi/uvicorn，提交操作不经过后端")
+        return None, []
+    server = run_in_thread(create_app(cards=card_count), port=BACKEND_PORT)
+    return server, test_card_keys(card_count)
+
+
+def replay(events, repeat, realtime):
+    from headless import make_page
+    import login
+
+    work_dir, picker_files = prepare_environment()
+    card_count = max(1, sum(data.get("keys", 0) for _, kind, data in events if kind == "field") + 5) * repeat
+    server, card_keys = start_backend(card_count)
+    # 卡密文件导入 5 张有效卡密；没有后端替身时没有可用的卡密，选择卡密文件按取消回放
+    if card_keys:
+        picker_files["cards"] = os.path.join(work_dir, "cards.txt")
+        with open(picker_files["cards"], "w", encoding="utf-8") as f:
+            f.write("\n".join(card_keys[-5:]))
+        del card_keys[-5:]
+
+    latencies = {}
+    skipped = {}
+    try:
+        for _ in range(repeat):
+            page, _ = make_page()
+            threading.Thread(target=page.loop.run_forever, name="replay-page-loop", daemon=True).start()
+            login_page = login.LoginPage(page)
+            replayer = SessionReplayer(login_page, card_keys=card_keys, picker_files=picker_files, realtime=realtime)
+            replayer.replay(events)
+            card_keys = replayer.card_keys
+            for name, values in replayer.latencies.items():
+                latencies.setdefault(name, []).extend(values)
+            for name, reason in replayer.skipped:
+                skipped.setdefault(name, reason)
+            login_page.shutdown()
+            page.loop.call_soon_threadsafe(page.loop.stop)
+    finally:
+        if server:
+            server.should_exit = True
+
+    for name, reason in skipped.items():
+        print(f"已跳过 {name}：{reason}")
+    return summarize_latencies(latencies)
+
+
+def print_report(report):
+    print(f"{'事件':<28}{'次数':>6}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, item in sorted(report.items(), key=lambda kv: -kv[1]["p95"]):
+        print(
+            f"{name:<28}{item['count']:>6}{item['p50'] * 1000:>8.2f}ms"
+            f"{item['p95'] * 1000:>8.2f}ms{item['p99'] * 1000:>8.2f}ms"
+        )
+
+
+def print_diff(before, after):
+    """对比两次回放结果"""
+    print(f"{'事件':<28}{'p50 旧':>10}{'p50 新':>10}{'变化':>9}{'p95 旧':>10}{'p95 新':>10}{'变化':>9}")
+
+    def change(old, new):
+        return f"{(new - old) / old * 100:+.0f}%" if old else "-"
+
+    for name in sorted(set(before) | set(after)):
+        old = before.get(name)
+        new = after.get(name)
+        if not old or not new:
+            print(f"{name:<28}  仅出现在{'新' if new else '旧'}版本")
+            continue
+        print(
+            f"{name:<28}{old['p50'] * 1000:>8.2f}ms{new['p50'] * 1000:>8.2f}ms{change(old['p50'], new['p50']):>9}"
+            f"{old['p95'] * 1000:>8.2f}ms{new['p95'] * 1000:>8.2f}ms{change(old['p95'], new['p95']):>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话回放")
+    parser.add_argument("trace", nargs="?", help="录制文件")
+    parser.add_argument("--repeat", type=int, default=5, help="回放次数")
+    parser.add_argument("--realtime", action="store_true", help="按录制时的时间间隔回放（默认连续回放）")
+    parser.add_argument("--output", help="把结果保存为 JSON，用于 --diff")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="对比两个结果文件")
+    args = parser.parse_args()
+
+    if args.diff:
+        old, new = (json.loads(Path(path).read_text(encoding="utf-8")) for path in args.diff)
+        print_diff(old["events"], new["events"])
+        return
+    if not args.trace:
+        parser.error("需要录制文件或 --diff")
+
+    import logging
+    logging.disable(logging.WARNING)
+    os.chdir(ROOT)
+    header, events = load_trace(args.trace)
+    print(f"录制于 {header.get('started')}，{len(events)} 个事件，回放 {args.repeat} 次")
+    start = time.perf_counter()
+    report = replay(events, args.repeat, args.realtime)
+    print(f"总用时 {time.perf_counter() - start:.2f}s")
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "trace": os.path.abspath(args.trace),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "repeat": args.repeat,
+            "events": report,
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源构建
+把图片预缩放到界面显示尺寸，把中文字体裁剪为界面实际用到的字形，
+结果按内容哈希命名写入 assets/cache，并生成运行时使用的清单
+
+用法: python build_assets.py [--scale 2] [--force]
+依赖: pip install pillow fonttools
+"""
+
+import argparse
+import ast
+import hashlib
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT))
+
+from assets import ASSET_CACHE_DIR, FONT_FAMILIES, IMAGE_SIZES, MANIFEST_NAME  # noqa: E402
+
+# 构建参数变化时需要重新生成所有资源
+BUILD_VERSION = 1
+
+# 始终保留的字形：ASCII 可见字符和常用中文标点（用户输入的账号、卡密等）
+BASE_GLYPHS = "".join(chr(c) for c in range(0x20, 0x7F)) + "，。、；：？！“”‘’（）《》【】—…·￥"
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def collect_glyphs(root=ROOT):
+    """收集界面用到的所有字符：Python 源码中的字符串常量和 content 目录下的页面内容"""
+    chars = set(BASE_GLYPHS)
+
+    for source in root.glob("*.py"):
+        try:
+            tree = ast.parse(source.read_text(encoding="utf-8"))
+        except (SyntaxError, UnicodeDecodeError) as e:
+            print(f"跳过 {source.name}: {e}")
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                chars.update(node.value)
+
+    def walk(value):
+        if isinstance(value, str):
+            chars.update(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    for content_file in (root / "content").glob("*.json"):
+        walk(json.loads(content_file.read_text(encoding="utf-8")))
+
+    return "".join(sorted(c for c in chars if c.isprintable()))
+
+
+def scale_image(source, size, scale):
+    """按显示尺寸（乘以缩放倍数，适配高分屏）等比缩小图片"""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.load()
+        target = (size[0] * scale, size[1] * scale)
+        # 与界面的 ImageFit.CONTAIN 一致：等比缩放到目标尺寸以内，不放大
+        image.thumbnail(target, Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="PNG", optimize=True)
+        return output.getvalue(), {"width": image.width, "height": image.height}
+
+
+def subset_font(source, glyphs):
+    """裁剪字体，只保留指定字符的字形"""
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    options = subset.Options()
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    options.hinting = False
+
+    font = TTFont(source, lazy=False)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=glyphs)
+    subsetter.subset(font)
+
+    output = io.BytesIO()
+    font.save(output)
+    return output.getvalue(), {"glyphs": len(glyphs)}
+
+
+class AssetBuilder:
+    """资源构建器
+
+    源文件内容和构建参数都没有变化时直接复用上一次的结果，
+    输出文件名包含内容哈希，旧文件在构建结束后清理。
+    """
+
+    def __init__(self, root=ROOT, scale=2, force=False):
+        self.root = Path(root)
+        self.cache_dir = self.root / ASSET_CACHE_DIR
+        self.scale = scale
+        self.force = force
+        self.previous = self.load_manifest()
+        self.assets = {}
+
+    def load_manifest(self):
+        try:
+            with open(self.cache_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f).get("assets", {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def build(self, name, params, produce):
+        """构建单个资源，返回清单条目；源文件不存在时返回 None"""
+        source = self.root / name
+        if not source.is_file():
+            print(f"  {name}: 源文件不存在，跳过（运行时回退）")
+            return None
+
+        source_data = source.read_bytes()
+        key = sha256(json.dumps([BUILD_VERSION, sha256(source_data), params], ensure_ascii=False).encode("utf-8"))
+        previous = self.previous.get(name)
+        if not self.force and previous and previous.get("key") == key and (self.root / previous["path"]).is_file():
+            print(f"  {name}: 未变化，复用 {previous['path']}")
+            self.assets[name] = previous
+            return previous
+
+        data, meta = produce(source)
+        digest = sha256(data)[:12]
+        output = self.cache_dir / f"{source.stem}.{digest}{'.png' if name in IMAGE_SIZES else source.suffix}"
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_bytes(data)
+
+        entry = dict(
+            meta,
+            path=output.relative_to(self.root).as_posix(),
+            key=key,
+            source_size=len(source_data),
+            size=len(data),
+        )
+        self.assets[name] = entry
+        print(f"  {name}: {len(source_data) / 1024:.1f}KB -> {len(data) / 1024:.1f}KB ({entry['path']})")
+        return entry
+
+    def run(self):
+        print("预缩放图片:")
+        for name, size in IMAGE_SIZES.items():
+            self.build(name, {"size": size, "scale": self.scale}, lambda source, size=size: scale_image(source, size, self.scale))
+
+        glyphs = collect_glyphs(self.root)
+        print(f"裁剪字体（{len(glyphs)} 个字符）:")
+        for source in FONT_FAMILIES.values():
+            self.build(source, {"glyphs": sha256(glyphs.encode("utf-8"))}, lambda path: subset_font(path, glyphs))
+
+        self.save_manifest()
+        self.clean()
+
+    def save_manifest(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump({"version": BUILD_VERSION, "assets": self.assets}, f, ensure_ascii=False, indent=2)
+
+    def clean(self):
+        """删除清单中不再引用的旧文件"""
+        keep = {Path(entry["path"]).name for entry in self.assets.values()} | {MANIFEST_NAME}
+        for path in self.cache_dir.iterdir():
+            if path.is_file() and path.name not in keep:
+                path.unlink()
+                print(f"  清理旧文件 {path.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="构建预缩放图片和裁剪字体")
+    parser.add_argument("--scale", type=int, default=2, help="图片相对显示尺寸的缩放倍数（适配高分屏）")
+    parser.add_argument("--force", action="store_true", help="忽略上次的构建结果全部重新生成")
+    args = parser.parse_args()
+
+    AssetBuilder(scale=args.scale, force=args.force).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import asyncio
+import re
+import time
+
+from backend_client import RETRY_STATUS, BackendError
+
+# 卡密的具体格式由服务器校验，本地只排除不可能是卡密的内容（非 ASCII 可见字符）
+CARD_CHARSET = re.compile(r"^[\x21-\x7e]+$")
+
+# 粘贴的列表中卡密之间的分隔符
+SEPARATORS = re.compile(r"[\s,;，；、]+")
+
+# 本地预校验的拒绝原因
+REJECT_FORMAT = "包含无效字符"
+REJECT_DUPLICATE = "重复"
+
+# 兑换失败分类
+FAIL_INVALID = "卡密无效或已使用"
+FAIL_ACCOUNT = "账号异常"
+FAIL_SERVER = "服务器错误"
+FAIL_BUSY = "服务器繁忙"
+FAIL_NETWORK = "网络错误"
+FAIL_CANCELLED = "已取消"
+
+
+def normalize_card_key(text):
+    """去掉首尾空白，统一全角横线（不改变大小写，卡密是否区分大小写由服务器决定）"""
+    return text.strip().replace("－", "-").replace("—", "-")
+
+
+def check_card_key(key):
+    """本地预校验，通过返回 None，否则返回拒绝原因"""
+    if not CARD_CHARSET.match(key):
+        return REJECT_FORMAT
+    return None
+
+
+def parse_card_keys(text):
+    """解析粘贴的卡密列表，返回 (有效卡密, [(原文, 拒绝原因)])，保持原有顺序"""
+    keys = []
+    rejected = []
+    seen = set()
+    for token in SEPARATORS.split(text or ""):
+        if not token:
+            continue
+        key = normalize_card_key(token)
+        reason = check_card_key(key)
+        if reason is None and key in seen:
+            reason = REJECT_DUPLICATE
+        if reason:
+            rejected.append((token, reason))
+        else:
+            seen.add(key)
+            keys.append(key)
+    return keys, rejected
+
+
+def read_card_file(path):
+    """读取卡密文件（txt/csv，每行一个或用逗号分隔）"""
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        return parse_card_keys(f.read())
+
+
+def classify_error(error):
+    """按状态码把兑换失败归类
+
+    只有服务器明确拒绝（其余 4xx 或业务失败）才算卡密无效；限流、请求超时和 5xx 都可以重试。
+    """
+    if error.status is None:
+        return FAIL_NETWORK
+    if error.status in RETRY_STATUS or error.status == 408:
+        return FAIL_BUSY
+    if error.status >= 500:
+        return FAIL_SERVER
+    if error.status in (401, 403, 404):
+        return FAIL_ACCOUNT
+    return FAIL_INVALID
+
+
+class CardResult:
+    """单张卡密的兑换结果"""
+
+    def __init__(self, key, ok, message, category=None, elapsed=0.0):
+        self.key = key
+        self.ok = ok
+        self.message = message
+        self.category = category
+        self.elapsed = elapsed
+
+
+class CardBatch:
+    """批量兑换卡密
+
+    以有限的并发把卡密流水线式地提交给后端，每完成一张就回调 on_result，
+    结束后汇总成功数、各类失败数和吞吐量（张/秒）。
+    """
+
+    def __init__(self, client, username, concurrency=4, on_result=None):
+        self.client = client
+        self.username = username
+        self.concurrency = max(1, concurrency)
+        self.on_result = on_result
+        self.results = []
+        self.elapsed = 0.0
+
+    async def redeem(self, key):
+        start = time.perf_counter()
+        try:
+            result = await self.client.recharge(self.username, key)
+            return CardResult(key, True, result.get("message", ""), elapsed=time.perf_counter() - start)
+        except BackendError as e:
+            return CardResult(key, False, e.message, classify_error(e), time.perf_counter() - start)
+
+    async def run(self, keys):
+        """兑换所有卡密，返回结果列表（按完成顺序）"""
+        queue = asyncio.Queue()
+        for key in keys:
+            queue.put_nowait(key)
+
+        async def worker():
+            while not queue.empty():
+                result = await self.redeem(queue.get_nowait())
+                self.results.append(result)
+                if self.on_result:
+                    self.on_result(result, self)
+
+        start = time.perf_counter()
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.concurrency, len(keys)))]
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            for task in workers:
+                task.cancel()
+            done = {result.key for result in self.results}
+            self.results.extend(CardResult(key, False, FAIL_CANCELLED, FAIL_CANCELLED) for key in keys if key not in done)
+            raise
+        finally:
+            self.elapsed = time.perf_counter() - start
+        return self.results
+
+    @property
+    def succeeded(self):
+        return sum(1 for result in self.results if result.ok)
+
+    def failures(self):
+        """各类失败的数量"""
+        breakdown = {}
+        for result in self.results:
+            if not result.ok:
+                breakdown[result.category] = breakdown.get(result.category, 0) + 1
+        return breakdown
+
+    def throughput(self):
+        """每秒兑换的卡密数"""
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+
+    def retryable_keys(self):
+        """因网络或服务器原因失败、可以重试的卡密"""
+        return [r.key for r in self.results if not r.ok and r.category in (FAIL_NETWORK, FAIL_SERVER, FAIL_BUSY, FAIL_CANCELLED)]
+
+    def summary(self):
+        """汇总文本"""
+        parts = [f"完成 {len(self.results)} 张：成功 {self.succeeded}"]
+        parts.extend(f"{category} {count}" for category, count in self.failures().items())
+        return "，".join(parts) + f"；用时 {self.elapsed:.1f} 秒（{self.throughput():.1f} 张/秒）"
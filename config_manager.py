@@ -0,0 +1,545 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from metrics import metrics
+from tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# 配置文件位置可通过环境变量指定
+CONFIG_ENV = "WXQ_CONFIG"
+
+
+def get_app_dir():
+    """程序所在目录（打包后为 EXE 所在目录）"""
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def get_user_config_dir():
+    """用户可写的配置目录（程序目录不可写时使用，如安装在 Program Files 下）"""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "WxQuantum")
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "wxquantum")
+
+
+def is_writable_dir(directory):
+    """目录是否可以创建文件（Windows 上 os.access 不反映权限，直接试建临时文件）"""
+    try:
+        with tempfile.TemporaryFile(dir=directory):
+            return True
+    except OSError:
+        return False
+
+
+def default_config_path():
+    """默认配置文件路径 - 优先使用环境变量，其次程序目录，程序目录不可写时使用用户配置目录"""
+    if os.environ.get(CONFIG_ENV):
+        return os.environ[CONFIG_ENV]
+    app_config = os.path.join(get_app_dir(), "config.json")
+    if is_writable_dir(get_app_dir()):
+        return app_config
+
+    user_dir = get_user_config_dir()
+    user_config = os.path.join(user_dir, "config.json")
+    try:
+        os.makedirs(user_dir, exist_ok=True)
+        # 首次切换时沿用程序目录下已有的配置
+        if not os.path.exists(user_config) and os.path.exists(app_config):
+            shutil.copyfile(app_config, user_config)
+    except OSError as e:
+        logger.warning("用户配置目录不可用: %s", e)
+        return app_config
+    return user_config
+
+
+def atomic_write_json(path, data):
+    """原子写入 JSON 文件 - 先写临时文件并 fsync，再重命名覆盖"""
+    directory = os.path.dirname(os.path.abspath(path))
+    temp_file = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+class FileLock:
+    """跨进程文件锁（建议性锁，锁定单独的 .lock 文件）"""
+
+    def __init__(self, path, timeout=10.0, poll_interval=0.005):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.acquisitions = 0
+        self.contended = 0     # 需要等待其他进程释放的次数
+        self.wait_total = 0.0  # 累计等待时间（秒）
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._depth = 0
+
+    def _try_lock(self):
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(self):
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth > 0:
+            self._depth += 1
+            return
+
+        start = time.monotonic()
+        try:
+            self._file = open(self.path, "a+")
+        except BaseException:
+            # 锁文件无法创建（如目录不可写）时不能占着线程锁
+            self._thread_lock.release()
+            raise
+        waited = False
+        while True:
+            try:
+                self._try_lock()
+                break
+            except OSError:
+                waited = True
+                if time.monotonic() - start > self.timeout:
+                    self._file.close()
+                    self._file = None
+                    self._thread_lock.release()
+                    raise TimeoutError(f"等待配置文件锁超时: {self.path}")
+                time.sleep(self.poll_interval)
+
+        self._depth = 1
+        self.acquisitions += 1
+        if waited:
+            self.contended += 1
+            self.wait_total += time.monotonic() - start
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                self._unlock()
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ConfigManager:
+    """配置管理器
+
+    读取直接使用内存中的配置；写入只标记为待保存，由后台线程在最后一次写入
+    flush_delay 秒后合并写盘（最长不超过 max_delay 秒）。写盘是原子的，
+    中途崩溃不会留下被截断的配置文件。配置变化时通知订阅者。
+
+    多个进程可以共用同一个配置文件：写盘在文件锁内进行，先读取磁盘上的最新内容，
+    只覆盖本进程修改过的键；后台线程监视配置文件，其他进程修改后自动重新加载。
+    """
+
+    # 写盘失败后的重试间隔（秒），每次失败加倍
+    RETRY_MIN = 1.0
+    RETRY_MAX = 60.0
+
+    def __init__(self, config_file=None, flush_delay=0.5, max_delay=2.0, watch_interval=1.0):
+        self.config_file = config_file or default_config_path()
+        self.flush_delay = flush_delay
+        self.max_delay = max_delay
+        self.watch_interval = watch_interval
+        self.save_count = 0
+        self.reload_count = 0
+        self.last_reload_latency = None  # 其他进程写盘到本进程重新加载的延迟（秒）
+        self.file_lock = FileLock(f"{self.config_file}.lock")
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self._dirty_keys = set()
+        self._dirty_since = None
+        self._deadline = None
+        self._retry_delay = 0.0  # 写盘失败后的当前重试间隔，0 表示上次写盘成功
+        self._retry_at = None
+        self._signature = None
+        self._next_watch = time.monotonic() + watch_interval if watch_interval else None
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        self.config = self.load_config()
+        if watch_interval:
+            self._ensure_thread()
+        atexit.register(self.flush)
+
+    def _get_signature(self):
+        """配置文件的 stat 签名，用于发现其他进程的修改"""
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read_disk(self):
+        """读取磁盘上的配置，返回 (配置, 签名)"""
+        signature = self._get_signature()
+        try:
+            if signature:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    return json.load(f), signature
+        except json.JSONDecodeError as e:
+            # 保留损坏的配置文件以便排查，而不是直接丢弃
+            corrupt_file = f"{self.config_file}.corrupt-{int(time.time())}"
+            logger.error("配置文件损坏，已备份为 %s: %s", corrupt_file, e)
+            try:
+                os.replace(self.config_file, corrupt_file)
+            except OSError:
+                pass
+        except Exception as e:
+            logger.error("配置文件加载失败: %s", e)
+
+        return {}, signature
+
+    @traced(cat="config")
+    def load_config(self):
+        """加载配置文件"""
+        config, self._signature = self._read_disk()
+        return config
+
+    def save_config(self):
+        """立即保存配置文件"""
+        try:
+            self._sync()
+            return True
+        except Exception as e:
+            logger.error("配置文件保存失败: %s", e)
+            return False
+
+    @traced("ConfigManager.sync", cat="config")
+    def _sync(self, mutator=None):
+        """在文件锁内与磁盘同步
+
+        读取磁盘上的最新配置，叠加本进程尚未保存的修改，再执行 mutator(config)，
+        有变化时原子写盘。其他进程修改过的键会更新到内存并通知订阅者。
+        """
+        with self.file_lock:
+            disk, _ = self._read_disk()
+            with self._lock:
+                pending = set(self._dirty_keys)
+                for key in pending:
+                    if key in self.config:
+                        disk[key] = copy.deepcopy(self.config[key])
+                    else:
+                        disk.pop(key, None)
+                before = json.dumps(disk, sort_keys=True)
+                result = mutator(disk) if mutator else None
+                need_write = bool(pending) or json.dumps(disk, sort_keys=True) != before
+
+            if need_write:
+                start = time.perf_counter()
+                atomic_write_json(self.config_file, disk)
+                self.save_count += 1
+                if metrics.enabled:
+                    metrics.observe("config_save_seconds", time.perf_counter() - start)
+
+            with self._lock:
+                # 写盘期间又被修改的键保持待保存状态
+                for key in pending:
+                    if (key in self.config) == (key in disk) and self.config.get(key) == disk.get(key):
+                        self._dirty_keys.discard(key)
+                if not self._dirty_keys:
+                    self._dirty_since = None
+                    self._deadline = None
+                self._signature = self._get_signature()
+                changes = self._apply(disk)
+        self._notify_all(changes)
+        return result
+
+    def _apply(self, disk):
+        """用新配置替换内存配置（保留未保存的修改），返回变化的键值"""
+        changes = []
+        for key in set(self.config) | set(disk):
+            if key in self._dirty_keys:
+                continue
+            new_value = disk.get(key)
+            if self.config.get(key) != new_value or (key in self.config) != (key in disk):
+                changes.append((key, new_value))
+                if key in disk:
+                    self.config[key] = disk[key]
+                else:
+                    self.config.pop(key, None)
+        return changes
+
+    def reload(self):
+        """重新加载其他进程写入的配置"""
+        disk, signature = self._read_disk()
+        with self._lock:
+            self._signature = signature
+            changes = self._apply(disk)
+        self.reload_count += 1
+        if signature:
+            self.last_reload_latency = max(time.time() - signature[0] / 1e9, 0)
+        self._notify_all(changes)
+        return changes
+
+    def check_reload(self):
+        """配置文件签名变化时重新加载"""
+        signature = self._get_signature()
+        with self._lock:
+            changed = signature != self._signature
+        if changed:
+            self.reload()
+        return changed
+
+    def modify(self, key, func, default=None):
+        """跨进程的读-改-写：在文件锁内读取最新值，写入 func(当前值) 的结果并立即写盘"""
+        def mutator(config):
+            value = func(copy.deepcopy(config.get(key, default)))
+            config[key] = value
+            return value
+        return self._sync(mutator)
+
+    def compare_and_set(self, key, expected, value):
+        """磁盘上的值等于 expected 时才写入 value，返回是否写入成功"""
+        def mutator(config):
+            if config.get(key) != expected:
+                return False
+            config[key] = value
+            return True
+        return self._sync(mutator)
+
+    def get_lock_stats(self):
+        """文件锁竞争统计"""
+        return {
+            "acquisitions": self.file_lock.acquisitions,
+            "contended": self.file_lock.contended,
+            "wait_total": self.file_lock.wait_total,
+            "reloads": self.reload_count,
+            "last_reload_latency": self.last_reload_latency,
+        }
+
+    def flush(self):
+        """将待保存的修改写盘，没有修改时不做任何事"""
+        with self._lock:
+            if not self._dirty_keys:
+                return True
+        return self.save_config()
+
+    def close(self):
+        """写盘并停止后台线程"""
+        self._closed = True
+        self._wakeup.set()
+        return self.flush()
+
+    def schedule_save(self):
+        """标记配置待保存，由后台线程合并写盘"""
+        with self._lock:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._deadline = min(now + self.flush_delay, self._dirty_since + self.max_delay)
+            if self._retry_at is not None:
+                # 写盘失败后的退避期内不提前重试
+                self._deadline = max(self._deadline, self._retry_at)
+            self._ensure_thread()
+        self._wakeup.set()
+        if self._closed:
+            self.flush()
+
+    def _ensure_thread(self):
+        if not self._closed and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="config-sync", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """后台循环 - 合并写盘并监视配置文件变化"""
+        while not self._closed:
+            now = time.monotonic()
+            with self._lock:
+                deadline = self._deadline
+            if deadline is not None and now >= deadline:
+                if self.flush():
+                    with self._lock:
+                        self._retry_delay = 0.0
+                        self._retry_at = None
+                        if not self._dirty_keys:
+                            self._deadline = None
+                else:
+                    self._backoff(now)
+                continue
+            if self._next_watch is not None and now >= self._next_watch:
+                try:
+                    self.check_reload()
+                except Exception as e:
+                    logger.warning("配置文件重新加载失败: %s", e)
+                self._next_watch = now + self.watch_interval
+
+            timeouts = [t for t in (deadline, self._next_watch) if t is not None]
+            self._wakeup.wait(min(timeouts) - now if timeouts else None)
+            self._wakeup.clear()
+
+    def _backoff(self, now):
+        """写盘失败：保留待保存的修改，按加倍的间隔推迟下次写盘，避免后台线程空转"""
+        with self._lock:
+            self._retry_delay = min(max(self._retry_delay * 2, self.RETRY_MIN), self.RETRY_MAX)
+            self._retry_at = now + self._retry_delay
+            if self._dirty_keys:
+                self._deadline = self._retry_at
+        logger.warning("配置将在 %.0f 秒后重新尝试保存", self._retry_delay)
+
+    def subscribe(self, callback, key=None):
+        """订阅配置变化，callback(key, value)；返回取消订阅的函数"""
+        entry = (key, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def _notify(self, key, value):
+        with self._lock:
+            subscribers = [cb for k, cb in self._subscribers if k is None or k == key]
+        for callback in subscribers:
+            try:
+                callback(key, value)
+            except Exception as e:
+                logger.warning("配置变更通知失败: %s", e)
+
+    def _notify_all(self, changes):
+        for key, value in changes:
+            self._notify(key, value)
+
+    def get(self, key, default=None):
+        """读取配置项"""
+        with self._lock:
+            return self.config.get(key, default)
+
+    def set(self, key, value):
+        """写入配置项，值未变化时不触发保存和通知"""
+        with self._lock:
+            if key in self.config and self.config[key] == value:
+                return True
+            self.config[key] = value
+            self._dirty_keys.add(key)
+        self.schedule_save()
+        self._notify(key, value)
+        return True
+
+    def delete(self, key):
+        """删除配置项"""
+        with self._lock:
+            if key not in self.config:
+                return False
+            del self.config[key]
+            self._dirty_keys.add(key)
+        self.schedule_save()
+        self._notify(key, None)
+        return True
+
+    def get_str(self, key, default=""):
+        value = self.get(key)
+        return value if isinstance(value, str) else default
+
+    def get_int(self, key, default=0):
+        value = self.get(key)
+        try:
+            return int(value) if value is not None else default
+        except (TypeError, ValueError):
+            return default
+
+    def get_float(self, key, default=0.0):
+        value = self.get(key)
+        try:
+            return float(value) if value is not None else default
+        except (TypeError, ValueError):
+            return default
+
+    def get_bool(self, key, default=False):
+        value = self.get(key)
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return default if value is None else bool(value)
+
+    def get_list(self, key, default=None):
+        value = self.get(key)
+        return list(value) if isinstance(value, list) else list(default or [])
+
+    def get_wechat_path(self):
+        """获取微信路径"""
+        return self.get_str('wechat_path')
+
+    def set_wechat_path(self, path):
+        """设置微信路径"""
+        return self.set('wechat_path', path)
+
+    def get_profiles(self):
+        """获取所有账号配置"""
+        return [dict(p) for p in self.get_list('profiles') if isinstance(p, dict)]
+
+    def get_profile(self, name):
+        """按名称获取账号配置"""
+        for profile in self.get_profiles():
+            if profile.get('name') == name:
+                return profile
+        return None
+
+    def set_profile(self, name, **fields):
+        """新增或更新账号配置（跨进程安全）"""
+        def update(profiles):
+            profiles = [p for p in profiles or [] if isinstance(p, dict)]
+            for profile in profiles:
+                if profile.get('name') == name:
+                    profile.update(fields)
+                    break
+            else:
+                profiles.append(dict(name=name, **fields))
+            return profiles
+        self.modify('profiles', update, [])
+        return True
+
+    def remove_profile(self, name):
+        """删除账号配置（跨进程安全）"""
+        removed = []
+
+        def update(profiles):
+            remaining = [p for p in profiles or [] if not (isinstance(p, dict) and p.get('name') == name)]
+            removed.append(len(remaining) != len(profiles or []))
+            return remaining
+        self.modify('profiles', update, [])
+        return removed[0]
@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+import threading
+
+import flet as ft
+
+logger = logging.getLogger(__name__)
+
+# 信息页面内容文件目录
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content")
+
+
+class ContentRenderer:
+    """信息页面渲染器
+
+    关于软件、使用说明、免责声明等页面的内容保存在 content/*.json 中，
+    首次访问时渲染并缓存，内容文件修改时间变化后重新渲染。
+    """
+
+    def __init__(self, content_dir=CONTENT_DIR):
+        self.content_dir = content_dir
+        self.builds = 0
+        self._cache = {}  # name -> (mtime, control)
+        self._lock = threading.Lock()
+
+    def get_path(self, name):
+        """获取页面内容文件路径"""
+        return os.path.join(self.content_dir, f"{name}.json")
+
+    def has_page(self, name):
+        """页面内容文件是否存在"""
+        return os.path.exists(self.get_path(name))
+
+    def render(self, name):
+        """渲染页面，内容文件未变化时直接返回缓存"""
+        path = self.get_path(name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            logger.warning("页面内容加载失败: %s", e)
+            return ft.Container()
+
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                control = self.build_page(data)
+            except Exception as e:
+                logger.warning("页面内容渲染失败: %s", e)
+                return cached[1] if cached else ft.Container()
+
+            self._cache[name] = (mtime, control)
+            self.builds += 1
+            return control
+
+    def invalidate(self, name=None):
+        """清除渲染缓存"""
+        with self._lock:
+            if name is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(name, None)
+
+    def build_page(self, data):
+        """根据页面数据构建控件树"""
+        cards = [self.build_card(card) for card in data.get("cards", [])]
+
+        if data.get("layout") == "list":
+            # 多个卡片的长页面使用可滚动列表
+            for card in cards[:-1]:
+                card.margin = ft.margin.only(bottom=20)
+            return ft.Container(
+                content=ft.ListView(cards, expand=True, auto_scroll=False, spacing=0),
+                expand=True,
+            )
+
+        return ft.Column(cards, horizontal_alignment=ft.CrossAxisAlignment.CENTER)
+
+    def build_card(self, card):
+        """构建内容卡片"""
+        controls = []
+        if card.get("title"):
+            controls.append(ft.Text(
+                card["title"],
+                size=card.get("title_size", 24),
+                weight=ft.FontWeight.BOLD,
+                color=get_color(card.get("title_color", "INDIGO_800")),
+                font_family=card.get("title_font", "AlimamaFont"),
+                text_align=ft.TextAlign(card.get("title_align", "center")),
+            ))
+
+        spacing = card.get("spacing", 10)
+        for section in card.get("sections", []):
+            controls.append(self.build_section(card, section, spacing))
+
+        container = ft.Container(
+            content=ft.Column(
+                controls,
+                horizontal_alignment=ft.CrossAxisAlignment.START,
+                # 小节之间的间距
+                spacing=spacing + 15,
+            ),
+            border_radius=15,
+        )
+
+        if card.get("style") == "raised":
+            container.bgcolor = ft.Colors.WHITE
+            container.padding = ft.padding.all(25)
+            container.shadow = ft.BoxShadow(
+                spread_radius=1,
+                blur_radius=10,
+                color=ft.Colors.with_opacity(0.1, ft.Colors.BLACK),
+            )
+        else:
+            accent = card.get("accent", "BLUE")
+            container.bgcolor = ft.Colors.with_opacity(0.05, get_color(accent))
+            container.padding = ft.padding.all(20)
+            container.border = ft.border.all(1, get_color(f"{accent}_200"))
+
+        return container
+
+    def build_section(self, card, section, spacing):
+        """构建小节 - 标题和正文"""
+        return ft.Column([
+            ft.Text(
+                section["heading"],
+                size=section.get("heading_size", card.get("heading_size", 18)),
+                weight=ft.FontWeight.BOLD,
+                color=get_color(section.get("heading_color", card.get("heading_color", "INDIGO_600"))),
+                font_family="SourceHanFont",
+            ),
+            ft.Text(
+                section["body"],
+                size=section.get("body_size", card.get("body_size", 14)),
+                color=get_color(section.get("body_color", card.get("body_color", "GREY_700"))),
+                font_family="SourceHanFont",
+            ),
+        ],
+        spacing=spacing,
+        )
+
+
+def get_color(name):
+    """将内容文件中的颜色名转换为 ft.Colors 颜色"""
+    return getattr(ft.Colors, name.upper(), ft.Colors.GREY_700)
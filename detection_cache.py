@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from config_manager import atomic_write_json
+from wechat_detector import SystemBackend
+
+logger = logging.getLogger(__name__)
+
+# 缓存查询结果
+CACHE_HIT = "hit"          # 签名一致且未过期，直接使用
+CACHE_STALE = "stale"      # 签名一致但已过期，路径仍有效时先使用，再在后台复核
+CACHE_CHANGED = "changed"  # 文件签名变化（如微信升级），路径仍有效时先使用，再在后台复核
+CACHE_MISS = "miss"        # 无缓存或文件已不存在，需要完整检测
+
+
+class DetectionCache:
+    """微信路径检测缓存
+
+    持久化保存每个候选路径的文件大小、修改时间、版本号和最后确认时间。
+    启动时只需对缓存的路径做一次 stat 即可确认结果；签名变化或缓存过期时由调用方
+    重新校验路径，并在后台复核有没有其他安装。命中、未命中和复核次数累计在内存中，
+    随下一次 confirm() 或 flush() 一起保存，查询本身不写文件。
+    """
+
+    def __init__(self, cache_file="detection_cache.json", backend=None, max_age=7 * 24 * 3600):
+        self.cache_file = cache_file
+        self.backend = backend or SystemBackend()
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.entries = {}
+        self.stats = {"hits": 0, "misses": 0, "revalidations": 0}
+        self._dirty = False  # 统计有未保存的变化
+        self.load()
+
+    def load(self):
+        """加载缓存文件"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = data.get("entries", {})
+                self.stats.update(data.get("stats", {}))
+        except Exception as e:
+            logger.warning("检测缓存加载失败: %s", e)
+
+    def save(self):
+        """保存缓存文件"""
+        with self._lock:
+            data = json.loads(json.dumps({"entries": self.entries, "stats": self.stats}))
+            self._dirty = False
+        try:
+            with self._save_lock:
+                atomic_write_json(self.cache_file, data)
+            return True
+        except Exception as e:
+            logger.warning("检测缓存保存失败: %s", e)
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def flush(self):
+        """保存尚未写入的统计（关闭窗口时调用）"""
+        with self._lock:
+            dirty = self._dirty
+        return self.save() if dirty else True
+
+    def lookup(self, path):
+        """用一次 stat 确认缓存的路径，返回缓存状态"""
+        with self._lock:
+            entry = self.entries.get(path) if path else None
+
+        signature = self.backend.stat(path) if entry else None
+        if signature is None:
+            state = CACHE_MISS
+        elif [entry["size"], entry["mtime"]] != list(signature):
+            state = CACHE_CHANGED
+        elif time.time() - entry["confirmed_at"] > self.max_age:
+            state = CACHE_STALE
+        else:
+            state = CACHE_HIT
+
+        with self._lock:
+            if state == CACHE_HIT:
+                self.stats["hits"] += 1
+            elif state == CACHE_MISS:
+                self.stats["misses"] += 1
+            else:
+                self.stats["revalidations"] += 1
+            self._dirty = True
+        return state
+
+    def confirm(self, path):
+        """记录路径当前的签名并标记为已确认"""
+        signature = self.backend.stat(path)
+        if signature is None:
+            return False
+
+        with self._lock:
+            entry = self.entries.get(path, {})
+            # 版本号读取较慢，只在文件变化时重新读取
+            if [entry.get("size"), entry.get("mtime")] != list(signature) or "version" not in entry:
+                entry["version"] = self.backend.file_version(path)
+            entry.update(
+                path=path,
+                size=signature[0],
+                mtime=signature[1],
+                confirmed_at=time.time(),
+            )
+            self.entries[path] = entry
+        return self.save()
+
+    def forget(self, path):
+        """移除缓存的路径"""
+        with self._lock:
+            removed = self.entries.pop(path, None)
+        if removed:
+            self.save()
+
+    def get_entry(self, path):
+        """获取缓存条目"""
+        with self._lock:
+            entry = self.entries.get(path)
+            return dict(entry) if entry else None
+
+    def get_stats(self):
+        """获取累计的命中、未命中和复核次数"""
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,171 @@
+import threading
+import time
+
+import flet as ft
+
+from metrics import metrics
+from view_cache import patch
+
+
+class DiagnosticsPanel(ft.Container):
+    """运行诊断面板（隐藏页面，Ctrl+Shift+D 打开）
+
+    每秒读取一次运行指标，计数器换算为每秒次数。只在挂载且可见时刷新，
+    隐藏后定时器自行停止，重新显示时调用 refresh 恢复。
+    """
+
+    REFRESH_INTERVAL = 1.0
+    TOP_CALLERS = 8
+
+    def __init__(self, updater, endpoint=None, inventory=None, **kwargs):
+        self.updater = updater
+        self.endpoint = endpoint
+        self.inventory = inventory  # 返回后台线程清单的函数（ExecutorService.inventory）
+        self._previous = None
+        self._mounted = False
+        self._timer = None
+        self._lock = threading.Lock()
+
+        self.body = ft.Text("", size=12, selectable=True, font_family="Consolas", color=ft.Colors.GREY_800)
+        self.endpoint_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
+        super().__init__(
+            content=ft.Column([
+                ft.Row([
+                    self.endpoint_text,
+                    ft.Container(expand=True),
+                    ft.IconButton(icon=ft.Icons.RESTART_ALT, icon_size=18, tooltip="清零计数", on_click=self.on_reset),
+                ]),
+                self.body,
+            ], spacing=4),
+            bgcolor=ft.Colors.GREY_50,
+            border_radius=15,
+            padding=ft.padding.only(left=20, right=8, bottom=12),
+            **kwargs,
+        )
+
+    def did_mount(self):
+        self._mounted = True
+        self.refresh()
+
+    def will_unmount(self):
+        self._mounted = False
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def on_reset(self, e):
+        metrics.reset()
+        self._previous = None
+        self.refresh()
+
+    def _tick(self):
+        with self._lock:
+            self._timer = None
+        if self._mounted and self.visible:
+            self.refresh()
+
+    def _schedule(self):
+        with self._lock:
+            if self._timer is None and self._mounted:
+                self._timer = threading.Timer(self.REFRESH_INTERVAL, self._tick)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def refresh(self):
+        snapshot = metrics.snapshot()
+        changed = []
+        lines = self.format_lines(snapshot, self._previous)
+        if self.inventory:
+            lines += self.format_inventory(self.inventory())
+        patch(self.body, changed, value="\n".join(lines))
+        endpoint = f"指标端点: {self.endpoint}" if self.endpoint else "指标端点未启用"
+        patch(self.endpoint_text, changed, value=endpoint)
+        self._previous = snapshot
+        if changed and self._mounted:
+            self.updater.request(*changed)
+        self._schedule()
+
+    @staticmethod
+    def format_lines(snapshot, previous):
+        counters = snapshot["counters"]
+        summaries = snapshot["summaries"]
+        gauges = snapshot["gauges"]
+        elapsed = snapshot["time"] - previous["time"] if previous else 0
+
+        def rate(key):
+            if not previous or elapsed <= 0:
+                return None
+            return (counters.get(key, 0) - previous["counters"].get(key, 0)) / elapsed
+
+        def summary_text(key, unit=1000, suffix="ms"):
+            count, total, maximum = summaries.get(key, (0, 0, 0))
+            if not count:
+                return "无记录"
+            return f"{count} 次，平均 {total / count * unit:.2f}{suffix}，最长 {maximum * unit:.2f}{suffix}"
+
+        lines = []
+        updates = {k: v for k, v in counters.items() if k[0] == "page_updates_total"}
+        total_rate = None
+        if previous:
+            total_rate = sum(rate(k) for k in updates)
+        lines.append(
+            f"页面同步  {'-' if total_rate is None else f'{total_rate:.1f}'} 次/秒，"
+            f"{summary_text(('page_update_seconds', ()))}"
+        )
+        count, total, _ = summaries.get(("page_update_controls", ()), (0, 0, 0))
+        if count:
+            lines.append(f"  每次同步平均 {total / count:.1f} 个控件")
+        by_caller = sorted(
+            ((dict(labels).get("caller", "?"), rate((name, labels)) or 0, value) for (name, labels), value in updates.items()),
+            key=lambda item: (item[1], item[2]),
+            reverse=True,
+        )
+        for caller, caller_rate, value in by_caller[:DiagnosticsPanel.TOP_CALLERS]:
+            lines.append(f"  {caller:<48}{caller_rate:>6.1f}/秒  共 {value:.0f}")
+
+        lines.append(
+            f"控件树  {gauges.get(('ui_controls', ()), '-')} 个控件，"
+            f"浮层 {gauges.get(('overlay_controls', ()), '-')} 个"
+        )
+        lines.append(
+            f"打字机实例  {gauges.get(('typewriter_instances', ()), 0)}，"
+            f"活动动画 {gauges.get(('animations_active', ()), 0)}"
+        )
+        threads = sorted(
+            ((dict(labels)["group"], value) for (name, labels), value in gauges.items() if name == "threads"),
+            key=lambda item: -item[1],
+        )
+        lines.append(f"线程  {sum(v for _, v in threads)}：" + "，".join(f"{g}×{v}" for g, v in threads))
+        lines.append(f"配置保存  {summary_text(('config_save_seconds', ()))}")
+
+        probes = sorted(dict(labels)["probe"] for (name, labels) in summaries if name == "detection_probe_seconds")
+        if probes:
+            lines.append("检测探针")
+            for probe in probes:
+                key = ("detection_probe_seconds", (("probe", probe),))
+                timeouts = counters.get(("detection_probe_timeouts_total", (("probe", probe),)), 0)
+                lines.append(f"  {probe:<20}{summary_text(key)}" + (f"，超时 {timeouts:.0f} 次" if timeouts else ""))
+        else:
+            lines.append("检测探针  无记录")
+        lines.append(f"已统计 {time.time() - metrics.started_at:.0f} 秒")
+        return lines
+
+    @staticmethod
+    def format_inventory(inventory):
+        """后台工作池的线程和任务"""
+        lines = ["后台工作池"]
+        for name, pool in inventory["pools"].items():
+            lines.append(
+                f"  {name:<12}线程 {len(pool['threads'])}/{pool['max_workers']}，"
+                f"完成 {pool['completed']}，失败 {pool['failed']}"
+            )
+            for task in pool["tasks"]:
+                state = "执行中" if task["state"] == "running" else "排队"
+                lines.append(
+                    f"    {task['name']:<24}{state} {task['elapsed']:.1f}s"
+                    + (f"  {task['thread']}" if task["thread"] else "")
+                    + ("  已取消" if task["cancelled"] else "")
+                )
+        lines.append(f"其他线程  {len(inventory['other_threads'])}：" + "，".join(inventory["other_threads"]))
+        return lines
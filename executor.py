@@ -0,0 +1,285 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 各工作池的线程上限
+DEFAULT_POOLS = {
+    "detect": 1,       # 微信路径检测（检测内部的各策略另有线程池）
+    "background": 2,   # 登录后启动微信和 API 服务等
+    "io": 4,           # 文件读写等短任务
+}
+
+
+class Cancelled(Exception):
+    """任务被取消"""
+
+
+class CancelToken:
+    """协作式取消标记，任务在步骤之间检查 cancelled 或调用 raise_if_cancelled"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+    def wait(self, timeout):
+        """等待 timeout 秒，期间被取消时提前返回 True，可代替 time.sleep"""
+        return self._event.wait(timeout)
+
+
+class Task:
+    """提交到工作池的任务"""
+
+    def __init__(self, pool, name, func, args, kwargs):
+        self.pool = pool
+        self.name = name
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.token = CancelToken()
+        self.future = Future()
+        self.submitted = time.monotonic()
+        self.started = None
+        self.thread_name = None
+
+    def cancel(self):
+        self.token.cancel()
+        # 还在排队的任务直接取消
+        self.future.cancel()
+
+    def describe(self):
+        now = time.monotonic()
+        return {
+            "pool": self.pool,
+            "name": self.name,
+            "state": "running" if self.started else "queued",
+            "thread": self.thread_name,
+            "elapsed": now - (self.started or self.submitted),
+            "cancelled": self.token.cancelled,
+        }
+
+
+_local = threading.local()
+
+
+def current_token():
+    """当前工作线程正在执行的任务的取消标记（不在工作线程中时返回一个不会被取消的标记）"""
+    task = getattr(_local, "task", None)
+    return task.token if task else CancelToken()
+
+
+class WorkerPool:
+    """有上限的命名工作池
+
+    线程按需创建（名称为 池名-序号），空闲 idle_timeout 秒后退出。
+    工作线程是守护线程，程序退出前由 ExecutorService.shutdown 在期限内排空。
+    """
+
+    def __init__(self, name, max_workers, idle_timeout=30.0):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.idle_timeout = idle_timeout
+        self.tasks = []  # 排队和执行中的任务
+        self.completed = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._threads = set()
+        self._idle = 0
+        self._counter = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, name, func, *args, **kwargs):
+        """提交任务，返回 Task（task.future 为结果，task.token 为取消标记）"""
+        task = Task(self.name, name, func, args, kwargs)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"工作池 {self.name} 已关闭")
+            self.tasks.append(task)
+            # 排队的任务多于空闲线程时才新建线程
+            if self._queue.qsize() >= self._idle and len(self._threads) < self.max_workers:
+                self._counter += 1
+                thread = threading.Thread(target=self._worker, name=f"{self.name}-{self._counter}", daemon=True)
+                self._threads.add(thread)
+                thread.start()
+            # 在锁内入队，空闲超时的线程退出前能看到这个任务
+            self._queue.put(task)
+        return task
+
+    def _worker(self):
+        thread = threading.current_thread()
+        while True:
+            with self._lock:
+                self._idle += 1
+            try:
+                task = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                task = None
+            with self._lock:
+                self._idle -= 1
+                if task is None:
+                    if self._queue.empty():
+                        self._threads.discard(thread)
+                        return
+                    continue
+            if task is _STOP:
+                with self._lock:
+                    self._threads.discard(thread)
+                return
+            self._run(task, thread)
+
+    def _run(self, task, thread):
+        if not task.future.set_running_or_notify_cancel():
+            self._finish(task)
+            return
+        task.started = time.monotonic()
+        task.thread_name = thread.name
+        _local.task = task
+        try:
+            if task.token.cancelled:
+                raise Cancelled()
+            result = task.func(*task.args, **task.kwargs)
+        except Cancelled as e:
+            task.future.set_exception(e)
+        except BaseException as e:
+            with self._lock:
+                self.failed += 1
+            logger.warning("后台任务失败 %s/%s: %s", self.name, task.name, e)
+            task.future.set_exception(e)
+        else:
+            task.future.set_result(result)
+        finally:
+            _local.task = None
+            if metrics.enabled:
+                metrics.observe("worker_task_seconds", time.monotonic() - task.started, pool=self.name)
+            self._finish(task)
+
+    def _finish(self, task):
+        with self._lock:
+            if task in self.tasks:
+                self.tasks.remove(task)
+            self.completed += 1
+
+    def cancel_all(self):
+        with self._lock:
+            tasks = list(self.tasks)
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def close(self):
+        """不再接受新任务，空闲线程退出"""
+        with self._lock:
+            self._closed = True
+            count = len(self._threads)
+        for _ in range(count):
+            self._queue.put(_STOP)
+
+    def snapshot(self):
+        with self._lock:
+            tasks = [task.describe() for task in self.tasks]
+            threads = sorted(thread.name for thread in self._threads)
+        return {
+            "max_workers": self.max_workers,
+            "threads": threads,
+            "tasks": tasks,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+_STOP = object()
+
+
+class ExecutorService:
+    """后台任务中心
+
+    替代各处临时创建的守护线程：任务按用途提交到命名的工作池，每个任务带取消标记。
+    窗口关闭时 shutdown 先取消所有任务，在期限内等待它们结束，再执行收尾回调（如配置写盘）。
+    """
+
+    def __init__(self, pools=None):
+        self.pools = {}
+        self.drain_callbacks = []  # (名称, 回调)，shutdown 时按注册顺序执行
+        self._lock = threading.Lock()
+        self._shutdown = False
+        for name, max_workers in (pools or DEFAULT_POOLS).items():
+            self.pools[name] = WorkerPool(name, max_workers)
+
+    def get_pool(self, name):
+        with self._lock:
+            pool = self.pools.get(name)
+            if pool is None:
+                pool = self.pools[name] = WorkerPool(name, 1)
+            return pool
+
+    def submit(self, pool, name, func, *args, **kwargs):
+        """提交任务到指定工作池，返回 Task"""
+        return self.get_pool(pool).submit(name, func, *args, **kwargs)
+
+    def on_shutdown(self, name, callback):
+        """注册收尾回调，在任务排空之后执行"""
+        self.drain_callbacks.append((name, callback))
+
+    def shutdown(self, timeout=3.0):
+        """取消并排空所有任务，然后执行收尾回调，返回仍未结束的任务"""
+        if self._shutdown:
+            return []
+        self._shutdown = True
+        deadline = time.monotonic() + timeout
+        pools = list(self.pools.values())
+        for pool in pools:
+            pool.cancel_all()
+            pool.close()
+
+        # 等待执行中的任务在检查点退出
+        remaining = []
+        for pool in pools:
+            for task in list(pool.tasks):
+                wait = deadline - time.monotonic()
+                try:
+                    task.future.exception(timeout=max(wait, 0))
+                except Exception:
+                    pass
+            remaining.extend(task.describe() for task in list(pool.tasks) if not task.future.done())
+        if remaining:
+            logger.warning("关闭时仍有 %d 个后台任务未结束: %s", len(remaining), [t["name"] for t in remaining])
+
+        for name, callback in self.drain_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning("关闭收尾失败 %s: %s", name, e)
+        return remaining
+
+    def inventory(self):
+        """线程清单：工作池中的任务和线程，以及其他存活线程"""
+        pools = {name: pool.snapshot() for name, pool in self.pools.items()}
+        pooled = {thread for pool in pools.values() for thread in pool["threads"]}
+        others = sorted(thread.name for thread in threading.enumerate() if thread.name not in pooled)
+        return {"pools": pools, "other_threads": others}
+
+    def task_counts(self):
+        """按工作池和状态统计任务数，供运行指标使用"""
+        counts = {}
+        for name, pool in self.pools.items():
+            for task in pool.snapshot()["tasks"]:
+                key = (("pool", name), ("state", task["state"]))
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
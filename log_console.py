@@ -0,0 +1,167 @@
+import logging
+import threading
+import time
+
+import flet as ft
+
+from animation import get_scheduler
+from view_cache import patch
+
+LEVEL_COLORS = {
+    logging.DEBUG: ft.Colors.GREY_500,
+    logging.INFO: ft.Colors.GREY_800,
+    logging.WARNING: ft.Colors.ORANGE_700,
+    logging.ERROR: ft.Colors.RED_600,
+    logging.CRITICAL: ft.Colors.RED_900,
+}
+
+
+class LogConsole(ft.Container):
+    """虚拟化的日志控制台
+
+    只创建可见行数的文本控件，滚动和新日志到达时只改写这些行的内容，
+    无论缓冲区中有多少条日志，控件数量和每次同步的数据量都是固定的。
+    停在最底部时自动跟随最新日志；新日志在短时间内合并刷新一次，由全局动画调度器的线程定时执行，
+    不为每次刷新创建线程。只在挂载期间订阅日志，隐藏时不刷新，重新显示时调用 refresh。
+    """
+
+    ROW_HEIGHT = 18
+    REFRESH_INTERVAL = 0.1  # 新日志合并刷新的间隔（秒）
+
+    def __init__(self, ring_buffer, updater, visible_rows=14, scheduler=None, **kwargs):
+        self.ring_buffer = ring_buffer
+        self.updater = updater
+        self.scheduler = scheduler or get_scheduler()
+        self.next_due = 0.0  # 合并刷新的时间（动画调度器读取）
+        self.visible_rows = visible_rows
+        self.offset = None  # 第一行可见日志的位置，None 表示跟随最新日志
+        self.min_level = logging.NOTSET
+        self._unsubscribe = None
+        self._mounted = False
+        self._refresh_pending = False
+        self._lock = threading.Lock()
+
+        self.rows = [
+            ft.Text("", size=12, height=self.ROW_HEIGHT, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS, no_wrap=True)
+            for _ in range(visible_rows)
+        ]
+        self.position_text = ft.Text("", size=12, color=ft.Colors.GREY_600)
+        self.follow_button = ft.IconButton(
+            icon=ft.Icons.VERTICAL_ALIGN_BOTTOM,
+            icon_size=18,
+            tooltip="跳到最新",
+            on_click=lambda _: self.scroll_to_end(),
+        )
+        self.level_checkbox = ft.Checkbox(
+            label="只看警告和错误",
+            value=False,
+            label_style=ft.TextStyle(size=12),
+            on_change=self.on_level_change,
+        )
+
+        super().__init__(
+            content=ft.Column([
+                ft.Row([self.level_checkbox, ft.Container(expand=True), self.position_text, self.follow_button]),
+                ft.GestureDetector(
+                    content=ft.Container(
+                        content=ft.Column(self.rows, spacing=0),
+                        padding=ft.padding.symmetric(horizontal=12, vertical=8),
+                    ),
+                    on_scroll=self.on_scroll,
+                ),
+            ], spacing=4),
+            bgcolor=ft.Colors.GREY_50,
+            border_radius=15,
+            padding=ft.padding.only(left=8, right=8, bottom=8),
+            **kwargs,
+        )
+
+    def did_mount(self):
+        self._mounted = True
+        if self.ring_buffer is not None:
+            self._unsubscribe = self.ring_buffer.subscribe(self.on_entry)
+        self.refresh()
+
+    def will_unmount(self):
+        self._mounted = False
+        self.scheduler.unregister(self)
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def on_entry(self, entry):
+        """新日志到达（在记录日志的线程中调用），合并到下一次刷新"""
+        if not self.visible:
+            return
+        with self._lock:
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+            self.next_due = time.monotonic() + self.REFRESH_INTERVAL
+        self.scheduler.register(self)
+
+    def tick(self, now):
+        """由动画调度器调用：到时间后刷新一次并退出调度"""
+        if now < self.next_due:
+            return False
+        self.scheduler.unregister(self)
+        self.refresh()
+        # 刷新时已提交变化的行
+        return False
+
+    def get_control(self):
+        return self
+
+    def on_scroll(self, e: ft.ScrollEvent):
+        delta = e.scroll_delta_y or 0
+        if not delta:
+            return
+        lines = round(delta / self.ROW_HEIGHT) or (1 if delta > 0 else -1)
+        total = self.get_total()
+        start = self.get_start(total) + lines
+        last_start = max(0, total - self.visible_rows)
+        self.offset = None if start >= last_start else max(0, start)
+        self.refresh()
+
+    def on_level_change(self, e):
+        self.min_level = logging.WARNING if self.level_checkbox.value else logging.NOTSET
+        self.offset = None
+        self.refresh()
+
+    def scroll_to_end(self):
+        self.offset = None
+        self.refresh()
+
+    def get_total(self):
+        return self.ring_buffer.count(self.min_level) if self.ring_buffer is not None else 0
+
+    def get_start(self, total):
+        if self.offset is None:
+            return max(0, total - self.visible_rows)
+        return min(self.offset, max(0, total - self.visible_rows))
+
+    def refresh(self):
+        """重新填充可见行，只同步内容发生变化的行"""
+        with self._lock:
+            self._refresh_pending = False
+            total = self.get_total()
+            start = self.get_start(total)
+            entries = self.ring_buffer.get_entries(start, self.visible_rows, self.min_level) if total else []
+
+            changed = []
+            for index, row in enumerate(self.rows):
+                if index < len(entries):
+                    entry = entries[index]
+                    patch(row, changed, value=entry.format(), color=LEVEL_COLORS.get(entry.levelno, ft.Colors.GREY_800))
+                else:
+                    patch(row, changed, value="")
+
+            if total:
+                position = f"{start + 1}-{start + len(entries)} / {total}"
+            else:
+                position = "暂无日志"
+            patch(self.position_text, changed, value=position)
+            patch(self.follow_button, changed, disabled=self.offset is None)
+
+        if changed and self._mounted:
+            self.updater.request(*changed)
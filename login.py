@@ -1,222 +1,64 @@
 import flet as ft
-import os
-import winreg
-import threading
-import time
 import asyncio
-from pathlib import Path
-import json
+import logging
+import os
 
-class WeChatPathDetector:
-    """微信路径检测器"""
-    
-    def __init__(self):
-        self.common_paths = [
-            r"C:\Program Files\Tencent\WeChat\WeChat.exe",
-            r"C:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
-            r"D:\Program Files\Tencent\WeChat\WeChat.exe",
-            r"D:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
-            r"C:\Program Files\Tencent\Weixin\Weixin.exe",
-            r"C:\Program Files (x86)\Tencent\Weixin\Weixin.exe",
-            r"D:\Program Files\Tencent\Weixin\Weixin.exe",
-            r"D:\Program Files (x86)\Tencent\Weixin\Weixin.exe",
-        ]
-    
-    def detect_from_registry(self):
-        """从注册表检测微信路径"""
-        try:
-            # 尝试从注册表获取微信安装路径
-            key_paths = [
-                r"SOFTWARE\Tencent\WeChat",
-                r"SOFTWARE\WOW6432Node\Tencent\WeChat",
-            ]
-            
-            for key_path in key_paths:
-                try:
-                    with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
-                        install_path, _ = winreg.QueryValueEx(key, "InstallPath")
-                        wechat_exe = os.path.join(install_path, "WeChat.exe")
-                        if os.path.exists(wechat_exe):
-                            return wechat_exe
-                except (FileNotFoundError, OSError):
-                    continue
-        except Exception as e:
-            print(f"注册表检测失败: {e}")
-        return None
-    
-    def detect_from_common_paths(self):
-        """从常见路径检测微信"""
-        for path in self.common_paths:
-            if os.path.exists(path):
-                return path
-        return None
-    
-    def auto_detect(self):
-        """自动检测微信路径"""
-        # 先尝试注册表
-        path = self.detect_from_registry()
-        if path:
-            return path
-        
-        # 再尝试常见路径
-        path = self.detect_from_common_paths()
-        if path:
-            return path
-        
-        return None
-    
-    def validate_path(self, path):
-        """验证微信路径是否有效"""
-        if not path:
-            return False
-        
-        if not os.path.exists(path):
-            return False
-        
-        if not path.lower().endswith('wechat.exe'):
-            return False
-        
-        return True
+from action_executor import ActionExecutor
+from animation import TypewriterText
+from app_logging import get_ring_buffer, setup_logging
+from assets import get_resolver
+from config_manager import ConfigManager
+from executor import ExecutorService, current_token
+from metrics import DEFAULT_METRICS_PORT, count_controls, metrics
+from overlay_manager import OverlayManager
+from session_trace import get_recorder
+from startup_profiler import profiler
+from tracing import start_from_env, traced, tracer
+from update_batcher import get_batcher
+from view_cache import ViewCache, patch
+from wechat_detector import WeChatPathDetector
 
-class ConfigManager:
-    """配置管理器"""
-    
-    def __init__(self):
-        self.config_file = "config.json"
-        self.config = self.load_config()
-    
-    def load_config(self):
-        """加载配置文件"""
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"配置文件加载失败: {e}")
-        
-        return {}
-    
-    def save_config(self):
-        """保存配置文件"""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as e:
-            print(f"配置文件保存失败: {e}")
-            return False
-    
-    def get_wechat_path(self):
-        """获取微信路径"""
-        return self.config.get('wechat_path', '')
-    
-    def set_wechat_path(self, path):
-        """设置微信路径"""
-        self.config['wechat_path'] = path
-        return self.save_config()
+logger = logging.getLogger(__name__)
 
-class TypewriterText:
-    """打字机效果文本组件"""
-    
-    def __init__(self, page, sentences, size=16, color=ft.Colors.GREY_600):
-        self.page = page
-        self.sentences = sentences
-        self.size = size
-        self.color = color
-        self.current_text = ""
-        self.cursor_visible = True
-        self.is_running = True
-        
-        # 创建文本控件
-        self.text_control = ft.Text(
-            value="",
-            size=self.size,
-            color=self.color,
-            font_family="SourceHanFont",
-        )
-        
-        # 启动打字机效果
-        self.start_typewriter()
-    
-    def get_control(self):
-        """获取文本控件"""
-        return self.text_control
+class LoginPage:
+    """登录页面"""
     
-    def start_typewriter(self):
-        """启动打字机效果"""
-        def typewriter_thread():
-            sentence_index = 0
-            while self.is_running:
-                try:
-                    sentence = self.sentences[sentence_index]
-                    
-                    # 打字效果
-                    for i in range(len(sentence) + 1):
-                        if not self.is_running:
-                            break
-                        self.current_text = sentence[:i]
-                        self.update_display()
-                        time.sleep(0.1)
-                    
-                    # 停留时间
-                    time.sleep(2)
-                    
-                    # 删除效果
-                    for i in range(len(sentence), -1, -1):
-                        if not self.is_running:
-                            break
-                        self.current_text = sentence[:i]
-                        self.update_display()
-                        time.sleep(0.05)
-                    
-                    # 切换到下一个句子
-                    sentence_index = (sentence_index + 1) % len(self.sentences)
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"打字机效果错误: {e}")
-                    time.sleep(1)
-        
-        # 在后台线程中运行
-        thread = threading.Thread(target=typewriter_thread, daemon=True)
-        thread.start()
-        
-        # 光标闪烁
-        def cursor_blink():
-            while self.is_running:
-                try:
-                    self.cursor_visible = not self.cursor_visible
-                    self.update_display()
-                    time.sleep(0.5)
-                except Exception as e:
-                    print(f"光标闪烁错误: {e}")
-                    time.sleep(1)
-        
-        cursor_thread = threading.Thread(target=cursor_blink, daemon=True)
-        cursor_thread.start()
+    # 需要显示表单和操作按钮的模式
+    FORM_MODES = ("login", "register", "recharge")
     
-    def update_display(self):
-        """更新显示"""
-        try:
-            cursor = "|" if self.cursor_visible else " "
-            display_text = self.current_text + cursor
-            self.text_control.value = display_text
-            self.page.update()
-        except Exception as e:
-            print(f"显示更新错误: {e}")
+    # 各操作的名称和整体超时（秒），超时包含后端客户端的重试
+    ACTION_LABELS = {"login": "登录", "register": "注册", "recharge": "充值"}
+    ACTION_TIMEOUTS = {"login": 15, "register": 15, "recharge": 30}
     
-    def stop(self):
-        """停止打字机效果"""
-        self.is_running = False
-
-class LoginPage:
-    """登录页面"""
+    # 批量充值的并发数
+    CARD_BATCH_CONCURRENCY = 4
     
+    @traced("LoginPage.__init__", cat="ui")
     def __init__(self, page: ft.Page):
+        profiler.mark("login_page_init")
         self.page = page
         self.detector = WeChatPathDetector()
         self.config_manager = ConfigManager()
+        self.detection_cache = None  # 在首帧之后的检测线程中加载
+        self.updater = get_batcher(page)
         self.current_mode = "login"  # login, register, recharge
+        self.view_cache = ViewCache()
+        self.overlays = OverlayManager(page, self.updater)  # 文件选择器等浮层，创建一次后复用
+        self.content_renderer = None  # 首次打开信息页面时创建
+        self.backend = None  # 首次提交时创建
+        self.session_store = None  # 首帧之后创建
+        self.session = None  # 当前登录会话
+        self.services_task = None  # 登录后启动服务的后台任务
+        self.api_host = None  # 登录成功后启动
+        self.supervisor = None  # 登录成功后启动，负责启动微信并保持运行
+        self.executor = ActionExecutor(page.run_task, on_progress=self.show_progress, on_timeout=self.show_timeout, on_error=self.show_error)
+        self.workers = ExecutorService()  # 后台任务，关闭窗口时在期限内排空
+        self.workers.on_shutdown("services", self.stop_services)
+        self.workers.on_shutdown("config", self.config_manager.flush)
+        self.progress_message = None  # 当前进度提示 (文本, 颜色)
+        self.metrics_endpoint = None  # 启用运行指标后的 Prometheus 端点
+        self.recorder = get_recorder()  # 会话录制（未启用时为 None）
+        self.nav_buttons = {}
         
         # 配置自定义字体
         self.setup_fonts()
@@ -230,6 +72,14 @@ class LoginPage:
             "高效便捷的微信助手"
         ]
         
+        # 打字机效果文本只创建一次，界面重建时复用同一个动画
+        self.typewriter = TypewriterText(
+            page=self.page,
+            sentences=self.typewriter_sentences,
+            size=12,
+            color=ft.Colors.INDIGO_600
+        )
+        
         # UI组件
         self.username_field = ft.TextField(
             label="用户名",
@@ -338,19 +188,29 @@ class LoginPage:
             visible=False,
         )
         
+        # 卡密字段 - 支持粘贴多个卡密（每行一个）或从文件导入，进行批量充值
         self.card_key_field = ft.TextField(
             label="卡密",
-            hint_text="请输入充值卡密",
+            hint_text="请输入卡密，可粘贴多个",
             border_color=ft.Colors.TRANSPARENT,
             focused_border_color=ft.Colors.ORANGE_400,
             text_style=ft.TextStyle(font_family="AlimamaFont", size=14),
             label_style=ft.TextStyle(font_family="AlimamaFont", size=12, color=ft.Colors.ORANGE_600),
             width=250,
-            height=55,
+            multiline=True,
+            min_lines=1,
+            max_lines=3,
             bgcolor=ft.Colors.GREY_50,
             border_radius=15,
             content_padding=ft.padding.symmetric(horizontal=20, vertical=15),
             prefix_icon=ft.Icons.CARD_GIFTCARD_OUTLINED,
+            suffix=ft.IconButton(
+                icon=ft.Icons.UPLOAD_FILE,
+                icon_size=18,
+                icon_color=ft.Colors.ORANGE_600,
+                tooltip="从文件导入卡密",
+                on_click=self.import_card_keys,
+            ),
             visible=False,
         )
         
@@ -361,82 +221,208 @@ class LoginPage:
             font_family="AlimamaFont",
         )
         
-        # 自动检测微信路径
-        self.auto_detect_wechat_path()
+        # 录制会话时记录字段编辑（未录制时不注册，客户端不会发送输入事件）
+        if self.recorder:
+            for name, field in self.get_trace_fields().items():
+                field.on_change = lambda e, name=name: self.recorder.record_field(name, e.control.value)
         
+        # 自动检测微信路径
         self.setup_ui()
+        profiler.mark("first_frame")
+        tracer.instant("first_frame", cat="ui")
+        if metrics.enabled:
+            self.enable_metrics()
+        
+        # 首帧之后再执行的工作
+        self.resume_session()
+        self.detector.get_validator().subscribe(self.on_wechat_path_changed)
+        self.auto_detect_wechat_path()
+        profiler.finish()
     
     def auto_detect_wechat_path(self):
         """自动检测微信路径"""
+        @traced("LoginPage.detect_wechat_path", cat="detection")
         def detect_async():
-            # 先从配置文件加载
+            from detection_cache import CACHE_HIT, CACHE_MISS, DetectionCache
+            
+            token = current_token()
+            if self.detection_cache is None:
+                cache_file = os.path.join(os.path.dirname(os.path.abspath(self.config_manager.config_file)), "detection_cache.json")
+                self.detection_cache = DetectionCache(cache_file, backend=self.detector.backend)
+            
+            # 先用检测缓存确认配置中的路径，只需一次 stat
             saved_path = self.config_manager.get_wechat_path()
+            state = self.detection_cache.lookup(saved_path)
+            if state == CACHE_HIT:
+                # 缓存刚确认过签名，不再重复校验
+                entry = self.detection_cache.get_entry(saved_path)
+                self.detector.remember_path(saved_path, (entry["size"], entry["mtime"]))
+                self.show_wechat_path(saved_path, "已检测到微信路径", validated=True)
+                return
+            
+            # 微信已升级或缓存过期：配置中的路径仍然有效时继续使用，只在后台复核，
+            # 不用重新检测的结果覆盖用户选择的安装（如第二份安装或 D 盘的安装）
             if saved_path and self.detector.validate_path(saved_path):
-                self.wechat_path_field.value = saved_path
-                self.wechat_path_field.hint_text = "已检测到微信路径"
-                self.page.update()
+                self.detection_cache.confirm(saved_path)
+                self.show_wechat_path(saved_path, "已检测到微信路径", validated=True)
+                if state != CACHE_MISS:
+                    self.workers.submit("detect", "wechat-recheck", self.recheck_wechat_path, saved_path)
                 return
             
-            # 自动检测
+            # 配置中的路径已不存在，自动检测
             detected_path = self.detector.auto_detect()
+            if token.cancelled:
+                # 窗口正在关闭，不再写配置和界面
+                return
             if detected_path:
-                self.wechat_path_field.value = detected_path
-                self.wechat_path_field.hint_text = "已自动检测到微信路径"
-                self.config_manager.set_wechat_path(detected_path)
+                self.detection_cache.confirm(detected_path)
+                if detected_path != saved_path:
+                    self.show_wechat_path(detected_path, "已自动检测到微信路径")
+                    self.config_manager.set_wechat_path(detected_path)
             else:
                 self.wechat_path_field.hint_text = "未检测到微信，请手动选择路径"
                 self.wechat_path_field.read_only = False
-            
-            self.page.update()
+                self.updater.request(self.wechat_path_field)
         
-        # 在后台线程中执行检测
-        threading.Thread(target=detect_async, daemon=True).start()
+        # 在后台工作池中执行检测
+        self.workers.submit("detect", "wechat-detect", detect_async)
+    
+    def recheck_wechat_path(self, saved_path):
+        """后台复核：重新检测一次，结果与配置中的路径比较
+
+        配置中的路径仍然有效时只记录检测到的其他安装，不替换用户的选择；
+        配置中的路径已不存在时才改用检测结果。
+        """
+        detected_path = self.detector.auto_detect()
+        if current_token().cancelled or not detected_path or detected_path == saved_path:
+            return
+        self.detection_cache.confirm(detected_path)
+        if saved_path != self.config_manager.get_wechat_path():
+            # 复核期间用户已重新选择
+            return
+        if self.detector.validate_path(saved_path):
+            logger.info("检测到另一份微信安装 %s，继续使用 %s", detected_path, saved_path)
+            return
+        self.show_wechat_path(detected_path, "已自动检测到微信路径")
+        self.config_manager.set_wechat_path(detected_path)
+    
+    def show_wechat_path(self, path, hint_text, validated=False):
+        """显示检测到的微信路径"""
+        if not validated:
+            # 校验一次，记录文件签名并开始监视安装目录
+            self.detector.validate_path(path)
+        self.wechat_path_field.value = path
+        self.wechat_path_field.hint_text = hint_text
+        self.updater.request(self.wechat_path_field)
+    
+    def on_wechat_path_changed(self, path, valid):
+        """校验过的微信程序被升级或删除（在监视线程中回调，转到后台工作池处理）"""
+        try:
+            self.workers.submit("detect", "wechat-path-changed", self.handle_wechat_path_changed, path, valid)
+        except RuntimeError:
+            # 窗口正在关闭，工作池已停止
+            pass
+    
+    def handle_wechat_path_changed(self, path, valid):
+        if path != self.config_manager.get_wechat_path():
+            return
+        if valid:
+            # 微信升级：记录新的文件签名
+            if self.detection_cache:
+                self.detection_cache.confirm(path)
+            return
+        self.wechat_path_field.hint_text = "微信已被移除或移动，正在重新检测"
+        self.updater.request(self.wechat_path_field)
+        if not current_token().cancelled:
+            self.auto_detect_wechat_path()
     
     def browse_wechat_path(self, e):
         """浏览选择微信路径"""
-        def pick_file_result(e: ft.FilePickerResultEvent):
-            if e.files:
-                selected_path = e.files[0].path
-                if self.detector.validate_path(selected_path):
-                    self.wechat_path_field.value = selected_path
-                    self.wechat_path_field.hint_text = "已选择微信路径"
-                    self.config_manager.set_wechat_path(selected_path)
-                    self.status_text.value = "微信路径设置成功"
-                    self.status_text.color = ft.Colors.GREEN_600
-                else:
-                    self.status_text.value = "选择的文件不是有效的微信程序"
-                    self.status_text.color = ft.Colors.RED_600
-                self.page.update()
+        self.browse_file("wechat")
+    
+    def import_card_keys(self, e):
+        """从文本文件导入卡密，追加到卡密输入框"""
+        self.browse_file("cards")
+    
+    def on_file_picked(self, target, e):
+        """文件选择结果，按用途分发"""
+        if self.recorder:
+            self.recorder.record("picker", target=target, selected=bool(e.files))
+        if target == "wechat":
+            self.on_wechat_path_picked(e)
+        else:
+            self.on_card_file_picked(e)
+    
+    def on_wechat_path_picked(self, e):
+        if e.files:
+            selected_path = e.files[0].path
+            if self.detector.validate_path(selected_path):
+                self.wechat_path_field.value = selected_path
+                self.wechat_path_field.hint_text = "已选择微信路径"
+                self.config_manager.set_wechat_path(selected_path)
+                if self.detection_cache:
+                    self.detection_cache.confirm(selected_path)
+                self.updater.request(self.wechat_path_field)
+                self.set_status("微信路径设置成功", ft.Colors.GREEN_600)
+            else:
+                self.set_status("选择的文件不是有效的微信程序", ft.Colors.RED_600)
+    
+    def on_card_file_picked(self, e):
+        if not e.files:
+            return
+        try:
+            with open(e.files[0].path, 'r', encoding='utf-8-sig', errors='replace') as f:
+                content = f.read().strip()
+        except Exception as ex:
+            self.set_status(f"读取卡密文件失败: {ex}", ft.Colors.RED_600)
+            return
         
-        file_picker = ft.FilePicker(on_result=pick_file_result)
-        self.page.overlay.append(file_picker)
-        self.page.update()
+        from card_batch import parse_card_keys
+        current = (self.card_key_field.value or "").strip()
+        self.card_key_field.value = f"{current}\n{content}" if current else content
+        self.updater.request(self.card_key_field)
+        keys, rejected = parse_card_keys(self.card_key_field.value)
+        self.set_status(f"已导入，共 {len(keys)} 张有效卡密，{len(rejected)} 张无效", ft.Colors.ORANGE_600)
+    
+    def browse_file(self, target):
+        """打开文件选择器，target 为 wechat（微信程序）或 cards（卡密文件），返回选择结果的 Future"""
+        if self.recorder:
+            self.recorder.record("browse", target=target)
+        
+        def on_result(e):
+            # 结果为 None 表示被新的选择请求取代
+            if e is not None:
+                self.on_file_picked(target, e)
         
-        file_picker.pick_files(
-            dialog_title="选择微信程序",
+        if target == "wechat":
+            return self.overlays.pick_files(
+                on_result,
+                dialog_title="选择微信程序",
+                file_type=ft.FilePickerFileType.CUSTOM,
+                allowed_extensions=["exe"],
+                initial_directory="C:\\Program Files"
+            )
+        return self.overlays.pick_files(
+            on_result,
+            dialog_title="选择卡密文件",
             file_type=ft.FilePickerFileType.CUSTOM,
-            allowed_extensions=["exe"],
-            initial_directory="C:\\Program Files"
+            allowed_extensions=["txt", "csv"],
         )
     
+    @traced(cat="ui")
     def setup_fonts(self):
-        """配置自定义字体"""
+        """配置自定义字体 - 优先使用构建缓存中裁剪后的字体"""
         try:
-            # 添加自定义字体
-            title_font_path = "font/阿里妈妈数黑体.ttf"
-            content_font_path = "font/SourceHanSansSC-Normal-2.otf"
-            
-            if os.path.exists(title_font_path):
-                self.page.fonts = {
-                    "AlimamaFont": title_font_path,
-                    "SourceHanFont": content_font_path
-                }
-                print("自定义字体加载成功")
-            else:
-                print("字体文件未找到，使用默认字体")
+            fonts, missing = get_resolver().resolve_fonts()
+            if fonts:
+                self.page.fonts = fonts
+                logger.info("自定义字体加载成功")
+            if missing:
+                logger.warning("字体文件未找到，使用默认字体: %s", ", ".join(missing))
         except Exception as e:
-            print(f"字体配置失败: {e}")
+            logger.warning("字体配置失败: %s", e)
     
+    @traced(cat="ui")
     def setup_ui(self):
         """设置UI界面"""
         self.page.title = "WxQuantum - 专业级微信管理工具"
@@ -448,6 +434,10 @@ class LoginPage:
         self.page.window.frameless = True
         self.page.window.always_on_top = False
         self.page.window.bgcolor = ft.Colors.TRANSPARENT
+        # 关闭窗口前先停止后台服务
+        self.page.window.prevent_close = True
+        self.page.window.on_event = self.on_window_event
+        self.page.on_keyboard_event = self.on_keyboard
         self.page.padding = 0
         self.page.spacing = 0
         
@@ -459,10 +449,34 @@ class LoginPage:
         self.build_ui()
         
         self.page.add(self.main_container)
-        self.page.update()
+        self.updater.flush()
     
+    @traced(cat="ui")
     def build_ui(self):
-        """构建UI界面"""
+        """构建UI界面（只构建一次，之后由 reconcile 增量同步）"""
+        # 标题文本
+        self.title_text = ft.Text(
+            self.get_title_text(),
+            size=24,
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.INDIGO_800,
+            font_family="AlimamaFont",
+        )
+        
+        # 内容插槽 - 各模式的内容子树构建后常驻其中，通过可见性切换
+        self.content_views = {self.get_content_key(): self.get_content_area()}
+        self.content_slot = ft.Column(
+            list(self.content_views.values()),
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        )
+        
+        # 操作按钮和状态（仅在功能页面显示）
+        self.action_container = ft.Container(
+            content=self.get_action_area(),
+            padding=ft.padding.only(left=30, right=30, bottom=10, top=10),
+            visible=self.current_mode in self.FORM_MODES,
+        )
+        
         # 主容器 - 水平布局
         self.main_container.content = ft.Row([
             # 左侧导航栏
@@ -473,7 +487,7 @@ class LoginPage:
                         content=ft.Column([
                             ft.Container(
                                 content=ft.Image(
-                                    src="logo.png",
+                                    src=get_resolver().resolve("logo.png") or "logo.png",
                                     width=200,
                                     height=100,
                                     fit=ft.ImageFit.CONTAIN,
@@ -481,12 +495,7 @@ class LoginPage:
                                 border_radius=10,
                             ),
                             # 打字机效果文本
-                            TypewriterText(
-                                page=self.page,
-                                sentences=self.typewriter_sentences,
-                                size=12,
-                                color=ft.Colors.INDIGO_600
-                            ).get_control(),
+                            self.typewriter.get_control(),
                         ],
                         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                         spacing=8,
@@ -533,6 +542,7 @@ class LoginPage:
                                     font_family="SourceHanFont",
                                 ),
                                 self.create_nav_button("关于软件", "about", ft.Icons.INFO_OUTLINE),
+                                self.create_nav_button("运行日志", "logs", ft.Icons.RECEIPT_LONG_OUTLINED),
                             ],
                             spacing=12,
                             ),
@@ -560,13 +570,7 @@ class LoginPage:
                      ft.WindowDragArea(
                          content=ft.Container(
                              content=ft.Row([
-                                 ft.Text(
-                                     self.get_title_text(),
-                                     size=24,
-                                     weight=ft.FontWeight.BOLD,
-                                     color=ft.Colors.INDIGO_800,
-                                     font_family="AlimamaFont",
-                                 ),
+                                 self.title_text,
                                  ft.Container(expand=True),
                                  # 关闭按钮
                                  ft.IconButton(
@@ -582,7 +586,21 @@ class LoginPage:
                     # 内容区域 - 添加滚动功能
                     ft.Container(
                         content=ft.ListView(
-                            controls=[self.get_content_area()],
+                            controls=[
+                                # 为所有内容添加居中布局容器 - 基于整个窗口居中
+                                ft.Container(
+                                    content=ft.Column([
+                                        ft.Container(height=50),  # 顶部间距
+                                        self.content_slot,
+                                        ft.Container(height=50),  # 底部间距
+                                    ],
+                                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                                    ),
+                                    alignment=ft.alignment.center,
+                                    expand=True,
+                                    width=540,  # 固定宽度确保居中
+                                ),
+                            ],
                             expand=True,
                             auto_scroll=False,
                             spacing=0,
@@ -593,11 +611,7 @@ class LoginPage:
                         animate_scale=ft.Animation(300, ft.AnimationCurve.EASE_OUT),
                     ),
                     
-                    # 操作按钮和状态（仅在功能页面显示）
-                    ft.Container(
-                        content=self.get_action_area(),
-                        padding=ft.padding.only(left=30, right=30, bottom=10, top=10),
-                    ) if self.current_mode in ["login", "register", "recharge"] else ft.Container(),
+                    self.action_container,
                 ]),
                 width=600,
                 gradient=ft.LinearGradient(
@@ -627,37 +641,73 @@ class LoginPage:
     
     def switch_mode(self, mode):
         """切换功能模式"""
+        if self.recorder:
+            self.recorder.record("mode", mode=mode)
         self.current_mode = mode
         
+        # 只同步发生变化的控件，不再重建整个界面
+        changed = self.reconcile()
+        if changed:
+            self.updater.request(*changed)
+            self.updater.flush()
+
+        # 日志控制台和诊断面板隐藏期间不刷新，重新显示时补上
+        if mode in ("logs", "diagnostics"):
+            self.content_views[mode].refresh()
+
+    def reconcile(self):
+        """将当前模式同步到已构建的界面，返回发生变化的控件"""
+        changed = []
+        mode = self.current_mode
+        
         # 更新字段可见性
-        if mode == "login":
-            self.username_field.visible = True
-            self.password_field.visible = True
-            self.confirm_password_field.visible = False
-            self.wechat_path_field.visible = True
-            self.recharge_username_field.visible = False
-            self.recharge_password_field.visible = False
-            self.card_key_field.visible = False
-        elif mode == "register":
-            self.username_field.visible = True
-            self.password_field.visible = True
-            self.confirm_password_field.visible = True
-            self.wechat_path_field.visible = False
-            self.recharge_username_field.visible = False
-            self.recharge_password_field.visible = False
-            self.card_key_field.visible = False
-        elif mode == "recharge":
-            self.username_field.visible = False
-            self.password_field.visible = False
-            self.confirm_password_field.visible = False
-            self.wechat_path_field.visible = False
-            self.recharge_username_field.visible = True
-            self.recharge_password_field.visible = True
-            self.card_key_field.visible = True
-        
-        # 重新构建UI以更新导航按钮状态
-        self.build_ui()
-        self.page.update()
+        if mode in self.FORM_MODES:
+            form = self.view_cache.get("form", self.build_form)
+            mounted = [field for field, modes in self.get_field_modes() if field in form.controls or mode in modes]
+            if len(mounted) != len(form.controls):
+                # 首次进入该模式，挂载其字段（保持字段顺序）
+                form.controls = mounted
+                changed.append(form)
+            for field, modes in self.get_field_modes():
+                patch(field, changed, visible=mode in modes)
+        
+        # 导航按钮状态
+        for nav_mode in self.nav_buttons:
+            self.style_nav_button(nav_mode, changed)
+        
+        patch(self.title_text, changed, value=self.get_title_text())
+        
+        # 内容区域 - 首次访问时挂载，之后只切换可见性
+        key = self.get_content_key()
+        view = self.get_content_area()
+        mounted = self.content_views.get(key)
+        if mounted is not view:
+            # 内容被重新构建（如内容文件已修改）时替换旧的子树
+            if mounted is not None:
+                self.content_slot.controls.remove(mounted)
+            self.content_slot.controls.append(view)
+            self.content_views[key] = view
+            changed.append(self.content_slot)
+        for control in self.content_slot.controls:
+            patch(control, changed, visible=control is view)
+        
+        patch(self.action_container, changed, visible=mode in self.FORM_MODES)
+        if self.action_container.visible:
+            self.style_action_button(changed)
+        
+        return changed
+    
+    def get_field_modes(self):
+        """各输入字段在哪些模式下可见"""
+        return [
+            (self.username_field, ("login", "register")),
+            (self.password_field, ("login", "register")),
+            (self.confirm_password_field, ("register",)),
+            (self.wechat_path_field, ("login",)),
+            (self.recharge_username_field, ("recharge",)),
+            (self.recharge_password_field, ("recharge",)),
+            (self.card_key_field, ("recharge",)),
+        ]
     
     def get_button_text(self):
         """获取按钮文本"""
@@ -677,20 +727,15 @@ class LoginPage:
     
     def create_nav_button(self, text, mode, icon):
         """创建导航按钮"""
-        is_active = self.current_mode == mode
-        
-        return ft.Container(
+        button = ft.Container(
             content=ft.Row([
                 ft.Icon(
                     icon,
                     size=18,
-                    color=ft.Colors.BLUE_600 if is_active else ft.Colors.GREY_500,
                 ),
                 ft.Text(
                     text,
                     size=14,
-                    weight=ft.FontWeight.W_600 if is_active else ft.FontWeight.W_400,
-                    color=ft.Colors.BLUE_600 if is_active else ft.Colors.GREY_600,
                     font_family="SourceHanFont",
                 ),
             ],
@@ -701,12 +746,33 @@ class LoginPage:
             height=45,
             alignment=ft.alignment.center_left,
             padding=ft.padding.symmetric(horizontal=15),
+            on_click=lambda e: self.switch_mode(mode),
+            animate=ft.Animation(200, ft.AnimationCurve.EASE_OUT),
+        )
+        self.nav_buttons[mode] = button
+        self.style_nav_button(mode)
+        return button
+    
+    def style_nav_button(self, mode, changed=None):
+        """根据当前模式设置导航按钮的激活样式"""
+        is_active = self.current_mode == mode
+        button = self.nav_buttons[mode]
+        icon, label = button.content.controls
+        
+        patch(icon, changed, color=ft.Colors.BLUE_600 if is_active else ft.Colors.GREY_500)
+        patch(
+            label,
+            changed,
+            weight=ft.FontWeight.W_600 if is_active else ft.FontWeight.W_400,
+            color=ft.Colors.BLUE_600 if is_active else ft.Colors.GREY_600,
+        )
+        patch(
+            button,
+            changed,
             border=ft.border.only(
                 left=ft.BorderSide(3, ft.Colors.BLUE_600) if is_active else ft.BorderSide(3, ft.Colors.TRANSPARENT)
             ),
             bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.BLUE_600) if is_active else ft.Colors.TRANSPARENT,
-            on_click=lambda e: self.switch_mode(mode),
-            animate=ft.Animation(200, ft.AnimationCurve.EASE_OUT),
         )
     
     def get_title_text(self):
@@ -716,453 +782,76 @@ class LoginPage:
               "register": "用户注册", 
               "recharge": "账户充值",
               "about": "关于软件",
+              "logs": "运行日志",
+              "diagnostics": "运行诊断",
               "manual": "使用说明",
               "disclaimer": "免责声明"
           }
           return title_map.get(self.current_mode, "WxQuantum")
      
+    def get_content_key(self):
+        """当前模式对应的内容键"""
+        return "form" if self.current_mode in self.FORM_MODES else self.current_mode
+    
     def get_content_area(self):
-        """根据当前模式获取内容区域"""
-        content = None
+        """根据当前模式获取内容区域（每种内容只构建一次）"""
+        key = self.get_content_key()
+        if key == "form":
+            return self.view_cache.get(key, self.build_form)
+        if key == "logs":
+            return self.view_cache.get(key, self.build_log_console)
+        if key == "diagnostics":
+            return self.view_cache.get(key, self.build_diagnostics_panel)
+        # 信息页面由内容渲染器按需构建并缓存
+        if self.content_renderer is None:
+            from content_renderer import ContentRenderer
+            self.content_renderer = ContentRenderer()
+        if self.content_renderer.has_page(key):
+            return self.content_renderer.render(key)
+        return self.view_cache.get(key, ft.Container)
+    
+    def build_log_console(self):
+        """构建运行日志控制台"""
+        from log_console import LogConsole
+        return LogConsole(get_ring_buffer(), self.updater)
+    
+    def build_diagnostics_panel(self):
+        """构建运行诊断面板"""
+        from diagnostics_panel import DiagnosticsPanel
+        return DiagnosticsPanel(self.updater, endpoint=self.metrics_endpoint, inventory=self.workers.inventory)
+    
+    def build_form(self):
+        """构建表单 - 登录、注册、充值共用，通过字段可见性区分
         
-        if self.current_mode == "login":
-            content = ft.Column([
-                self.username_field,
-                self.password_field,
-                self.wechat_path_field,
-            ],
+        首帧只挂载当前模式的字段，其他模式的字段在第一次切换过去时再挂载。
+        """
+        return ft.Column(
+            [field for field, modes in self.get_field_modes() if self.current_mode in modes],
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
             spacing=20,
-            )
-        elif self.current_mode == "register":
-            content = ft.Column([
-                self.username_field,
-                self.password_field,
-                self.confirm_password_field,
-            ],
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-            spacing=20,
-            )
-        elif self.current_mode == "recharge":
-            content = ft.Column([
-                self.recharge_username_field,
-                self.recharge_password_field,
-                self.card_key_field,
-            ],
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-            spacing=20,
-            )
-        elif self.current_mode == "about":
-            content = self.create_about_content()
-        elif self.current_mode == "manual":
-            content = self.create_manual_content()
-        elif self.current_mode == "disclaimer":
-            content = self.create_disclaimer_content()
-        else:
-            content = ft.Container()
-        
-        # 为所有内容添加居中布局容器 - 基于整个窗口居中
-        return ft.Container(
-            content=ft.Column([
-                ft.Container(height=50),  # 顶部间距
-                content,
-                ft.Container(height=50),  # 底部间距
-            ],
-            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-            ),
-            alignment=ft.alignment.center,
-            expand=True,
-            width=540,  # 固定宽度确保居中
         )
      
-    def create_about_content(self):
-        """创建关于软件内容"""
-        return ft.Container(
-            content=ft.ListView([
-                # 关于软件部分
-                ft.Container(
-                    content=ft.Column([
-                        ft.Text(
-                            "WxQuantum 微信自动化助手",
-                            size=28,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.INDIGO_800,
-                            font_family="AlimamaFont",
-                            text_align=ft.TextAlign.CENTER,
-                        ),
-                        ft.Container(height=20),
-                        ft.Text(
-                            "版本信息",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.INDIGO_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "• 当前版本：v1.0.0\n• 发布日期：2024年1月\n• 开发团队：WxQuantum Team",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "软件简介",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.INDIGO_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "WxQuantum是一款专业的微信自动化助手工具，致力于为用户提供高效、安全、便捷的微信自动化解决方案。\n\n主要功能包括：\n• 智能消息处理\n• 自动化操作流程\n• 数据统计分析\n• 多账号管理\n• 安全防护机制",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "技术特色",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.INDIGO_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "• 基于Python开发，性能稳定可靠\n• 采用Flet框架，界面美观现代\n• 支持多种操作系统\n• 模块化设计，易于扩展\n• 完善的错误处理机制",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                    ],
-                    horizontal_alignment=ft.CrossAxisAlignment.START,
-                    spacing=10,
-                    ),
-                    padding=ft.padding.all(20),
-                    bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.BLUE),
-                    border_radius=15,
-                    border=ft.border.all(1, ft.Colors.BLUE_200),
-                    margin=ft.margin.only(bottom=20),
-                ),
-                
-                # 使用说明部分
-                ft.Container(
-                    content=ft.Column([
-                        ft.Text(
-                            "使用说明",
-                            size=24,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.GREEN_800,
-                            font_family="AlimamaFont",
-                            text_align=ft.TextAlign.CENTER,
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "快速开始",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.GREEN_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "1. 注册账号：首次使用请先注册账号\n2. 登录系统：使用注册的用户名和密码登录\n3. 充值激活：购买卡密进行账号充值激活\n4. 开始使用：登录成功后即可使用各项功能",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "注意事项",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.GREEN_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "• 请确保网络连接稳定\n• 建议关闭杀毒软件的实时防护\n• 首次运行可能需要管理员权限\n• 请勿在虚拟机中运行本软件\n• 使用过程中请勿频繁切换账号",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "常见问题",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.GREEN_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "Q: 忘记密码怎么办？\nA: 请联系客服重置密码\n\nQ: 软件无法启动？\nA: 请检查系统兼容性和权限设置\n\nQ: 功能使用异常？\nA: 请确保微信版本兼容并重启软件",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                    ],
-                    horizontal_alignment=ft.CrossAxisAlignment.START,
-                    spacing=10,
-                    ),
-                    padding=ft.padding.all(20),
-                    bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.GREEN),
-                    border_radius=15,
-                    border=ft.border.all(1, ft.Colors.GREEN_200),
-                    margin=ft.margin.only(bottom=20),
-                ),
-                
-                # 免责声明部分
-                ft.Container(
-                    content=ft.Column([
-                        ft.Text(
-                            "免责声明",
-                            size=24,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.RED_800,
-                            font_family="AlimamaFont",
-                            text_align=ft.TextAlign.CENTER,
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "重要提醒",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.RED_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "本软件仅供学习和研究使用，请用户严格遵守相关法律法规。使用本软件所产生的一切后果由用户自行承担，开发者不承担任何责任。",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "使用条款",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.RED_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "1. 用户应合法合规使用本软件\n2. 禁止用于任何违法违规活动\n3. 禁止恶意传播或商业盗用\n4. 使用过程中产生的风险自负\n5. 开发者保留最终解释权",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Container(height=15),
-                        ft.Text(
-                            "风险提示",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.RED_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "• 使用自动化工具存在账号风险\n• 请谨慎评估使用场景和频率\n• 建议使用小号进行测试\n• 如遇封号等问题概不负责\n• 请定期备份重要数据",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                    ],
-                    horizontal_alignment=ft.CrossAxisAlignment.START,
-                    spacing=10,
-                    ),
-                    padding=ft.padding.all(20),
-                    bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.RED),
-                    border_radius=15,
-                    border=ft.border.all(1, ft.Colors.RED_200),
-                    margin=ft.margin.only(bottom=20),
-                ),
-                
-                # 联系我们部分
-                ft.Container(
-                    content=ft.Column([
-                        ft.Text(
-                            "联系我们",
-                            size=18,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.INDIGO_600,
-                            font_family="SourceHanFont",
-                        ),
-                        ft.Text(
-                            "如有任何问题或建议，请通过以下方式联系我们：\n• 邮箱：support@wxquantum.com\n• 官网：www.wxquantum.com\n• QQ群：123456789",
-                            size=14,
-                            color=ft.Colors.GREY_700,
-                            font_family="SourceHanFont",
-                        ),
-                    ],
-                    horizontal_alignment=ft.CrossAxisAlignment.START,
-                    spacing=10,
-                    ),
-                    padding=ft.padding.all(20),
-                    bgcolor=ft.Colors.with_opacity(0.05, ft.Colors.PURPLE),
-                    border_radius=15,
-                    border=ft.border.all(1, ft.Colors.PURPLE_200),
-                ),
-            ],
-            expand=True,
-            auto_scroll=False,
-            spacing=0,
-            ),
-            expand=True,
-        )
-    
-    def create_manual_content(self):
-        """创建使用说明内容"""
-        return ft.Column([
-            ft.Container(
-                content=ft.Column([
-                    ft.Text(
-                        "使用说明",
-                        size=22,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.INDIGO_800,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Container(height=15),
-                    ft.Text(
-                        "操作指南",
-                        size=16,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.INDIGO_700,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Text(
-                        "1. 新用户请先点击'注册'创建账户\n2. 已有账户用户可直接登录\n3. 充值功能支持卡密充值方式\n4. 请确保微信已正确安装并可正常使用",
-                        size=14,
-                        color=ft.Colors.GREY_600,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Container(height=15),
-                    ft.Text(
-                        "注意事项",
-                        size=16,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.ORANGE_700,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Text(
-                        "• 请勿在公共网络环境下使用\n• 定期更新软件版本以获得最佳体验\n• 如遇问题请及时联系技术支持\n• 建议在使用前关闭杀毒软件的实时防护",
-                        size=14,
-                        color=ft.Colors.GREY_600,
-                        font_family="SourceHanFont",
-                    ),
-                ],
-                horizontal_alignment=ft.CrossAxisAlignment.START,
-                spacing=8,
-                ),
-                bgcolor=ft.Colors.WHITE,
-                border_radius=15,
-                padding=ft.padding.all(25),
-                shadow=ft.BoxShadow(
-                    spread_radius=1,
-                    blur_radius=10,
-                    color=ft.Colors.with_opacity(0.1, ft.Colors.BLACK),
-                ),
-            )
-        ],
-        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-        )
-    
-    def create_disclaimer_content(self):
-        """创建免责声明内容"""
-        return ft.Column([
-            ft.Container(
-                content=ft.Column([
-                    ft.Text(
-                        "免责声明",
-                        size=22,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.RED_800,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Container(height=15),
-                    ft.Text(
-                        "重要提示",
-                        size=16,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.RED_700,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Text(
-                        "本软件仅供学习和研究使用，不得用于任何商业用途或非法活动。使用本软件所产生的一切风险和后果，均由用户自行承担，开发团队不承担任何责任。",
-                        size=14,
-                        color=ft.Colors.GREY_700,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Container(height=15),
-                    ft.Text(
-                        "法律条款",
-                        size=16,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.RED_700,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Text(
-                        "• 严禁逆向工程、反编译或破解本软件\n• 严禁将本软件用于任何违法违规活动\n• 违反上述条款者，我们将保留追究法律责任的权利\n• 本软件的最终解释权归开发团队所有",
-                        size=14,
-                        color=ft.Colors.GREY_700,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Container(height=15),
-                    ft.Text(
-                        "风险提示",
-                        size=16,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.ORANGE_700,
-                        font_family="SourceHanFont",
-                    ),
-                    ft.Text(
-                        "• 使用本软件可能存在账号安全风险\n• 请确保在安全的网络环境下使用\n• 建议定期备份重要数据\n• 如发现异常情况请立即停止使用",
-                        size=14,
-                        color=ft.Colors.GREY_700,
-                        font_family="SourceHanFont",
-                    ),
-                ],
-                horizontal_alignment=ft.CrossAxisAlignment.START,
-                spacing=8,
-                ),
-                bgcolor=ft.Colors.WHITE,
-                border_radius=15,
-                padding=ft.padding.all(25),
-                shadow=ft.BoxShadow(
-                    spread_radius=1,
-                    blur_radius=10,
-                    color=ft.Colors.with_opacity(0.1, ft.Colors.BLACK),
-                ),
-            )
-        ],
-        horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-        )
-
     def get_action_area(self):
         """获取操作按钮区域"""
+        self.action_button_text = ft.Text(
+            self.get_button_text(),
+            size=16,
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.WHITE,
+            font_family="SourceHanFont",
+        )
+        self.action_button = ft.Container(
+            content=self.action_button_text,
+            width=280,
+            height=50,
+            border_radius=25,
+            alignment=ft.alignment.center,
+            on_click=self.handle_action,
+        )
+        self.style_action_button()
+        
         return ft.Column([
-            ft.Container(
-                content=ft.Text(
-                    self.get_button_text(),
-                    size=16,
-                    weight=ft.FontWeight.BOLD,
-                    color=ft.Colors.WHITE,
-                    font_family="SourceHanFont",
-                ),
-                width=280,
-                height=50,
-                bgcolor=self.get_button_color(),
-                border_radius=25,
-                alignment=ft.alignment.center,
-                shadow=ft.BoxShadow(
-                    spread_radius=2,
-                    blur_radius=10,
-                    color=ft.Colors.with_opacity(0.3, self.get_button_color()),
-                ),
-                gradient=ft.LinearGradient(
-                    begin=ft.alignment.top_left,
-                    end=ft.alignment.bottom_right,
-                    colors=[
-                        self.get_button_color(),
-                        ft.Colors.with_opacity(0.8, self.get_button_color()),
-                    ],
-                ),
-                on_click=self.handle_action,
-            ),
+            self.action_button,
             ft.Container(
                 content=self.status_text,
                 alignment=ft.alignment.center,
@@ -1172,129 +861,480 @@ class LoginPage:
         horizontal_alignment=ft.CrossAxisAlignment.CENTER,
         )
     
+    def style_action_button(self, changed=None):
+        """根据当前模式设置操作按钮的文本和颜色"""
+        patch(self.action_button_text, changed, value=self.get_button_text())
+        
+        color = self.get_button_color()
+        if self.action_button.bgcolor == color:
+            return
+        patch(
+            self.action_button,
+            changed,
+            bgcolor=color,
+            shadow=ft.BoxShadow(
+                spread_radius=2,
+                blur_radius=10,
+                color=ft.Colors.with_opacity(0.3, color),
+            ),
+            gradient=ft.LinearGradient(
+                begin=ft.alignment.top_left,
+                end=ft.alignment.bottom_right,
+                colors=[
+                    color,
+                    ft.Colors.with_opacity(0.8, color),
+                ],
+            ),
+        )
+    
     def update_ui_elements(self):
         """更新UI元素"""
-        # 重新构建UI以更新所有元素
-        self.build_ui()
-        self.page.update()
+        changed = self.reconcile()
+        if changed:
+            self.updater.request(*changed)
+            self.updater.flush()
     
-    def handle_action(self, e):
-        """处理操作"""
-        if self.current_mode == "login":
-            self.handle_login()
-        elif self.current_mode == "register":
-            self.handle_register()
+    def set_status(self, message, color=ft.Colors.BLUE_600, progress=False):
+        """设置状态文本（合并到下一帧同步），progress 为 True 时执行期间会追加已用时间"""
+        self.progress_message = (message, color) if progress else None
+        self.status_text.value = message
+        self.status_text.color = color
+        self.updater.request(self.status_text)
+    
+    def get_session_store(self):
+        """获取本地会话缓存"""
+        if self.session_store is None:
+            from session_store import SessionStore
+            self.session_store = SessionStore()
+        return self.session_store
+    
+    def resume_session(self):
+        """离线校验上次保存的会话，有效则直接登录，再由后台向服务器复核"""
+        try:
+            session = self.get_session_store().load()
+        except Exception as e:
+            logger.warning("会话恢复失败: %s", e)
+            return False
+        if not session:
+            return False
+        
+        self.username_field.value = session["username"]
+        self.updater.request(self.username_field)
+        self.on_logged_in(session, resumed=True)
+        self.page.run_task(self.verify_session, session)
+        return True
+    
+    async def verify_session(self, session):
+        """后台复核会话，服务器判定失效时强制退出登录；网络异常时保留离线登录状态"""
+        from backend_client import BackendError
+        
+        try:
+            await self.get_backend().verify_session(session["username"], session["token"])
+        except BackendError as e:
+            if e.status in (401, 403) and self.session is session:
+                self.logout_local()
+                self.set_status("登录已失效，请重新登录", ft.Colors.RED_600)
+            else:
+                logger.warning("会话复核失败，保留离线登录: %s", e.message)
+    
+    def on_logged_in(self, session, resumed=False):
+        """登录成功（主界面完成后在这里切换过去）"""
+        self.session = session
+        if resumed:
+            self.set_status(f"欢迎回来，{session['username']}（已自动登录）", ft.Colors.GREEN_600)
+        # 微信和 API 服务只在登录后启动，导入和启动都在后台工作池中完成
+        self.services_task = self.workers.submit("background", "start-services", self.start_background_services, session)
+    
+    def logout_local(self):
+        """本地退出登录：清除保存的会话，停止仍以该会话授权的 API 服务和微信监管"""
+        self.get_session_store().clear()
+        self.session = None
+        task, self.services_task = self.services_task, None
+        if task:
+            task.cancel()
+        
+        def stop():
+            # 等服务启动任务在检查点退出后再停止，避免停止之后又被启动
+            if task:
+                try:
+                    task.future.exception(timeout=self.config_manager.get_float("shutdown_timeout", 3.0))
+                except Exception:
+                    pass
+            self.stop_services()
+            self.supervisor = None
+        
+        self.workers.submit("background", "stop-services", stop)
+    
+    def start_background_services(self, session):
+        token = current_token()
+        self.start_wechat()
+        if not token.cancelled:
+            self.start_api_host(session)
+    
+    def get_supervisor(self):
+        """获取进程监管器"""
+        if self.supervisor is None:
+            from process_supervisor import ProcessSupervisor
+            self.supervisor = ProcessSupervisor()
+            self.supervisor.subscribe(self.on_wechat_event)
+        return self.supervisor
+    
+    def start_wechat(self):
+        """启动所选的微信并保持运行（已在运行时直接接管）；配置了多个账号时按账号多开"""
+        if not self.config_manager.get_bool("wechat_supervise", True):
+            return
+        if any(p.get("enabled", True) for p in self.config_manager.get_profiles()):
+            self.launch_profiles()
+            return
+        wechat_path = self.config_manager.get_wechat_path()
+        if not wechat_path:
+            return
+        
+        try:
+            self.get_supervisor()
+            current = self.supervisor.get("wechat")
+            if current and current.command[0] == wechat_path:
+                return
+            if current:
+                self.supervisor.remove("wechat", kill=False)
+            self.supervisor.add(
+                "wechat",
+                [wechat_path],
+                cwd=os.path.dirname(wechat_path) or None,
+                adopt_existing=True,
+                max_restarts=self.config_manager.get_int("wechat_max_restarts", 5),
+            )
+        except Exception as e:
+            logger.error("微信启动失败: %s", e)
+    
+    def launch_profiles(self):
+        """按账号配置多开微信，逐个显示启动结果"""
+        try:
+            from multi_launcher import MultiLauncher
+            launcher = MultiLauncher(
+                self.config_manager,
+                self.detector,
+                self.get_supervisor(),
+                concurrency=self.config_manager.get_int("launch_concurrency", 2),
+                stagger=self.config_manager.get_float("launch_stagger", 1.0),
+                ready_timeout=self.config_manager.get_float("launch_ready_timeout", 30.0),
+                supervise_options={"max_restarts": self.config_manager.get_int("wechat_max_restarts", 5)},
+            )
+            done = []
+            
+            def on_result(result):
+                done.append(result)
+                if result.ok:
+                    logger.info("微信 %s 已就绪，耗时 %.1f 秒", result.name, result.launch_time)
+                else:
+                    logger.warning("微信 %s 启动失败: %s", result.name, result.error)
+                self.set_status(f"正在多开微信：已完成 {len(done)} 个", ft.Colors.BLUE_600)
+            
+            launcher.on_result = on_result
+            report = launcher.launch_all()
+            self.set_status(report.summary(), ft.Colors.GREEN_600 if not report.failed else ft.Colors.ORANGE_600)
+        except Exception as e:
+            logger.error("微信多开失败: %s", e)
+    
+    def on_wechat_event(self, supervised, event):
+        """微信进程状态变化（在监管线程中回调）"""
+        if event == "exited":
+            self.set_status(f"微信 {supervised.name} 已退出，正在重启（第 {supervised.restarts + 1} 次）", ft.Colors.ORANGE_600)
+        elif event == "hung":
+            self.set_status(f"微信 {supervised.name} 无响应，正在重启", ft.Colors.ORANGE_600)
+        elif event == "failed":
+            self.set_status(f"微信 {supervised.name} 多次启动失败：{supervised.last_error}", ft.Colors.RED_600)
+    
+    def start_api_host(self, session):
+        """启动进程内 API 服务"""
+        if not self.config_manager.get_bool("api_enabled", True):
+            return
+        context = {"username": session["username"], "wechat_path": self.config_manager.get_wechat_path()}
+        if self.api_host and self.api_host.running:
+            self.api_host.context.update(context)
+            return
+        
+        try:
+            from api_host import DEFAULT_PORT, ApiHost
+            self.api_host = ApiHost(
+                port=self.config_manager.get_int("api_port", DEFAULT_PORT),
+                workers=self.config_manager.get_int("api_workers", 4),
+                queue_size=self.config_manager.get_int("api_queue_size", 64),
+                context=context,
+            )
+            self.api_host.start()
+            logger.info("API 服务已启动: http://%s:%s", self.api_host.host, self.api_host.port)
+        except Exception as e:
+            logger.error("API 服务启动失败: %s", e)
+    
+    def shutdown(self):
+        """停止后台任务和服务：取消所有任务，在期限内等待它们结束，再停止服务并保存配置"""
+        self.executor.cancel_all()
+        self.overlays.cancel_all()
+        self.detector.close()
+        metrics.stop_server()
+        # 未结束的任务由工作池记录到日志
+        self.workers.shutdown(timeout=self.config_manager.get_float("shutdown_timeout", 3.0))
+        if self.detection_cache:
+            self.detection_cache.flush()
+        if self.recorder:
+            self.recorder.close()
+        tracer.save()
+    
+    def stop_services(self):
+        """停止 API 服务和微信监管（后台任务排空之后执行）"""
+        if self.api_host:
+            self.api_host.stop()
+        if self.supervisor:
+            # 停止监管，微信保持运行
+            self.supervisor.stop(kill=False)
+    
+    def on_keyboard(self, e: ft.KeyboardEvent):
+        """Ctrl+Shift+D 打开/关闭运行诊断面板（首次打开时启用运行指标）"""
+        if e.ctrl and e.shift and e.key.upper() == "D":
+            if not metrics.enabled:
+                self.enable_metrics()
+            self.switch_mode("login" if self.current_mode == "diagnostics" else "diagnostics")
+    
+    def enable_metrics(self):
+        """启用运行指标，注册界面相关的仪表并启动本地指标端点（metrics_port 为 0 时不启动）"""
+        metrics.enable()
+        metrics.gauge("ui_controls", lambda: count_controls(self.main_container), help="界面控件树的控件数")
+        metrics.gauge("overlay_controls", self.overlays.count, help="page.overlay 中的浮层控件数")
+        metrics.gauge("worker_tasks", self.workers.task_counts, help="后台工作池中排队和执行中的任务数")
+        port = self.config_manager.get_int("metrics_port", DEFAULT_METRICS_PORT)
+        if not port or metrics.server is not None:
+            return
+        try:
+            metrics.start_server(port=port)
+            self.metrics_endpoint = f"http://127.0.0.1:{port}/metrics"
+            logger.info("运行指标端点: %s", self.metrics_endpoint)
+        except OSError as e:
+            logger.warning("运行指标端点启动失败: %s", e)
+    
+    def on_window_event(self, e):
+        """窗口关闭时优雅停止后台服务"""
+        if e.type == ft.WindowEventType.CLOSE:
+            self.shutdown()
+            self.page.window.destroy()
+    
+    def get_backend(self):
+        """获取后端客户端（首次使用时创建，整个程序共用一个连接池）"""
+        if self.backend is None:
+            from backend_client import get_client
+            self.backend = get_client(self.config_manager.get_str("backend_url") or None)
+        return self.backend
+    
+    def show_progress(self, action, elapsed):
+        """操作执行期间每秒刷新一次已用时间"""
+        if self.progress_message:
+            message, color = self.progress_message
+            self.status_text.value = f"{message}（{int(elapsed)}秒）"
+            self.status_text.color = color
+            self.updater.request(self.status_text)
+    
+    def show_timeout(self, action, timeout):
+        """操作超时"""
+        label = self.ACTION_LABELS.get(action, "操作")
+        self.set_status(f"{label}超时（{timeout:.0f}秒），请检查网络后重试", ft.Colors.RED_600)
+    
+    def show_error(self, action, error):
+        """操作执行出错（详细信息已记录到日志）"""
+        label = self.ACTION_LABELS.get(action, "操作")
+        self.set_status(f"{label}失败: {error}", ft.Colors.RED_600)
+    
+    def get_trace_fields(self):
+        """会话录制和回放使用的输入字段"""
+        return {
+            "username": self.username_field,
+            "password": self.password_field,
+            "confirm_password": self.confirm_password_field,
+            "recharge_username": self.recharge_username_field,
+            "recharge_password": self.recharge_password_field,
+            "card_key": self.card_key_field,
+        }
+    
+    def get_action_payload(self, mode):
+        """操作的参数，用于合并重复提交"""
+        if mode == "recharge":
+            fields = (self.recharge_username_field, self.recharge_password_field, self.card_key_field)
+        elif mode == "register":
+            fields = (self.username_field, self.password_field, self.confirm_password_field)
         else:
-            self.handle_recharge()
+            fields = (self.username_field, self.password_field, self.wechat_path_field)
+        return [field.value or "" for field in fields]
+    
+    def handle_action(self, e):
+        """处理操作 - 作为异步任务在页面事件循环中执行，请求期间界面保持响应
+        
+        双击等重复提交会合并为同一个任务。返回任务的 Future。
+        """
+        mode = self.current_mode
+        handlers = {
+            "login": self.handle_login,
+            "register": self.handle_register,
+            "recharge": self.handle_recharge,
+        }
+        timeout = self.ACTION_TIMEOUTS[mode]
+        if mode == "recharge":
+            # 批量充值按卡密数量放宽超时，与批量兑换使用同样的拆分和去重规则
+            from card_batch import parse_card_keys
+            count = len(parse_card_keys(self.card_key_field.value or "")[0])
+            timeout *= max(1, -(-count // self.CARD_BATCH_CONCURRENCY))
+        if self.recorder:
+            self.recorder.record("action", mode=mode)
+        return self.executor.submit(mode, handlers[mode], self.get_action_payload(mode), timeout)
     
-    def handle_login(self):
+    @traced(cat="action")
+    async def handle_login(self):
         """处理登录"""
+        from backend_client import BackendError
+        
         username = self.username_field.value
         password = self.password_field.value
         wechat_path = self.wechat_path_field.value
         
         if not username or not password:
-            self.status_text.value = "请输入用户名和密码"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+            self.set_status("请输入用户名和密码", ft.Colors.RED_600)
             return
         
         if not wechat_path:
-            self.status_text.value = "请选择微信路径"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+            self.set_status("请选择微信路径", ft.Colors.RED_600)
             return
         
         # 验证微信路径
-        if not self.wechat_detector.validate_path(wechat_path):
-            self.status_text.value = "微信路径无效，请重新选择"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+        if not self.detector.validate_path(wechat_path):
+            self.set_status("微信路径无效，请重新选择", ft.Colors.RED_600)
             return
         
-        self.status_text.value = "正在登录..."
-        self.status_text.color = ft.Colors.BLUE_600
-        self.page.update()
+        self.set_status("正在登录...", ft.Colors.BLUE_600, progress=True)
         
         # 保存微信路径到配置
         self.config_manager.set_wechat_path(wechat_path)
         
-        # 这里添加实际的登录逻辑
-        # 模拟登录成功
-        self.status_text.value = "登录成功！"
-        self.status_text.color = ft.Colors.GREEN_600
-        self.page.update()
+        try:
+            result = await self.get_backend().login(username, password)
+        except BackendError as e:
+            self.set_status(f"登录失败：{e.message}", ft.Colors.RED_600)
+            return
+        
+        # 保存会话，下次启动可直接登录
+        session = {"username": username, "token": result.get("token")}
+        if session["token"]:
+            try:
+                task = self.workers.submit("io", "session-save", self.get_session_store().save, username, session["token"], result.get("token_expires_at"))
+                await asyncio.wrap_future(task.future)
+            except Exception as e:
+                # 会话只用于下次免登录，保存失败不影响本次登录
+                logger.warning("会话保存失败: %s", e)
+        self.on_logged_in(session)
+        self.set_status(result.get("message") or "登录成功！", ft.Colors.GREEN_600)
     
-    def handle_register(self):
+    @traced(cat="action")
+    async def handle_register(self):
         """处理注册"""
+        from backend_client import BackendError
+        
         username = self.username_field.value
         password = self.password_field.value
         confirm_password = self.confirm_password_field.value
         
         if not username or not password:
-            self.status_text.value = "请输入用户名和密码"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+            self.set_status("请输入用户名和密码", ft.Colors.RED_600)
             return
         
         if not confirm_password:
-            self.status_text.value = "请确认密码"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+            self.set_status("请确认密码", ft.Colors.RED_600)
             return
         
         if password != confirm_password:
-            self.status_text.value = "两次输入的密码不一致"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+            self.set_status("两次输入的密码不一致", ft.Colors.RED_600)
             return
         
-        self.status_text.value = "正在注册..."
-        self.status_text.color = ft.Colors.BLUE_600
-        self.page.update()
+        self.set_status("正在注册...", ft.Colors.BLUE_600, progress=True)
         
-        # 这里添加实际的注册逻辑
-        # 模拟注册成功
-        self.status_text.value = "注册成功！"
-        self.status_text.color = ft.Colors.GREEN_600
-        self.page.update()
+        try:
+            result = await self.get_backend().register(username, password)
+        except BackendError as e:
+            self.set_status(f"注册失败：{e.message}", ft.Colors.RED_600)
+            return
+        self.set_status(result.get("message") or "注册成功！", ft.Colors.GREEN_600)
     
-    def handle_recharge(self):
-        """处理充值"""
+    @traced(cat="action")
+    async def handle_recharge(self):
+        """处理充值 - 输入多张卡密时批量兑换"""
+        from backend_client import BackendError
+        from card_batch import parse_card_keys
+        
         username = self.recharge_username_field.value
         password = self.recharge_password_field.value
-        card_key = self.card_key_field.value
         
         if not username or not password:
-            self.status_text.value = "请输入账号和密码"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+            self.set_status("请输入账号和密码", ft.Colors.RED_600)
             return
         
-        if not card_key:
-            self.status_text.value = "请输入卡密"
-            self.status_text.color = ft.Colors.RED_600
-            self.page.update()
+        if not (self.card_key_field.value or "").strip():
+            self.set_status("请输入卡密", ft.Colors.RED_600)
             return
         
-        self.status_text.value = "正在验证账号..."
-        self.status_text.color = ft.Colors.ORANGE_600
-        self.page.update()
+        # 本地预校验：无效字符和重复
+        keys, rejected = parse_card_keys(self.card_key_field.value)
+        if not keys:
+            token, reason = rejected[0]
+            self.set_status(f"卡密{reason}：{token}", ft.Colors.RED_600)
+            return
         
-        # 这里添加实际的账号验证逻辑
-        # 模拟验证成功后进行充值
-        self.status_text.value = "正在充值..."
-        self.page.update()
+        self.set_status("正在验证账号...", ft.Colors.ORANGE_600, progress=True)
+        
+        try:
+            await self.get_backend().verify_account(username, password)
+            if len(keys) == 1 and not rejected:
+                self.set_status("正在充值...", ft.Colors.ORANGE_600, progress=True)
+                result = await self.get_backend().recharge(username, keys[0])
+            else:
+                await self.recharge_batch(username, keys, rejected)
+                return
+        except BackendError as e:
+            self.set_status(f"充值失败：{e.message}", ft.Colors.RED_600)
+            return
+        self.set_status(result.get("message") or "充值成功！", ft.Colors.GREEN_600)
+    
+    async def recharge_batch(self, username, keys, rejected):
+        """批量兑换卡密，结果实时显示在状态栏"""
+        from card_batch import CardBatch
+        
+        def on_result(result, batch):
+            failed = len(batch.results) - batch.succeeded
+            self.set_status(
+                f"批量充值 {len(batch.results)}/{len(keys)}：成功 {batch.succeeded}，失败 {failed}",
+                ft.Colors.ORANGE_600,
+                progress=True,
+            )
+            if not result.ok:
+                logger.warning("卡密兑换失败 %s: %s", result.key, result.message)
+        
+        batch = CardBatch(self.get_backend(), username, self.CARD_BATCH_CONCURRENCY, on_result)
+        self.set_status(f"批量充值 0/{len(keys)}", ft.Colors.ORANGE_600, progress=True)
+        try:
+            await batch.run(keys)
+        finally:
+            # 可重试的卡密留在输入框中，其余的已处理完
+            self.card_key_field.value = "\n".join(batch.retryable_keys())
+            self.updater.request(self.card_key_field)
         
-        # 这里添加实际的充值逻辑
-        # 模拟充值成功
-        self.status_text.value = "充值成功！"
-        self.status_text.color = ft.Colors.GREEN_600
-        self.page.update()
+        summary = batch.summary()
+        if rejected:
+            summary += f"；本地拒绝 {len(rejected)} 张"
+            for token, reason in rejected:
+                logger.warning("卡密被拒绝 %s: %s", token, reason)
+        self.set_status(summary, ft.Colors.GREEN_600 if batch.succeeded == len(keys) and not rejected else ft.Colors.ORANGE_600)
 
 def main(page: ft.Page):
-    """主函数"""
+    """主函数（每个窗口会话调用一次，日志和追踪由启动入口初始化）"""
     login_page = LoginPage(page)
 
 if __name__ == "__main__":
+    # 直接运行本模块时的启动入口，与 main.py 相同只初始化一次
+    start_from_env()
+    setup_logging()
     ft.app(target=main, port=8550)
\ No newline at end of file
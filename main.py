@@ -5,6 +5,8 @@ WxQuantum-exe 主程序入口
 微信自动化一体化EXE解决方案
 """
 
+import argparse
+import logging
 import sys
 import os
 from pathlib import Path
@@ -12,25 +14,63 @@ from pathlib import Path
 # 添加当前目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent))
 
+logger = logging.getLogger("wxquantum")
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="WxQuantum 微信自动化助手")
+    parser.add_argument("--config", help="配置文件路径（默认为程序目录下的 config.json）")
+    parser.add_argument("--profile-startup", action="store_true", help="打印启动耗时报告（模块导入耗时和首帧时间）")
+    parser.add_argument("--record-session", metavar="PATH", help="把界面操作录制到文件，供 benchmarks/replay_session.py 回放")
+    parser.add_argument("--trace", metavar="PATH", help="记录启动和操作的耗时区间，退出时导出为 Chrome trace JSON")
+    parser.add_argument("--metrics", action="store_true", help="启用运行指标（诊断面板 Ctrl+Shift+D，端点 http://127.0.0.1:8701/metrics）")
+    args, _ = parser.parse_known_args()
+    return args
+
 def main():
     """主函数"""
+    args = parse_args()
+    if args.config:
+        # 配置文件位置也可以通过 WXQ_CONFIG 环境变量指定
+        os.environ["WXQ_CONFIG"] = os.path.abspath(args.config)
+    if args.metrics:
+        os.environ["WXQ_METRICS"] = "1"
+    if args.trace:
+        os.environ["WXQ_TRACE"] = os.path.abspath(args.trace)
+    if args.record_session:
+        os.environ["WXQ_TRACE_SESSION"] = os.path.abspath(args.record_session)
+    
+    # 启动分析需要在导入 flet 和登录模块之前开启
+    from startup_profiler import PROFILE_ENV, is_enabled_by_env, profiler
+    if args.profile_startup:
+        os.environ.setdefault(PROFILE_ENV, "1")
+    if is_enabled_by_env():
+        profiler.start()
+    
+    from tracing import start_from_env
+    start_from_env()
+    
+    # 尽早配置日志，后续模块的错误都进入日志文件和界面日志控制台
+    from app_logging import setup_logging
+    setup_logging()
+    
     try:
         # 导入登录模块
         from login import main as login_main
         import flet as ft
         
-        print("启动 WxQuantum...")
-        print("正在加载登录界面...")
+        logger.info("启动 WxQuantum...")
+        logger.info("正在加载登录界面...")
         
         # 启动登录界面
         ft.app(target=login_main)
         
     except ImportError as e:
-        print(f"导入错误: {e}")
-        print("请确保已安装所有依赖: pip install -r requirements.txt")
+        logger.error("导入错误: %s", e)
+        logger.error("请确保已安装所有依赖: pip install -r requirements.txt")
         sys.exit(1)
     except Exception as e:
-        print(f"启动失败: {e}")
+        logger.exception("启动失败: %s", e)
         sys.exit(1)
 
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+import os
+import re
+import sys
+import threading
+import time
+
+# 设置为 1 时启用运行指标
+METRICS_ENV = "WXQ_METRICS"
+
+DEFAULT_METRICS_PORT = 8701
+
+
+class _NullTimer:
+    """未启用指标时的空计时器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Metrics:
+    """运行指标
+
+    计数器（inc）、耗时统计（observe，记录次数、总和与最大值）和读取时才计算的仪表（gauge），
+    可以带标签。未启用时 inc/observe 直接返回，timer 返回共享的空计时器；
+    热点路径在调用前先判断 metrics.enabled，连参数都不用构造。
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.time()
+        self.counters = {}   # (名称, 标签) -> 数值
+        self.summaries = {}  # (名称, 标签) -> [次数, 总和, 最大值]
+        self.values = {}     # (名称, 标签) -> 数值，由 set 写入
+        self.gauges = {}     # 名称 -> 读取时调用的函数，返回数值或 {标签元组: 数值}
+        self.help = {}
+        self.server = None
+        self._lock = threading.Lock()
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            self.started_at = time.time()
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self.summaries.get(key)
+            if summary is None:
+                self.summaries[key] = [1, value, value]
+            else:
+                summary[0] += 1
+                summary[1] += value
+                if value > summary[2]:
+                    summary[2] = value
+
+    def set(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.values[(name, tuple(sorted(labels.items())))] = value
+
+    def timer(self, name, **labels):
+        """计时上下文管理器，结束时 observe 耗时（秒）"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def gauge(self, name, func, help=None):
+        """注册读取时计算的仪表（注册本身不产生开销，可在导入时调用）"""
+        self.gauges[name] = func
+        if help:
+            self.help[name] = help
+
+    def read_gauges(self):
+        """计算所有仪表的当前值，返回 {(名称, 标签): 数值}"""
+        result = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                value = func()
+            except Exception:
+                continue
+            if isinstance(value, dict):
+                for labels, item in value.items():
+                    result[(name, tuple(labels))] = item
+            elif value is not None:
+                result[(name, ())] = value
+        return result
+
+    def snapshot(self):
+        """当前所有指标的副本"""
+        with self._lock:
+            counters = dict(self.counters)
+            summaries = {key: tuple(value) for key, value in self.summaries.items()}
+            values = dict(self.values)
+        values.update(self.read_gauges())
+        return {"time": time.time(), "counters": counters, "summaries": summaries, "gauges": values}
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.summaries.clear()
+            self.values.clear()
+
+    def render_prometheus(self, prefix="wxq_"):
+        """Prometheus 文本格式"""
+        snapshot = self.snapshot()
+        lines = []
+        described = set()
+
+        def header(name, kind):
+            if name in described:
+                return
+            described.add(name)
+            if name in self.help:
+                lines.append(f"# HELP {prefix}{name} {self.help[name]}")
+            lines.append(f"# TYPE {prefix}{name} {kind}")
+
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            header(name, "counter")
+            lines.append(f"{prefix}{name}{format_labels(labels)} {value}")
+        for (name, labels), (count, total, maximum) in sorted(snapshot["summaries"].items()):
+            header(name, "summary")
+            lines.append(f"{prefix}{name}_count{format_labels(labels)} {count}")
+            lines.append(f"{prefix}{name}_sum{format_labels(labels)} {total:.6f}")
+            lines.append(f"{prefix}{name}_max{format_labels(labels)} {maximum:.6f}")
+        for (name, labels), value in sorted(snapshot["gauges"].items()):
+            header(name, "gauge")
+            lines.append(f"{prefix}{name}{format_labels(labels)} {value}")
+        lines.append(f"{prefix}uptime_seconds {time.time() - self.started_at:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def start_server(self, host="127.0.0.1", port=DEFAULT_METRICS_PORT):
+        """在后台线程中提供 http://host:port/metrics（Prometheus 文本格式）"""
+        if self.server is not None:
+            return self.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        return self.server
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    items = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        items.append(f'{key}="{value}"')
+    return "{" + ",".join(items) + "}"
+
+
+def caller_name(depth=2):
+    """调用方的 模块.函数 名，depth=2 表示调用 caller_name 的函数的调用方"""
+    frame = sys._getframe(depth)
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+_THREAD_SUFFIX = re.compile(r"(?:[-_]\d+)*(?:\s*\(.*\))?$")
+
+
+def thread_groups():
+    """按名称分组的存活线程数（去掉编号后缀，如 wechat-probe_0 → wechat-probe）"""
+    groups = {}
+    for thread in threading.enumerate():
+        key = (("group", _THREAD_SUFFIX.sub("", thread.name) or thread.name),)
+        groups[key] = groups.get(key, 0) + 1
+    return groups
+
+
+def count_controls(control):
+    """控件树中的控件数量"""
+    if control is None:
+        return 0
+    count = 0
+    stack = [control]
+    while stack:
+        current = stack.pop()
+        count += 1
+        try:
+            stack.extend(child for child in current._get_children() if child is not None)
+        except Exception:
+            pass
+    return count
+
+
+def is_enabled_by_env():
+    """是否通过环境变量启用了运行指标"""
+    return os.environ.get(METRICS_ENV, "") not in ("", "0")
+
+
+metrics = Metrics(enabled=is_enabled_by_env())
+metrics.gauge("threads", thread_groups, help="存活线程数（按名称分组）")
+metrics.describe("ui_update_requests_total", "界面更新请求次数（按调用方）")
+metrics.describe("page_updates_total", "page.update 调用次数（按提交了变更的调用方）")
+metrics.describe("page_update_seconds", "每次 page.update 的耗时")
+metrics.describe("config_save_seconds", "配置文件写盘耗时")
+metrics.describe("detection_probe_seconds", "微信路径检测各探针耗时")
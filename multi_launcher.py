@@ -0,0 +1,362 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from process_supervisor import STATE_BACKOFF, STATE_FAILED, STATE_RUNNING, ProcessSupervisor
+
+logger = logging.getLogger(__name__)
+
+# 微信用命名互斥量保证单实例：新进程发现互斥量已存在时把启动请求交给已有实例后立即退出
+WECHAT_MUTEX_NAMES = (
+    "_WeChat_App_Instance_Identity_Mutex_Name",   # 微信 3.x（WeChat.exe）
+    "XWeChat_App_Instance_Identity_Mutex_Name",   # 微信 4.x（Weixin.exe）
+)
+WECHAT_PROCESS_NAMES = ("wechat.exe", "weixin.exe")
+
+
+def release_wechat_mutex(mutex_names=WECHAT_MUTEX_NAMES):
+    """关闭正在运行的微信进程持有的单实例互斥量，之后启动的微信不会再转交给已有实例
+
+    枚举系统句柄表，把微信进程中的 Mutant 句柄复制过来查询名称，名称匹配时用
+    DUPLICATE_CLOSE_SOURCE 在原进程中关闭。返回关闭的句柄数，非 Windows 平台返回 0。
+    """
+    if os.name != "nt":
+        return 0
+    import ctypes
+    from ctypes import wintypes
+
+    import psutil
+
+    pids = {
+        proc.pid for proc in psutil.process_iter(["name"])
+        if (proc.info.get("name") or "").lower() in WECHAT_PROCESS_NAMES
+    }
+    if not pids:
+        return 0
+
+    class HandleEntry(ctypes.Structure):  # SYSTEM_HANDLE_TABLE_ENTRY_INFO_EX
+        _fields_ = [
+            ("Object", ctypes.c_void_p),
+            ("UniqueProcessId", ctypes.c_size_t),
+            ("HandleValue", ctypes.c_size_t),
+            ("GrantedAccess", wintypes.ULONG),
+            ("CreatorBackTraceIndex", wintypes.USHORT),
+            ("ObjectTypeIndex", wintypes.USHORT),
+            ("HandleAttributes", wintypes.ULONG),
+            ("Reserved", wintypes.ULONG),
+        ]
+
+    class UnicodeString(ctypes.Structure):
+        _fields_ = [("Length", wintypes.USHORT), ("MaximumLength", wintypes.USHORT), ("Buffer", ctypes.c_void_p)]
+
+    SYSTEM_EXTENDED_HANDLE_INFORMATION = 64
+    OBJECT_NAME_INFORMATION = 1
+    OBJECT_TYPE_INFORMATION = 2
+    STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+    PROCESS_DUP_HANDLE = 0x0040
+    DUPLICATE_CLOSE_SOURCE = 0x1
+    DUPLICATE_SAME_ACCESS = 0x2
+
+    ntdll = ctypes.WinDLL("ntdll")
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    ntdll.NtQuerySystemInformation.restype = ctypes.c_ulong
+    ntdll.NtQueryObject.restype = ctypes.c_ulong
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    kernel32.DuplicateHandle.argtypes = [
+        wintypes.HANDLE, wintypes.HANDLE, wintypes.HANDLE, ctypes.POINTER(wintypes.HANDLE),
+        wintypes.DWORD, wintypes.BOOL, wintypes.DWORD,
+    ]
+
+    size = 1 << 20
+    while True:
+        buffer = ctypes.create_string_buffer(size)
+        needed = wintypes.ULONG()
+        status = ntdll.NtQuerySystemInformation(SYSTEM_EXTENDED_HANDLE_INFORMATION, buffer, size, ctypes.byref(needed))
+        if status != STATUS_INFO_LENGTH_MISMATCH:
+            break
+        size = max(size * 2, needed.value + (1 << 16))
+    if status != 0:
+        raise OSError(f"NtQuerySystemInformation 失败 (0x{status:08x})")
+    count = ctypes.c_size_t.from_buffer(buffer).value
+    entries = (HandleEntry * count).from_buffer(buffer, 2 * ctypes.sizeof(ctypes.c_size_t))
+
+    def query_string(handle, info_class):
+        info = ctypes.create_string_buffer(0x1000)
+        if ntdll.NtQueryObject(handle, info_class, info, len(info), None) != 0:
+            return ""
+        text = UnicodeString.from_buffer(info)
+        return ctypes.wstring_at(text.Buffer, text.Length // 2) if text.Buffer else ""
+
+    current = kernel32.GetCurrentProcess()
+    processes = {}
+    closed = 0
+    try:
+        for entry in entries:
+            pid = entry.UniqueProcessId
+            if pid not in pids:
+                continue
+            if pid not in processes:
+                processes[pid] = kernel32.OpenProcess(PROCESS_DUP_HANDLE, False, pid)
+            process = processes[pid]
+            if not process:
+                continue
+            duplicate = wintypes.HANDLE()
+            if not kernel32.DuplicateHandle(process, entry.HandleValue, current, ctypes.byref(duplicate), 0, False, DUPLICATE_SAME_ACCESS):
+                continue
+            try:
+                # 先查询类型，只对互斥量查询名称（对管道等句柄查询名称可能阻塞）
+                matched = query_string(duplicate, OBJECT_TYPE_INFORMATION) == "Mutant" and \
+                    query_string(duplicate, OBJECT_NAME_INFORMATION).endswith(tuple("\\" + name for name in mutex_names))
+            finally:
+                kernel32.CloseHandle(duplicate)
+            if matched and kernel32.DuplicateHandle(process, entry.HandleValue, None, None, 0, False, DUPLICATE_CLOSE_SOURCE):
+                closed += 1
+    finally:
+        for process in processes.values():
+            if process:
+                kernel32.CloseHandle(process)
+    return closed
+
+
+def default_ready_check(supervised, profile):
+    """默认的就绪判断：Windows 下进程树中出现可见窗口，其他平台进程保持运行 1 秒"""
+    if supervised.state != STATE_RUNNING or supervised.process is None:
+        return False
+    if os.name == "nt":
+        try:
+            import psutil
+            import win32gui
+            import win32process
+        except ImportError:
+            return time.monotonic() - supervised.started_at >= 1.0
+        try:
+            pids = {supervised.pid} | {child.pid for child in supervised.process.children(recursive=True)}
+        except psutil.Error:
+            return False
+        found = []
+
+        def check(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd) and win32process.GetWindowThreadProcessId(hwnd)[1] in pids:
+                found.append(hwnd)
+            return True
+
+        win32gui.EnumWindows(check, None)
+        return bool(found)
+    return time.monotonic() - supervised.started_at >= 1.0
+
+
+class LaunchResult:
+    """单个实例的启动结果"""
+
+    def __init__(self, name):
+        self.name = name
+        self.ok = False
+        self.error = None
+        self.pid = None
+        self.wait_time = 0.0     # 排队等待并发名额和错峰的时间
+        self.launch_time = 0.0   # 从启动进程到就绪的时间
+        self.attempts = 0        # 启动次数（新进程就绪前退出时会重新启动）
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "ok": self.ok,
+            "error": self.error,
+            "pid": self.pid,
+            "wait_time": self.wait_time,
+            "launch_time": self.launch_time,
+            "attempts": self.attempts,
+        }
+
+
+class MultiLauncher:
+    """多开启动器
+
+    按 ConfigManager 中保存的账号配置（profiles）启动多个微信实例。启动前用
+    WeChatPathDetector.validate_path 做预检；同时处于启动阶段的实例不超过 concurrency 个，
+    相邻两次启动至少间隔 stagger 秒，每个实例等到就绪（或超时）后才释放名额。
+    启动后的进程交给 ProcessSupervisor 继续监管。
+
+    微信是单实例程序：已有实例在运行时，新进程发现单实例互斥量后会把启动请求转交给已有实例并立即退出。
+    因此每次启动前先调用 release_instance_lock（默认为 release_wechat_mutex，关闭已有实例持有的互斥量），
+    解除和启动在锁内串行执行。两个实例启动时间太近时新进程仍可能在前一个实例创建互斥量之后才检查，
+    这种在就绪前就退出的实例会重新解除并启动，最多 instance_retries 次，仍然失败时停止监管并报告原因。
+
+    账号配置字段: name, wechat_path, args（可选，额外的命令行参数）, cwd（可选）, enabled（默认 True）
+    """
+
+    def __init__(self, config_manager, detector, supervisor=None, concurrency=2, stagger=1.0,
+                 ready_timeout=30.0, ready_check=default_ready_check, poll_interval=0.2, supervise_options=None,
+                 release_instance_lock=release_wechat_mutex, instance_retries=2):
+        self.config_manager = config_manager
+        self.detector = detector
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.concurrency = max(1, concurrency)
+        self.stagger = stagger
+        self.ready_timeout = ready_timeout
+        self.ready_check = ready_check
+        self.poll_interval = poll_interval
+        self.supervise_options = dict(supervise_options or {})
+        self.release_instance_lock = release_instance_lock
+        self.instance_retries = instance_retries
+        self.on_result = None  # 每个实例完成后回调 on_result(result)
+        self._slots = threading.Semaphore(self.concurrency)
+        self._stagger_lock = threading.Lock()
+        self._launch_lock = threading.Lock()
+        self._next_start = 0.0
+
+    def get_launch_profiles(self, names=None):
+        """需要启动的账号配置"""
+        profiles = [p for p in self.config_manager.get_profiles() if p.get("enabled", True)]
+        if names is not None:
+            profiles = [p for p in profiles if p.get("name") in names]
+        return profiles
+
+    def preflight(self, profile, seen_names):
+        """启动前检查，通过返回 None，否则返回原因"""
+        name = profile.get("name")
+        if not name:
+            return "缺少账号名称"
+        if name in seen_names:
+            return "账号名称重复"
+        if not self.detector.validate_path(profile.get("wechat_path")):
+            return "微信路径无效"
+        current = self.supervisor.get(name)
+        if current and current.state != STATE_FAILED:
+            return "已在运行"
+        return None
+
+    def wait_stagger(self):
+        """错峰：相邻两次启动至少间隔 stagger 秒"""
+        with self._stagger_lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self.stagger
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def start_instance(self, profile):
+        """解除单实例限制并启动一个实例，返回 SupervisedProcess"""
+        with self._launch_lock:
+            if self.supervisor.get(profile["name"]):
+                self.supervisor.remove(profile["name"], kill=True)
+            if self.release_instance_lock:
+                try:
+                    released = self.release_instance_lock()
+                    if released:
+                        logger.debug("已解除微信单实例限制（关闭 %s 个句柄）", released)
+                except Exception as e:
+                    logger.warning("解除微信单实例限制失败: %s", e)
+            return self.supervisor.add(
+                profile["name"],
+                [profile["wechat_path"]] + list(profile.get("args") or []),
+                cwd=profile.get("cwd") or os.path.dirname(profile["wechat_path"]) or None,
+                **self.supervise_options,
+            )
+
+    def launch_one(self, profile):
+        result = LaunchResult(profile["name"])
+        queued_at = time.monotonic()
+        with self._slots:
+            self.wait_stagger()
+            result.wait_time = time.monotonic() - queued_at
+            started = time.monotonic()
+
+            # 占用名额直到实例就绪，避免同时启动太多实例抢占磁盘和 CPU
+            deadline = started + self.ready_timeout
+            supervised = None
+            while time.monotonic() < deadline:
+                if supervised is None or supervised.state == STATE_BACKOFF or supervised.restarts:
+                    # 首次启动，或新进程在就绪前退出（通常是转交给了已有实例）：重新解除限制再启动
+                    if result.attempts > self.instance_retries:
+                        self.supervisor.remove(profile["name"], kill=True)
+                        result.error = f"新实例启动后立即退出（已尝试 {result.attempts} 次，微信单实例限制未能解除）"
+                        break
+                    result.attempts += 1
+                    try:
+                        supervised = self.start_instance(profile)
+                    except Exception as e:
+                        result.error = f"启动失败: {e}"
+                        break
+                    continue
+                if supervised.state == STATE_RUNNING and self.ready_check(supervised, profile):
+                    result.ok = True
+                    result.pid = supervised.pid
+                    break
+                if supervised.state == STATE_FAILED:
+                    result.error = supervised.last_error or "启动失败"
+                    break
+                time.sleep(self.poll_interval)
+            else:
+                result.error = f"等待就绪超时（{self.ready_timeout:.0f} 秒）"
+            result.launch_time = time.monotonic() - started
+        return result
+
+    def launch_all(self, names=None):
+        """启动所有（或指定的）账号实例，返回 LaunchReport"""
+        report = LaunchReport()
+        profiles = []
+        seen = set()
+        for profile in self.get_launch_profiles(names):
+            reason = self.preflight(profile, seen)
+            seen.add(profile.get("name"))
+            if reason:
+                result = LaunchResult(profile.get("name") or "?")
+                result.error = reason
+                report.add(result)
+                self._notify(result)
+            else:
+                profiles.append(profile)
+
+        start = time.monotonic()
+        if profiles:
+            with ThreadPoolExecutor(max_workers=len(profiles), thread_name_prefix="launcher") as pool:
+                for result in pool.map(self._launch_and_notify, profiles):
+                    report.add(result)
+        report.elapsed = time.monotonic() - start
+        return report
+
+    def _launch_and_notify(self, profile):
+        result = self.launch_one(profile)
+        self._notify(result)
+        return result
+
+    def _notify(self, result):
+        if self.on_result:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logger.warning("多开启动回调错误: %s", e)
+
+
+class LaunchReport:
+    """多开启动汇总"""
+
+    def __init__(self):
+        self.results = []
+        self.elapsed = 0.0
+
+    def add(self, result):
+        self.results.append(result)
+
+    @property
+    def succeeded(self):
+        return [r for r in self.results if r.ok]
+
+    @property
+    def failed(self):
+        return [r for r in self.results if not r.ok]
+
+    def summary(self):
+        ok = self.succeeded
+        text = f"已启动 {len(ok)}/{len(self.results)} 个微信"
+        if ok:
+            latencies = sorted(r.launch_time for r in ok)
+            text += f"（启动耗时 平均 {sum(latencies) / len(latencies):.1f} 秒，最长 {latencies[-1]:.1f} 秒）"
+        return text + f"，总用时 {self.elapsed:.1f} 秒"
+
+    def to_dict(self):
+        return {"elapsed": self.elapsed, "results": [r.to_dict() for r in self.results]}
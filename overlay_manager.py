@@ -0,0 +1,87 @@
+import logging
+import threading
+from concurrent.futures import Future
+
+import flet as ft
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class OverlayManager:
+    """浮层管理
+
+    浮层控件（目前只有文件选择器）按名称只创建一次（首次使用时加入 page.overlay），之后一直复用，
+    page.overlay 的长度不会随使用次数增长。每次请求返回 concurrent.futures.Future，
+    也可以传入回调；结果按请求分发，同一浮层上一次请求未完成时按取消处理。
+    """
+
+    def __init__(self, page, updater):
+        self.page = page
+        self.updater = updater
+        self._controls = {}  # 名称 -> 浮层控件
+        self._pending = {}  # 名称 -> (Future, 回调)
+        self._lock = threading.Lock()  # 保护 _pending
+        self._create_lock = threading.Lock()
+
+    def count(self):
+        """page.overlay 中的控件数"""
+        return len(self.page.overlay)
+
+    def _get(self, name, factory):
+        """获取浮层控件，首次使用时创建并同步到客户端"""
+        # 事件处理函数在不同线程中执行，查找和创建都在锁内，避免重复创建
+        with self._create_lock:
+            control = self._controls.get(name)
+            if control is None:
+                control = self._controls[name] = factory()
+                self.page.overlay.append(control)
+                # 浮层控件必须先同步到客户端才能打开
+                self.updater.request()
+                self.updater.flush()
+        return control
+
+    def _begin(self, name, callback):
+        """开始一次请求，上一次未完成的请求按取消处理"""
+        future = Future()
+        with self._lock:
+            previous = self._pending.pop(name, None)
+            self._pending[name] = (future, callback)
+        if previous:
+            self._deliver(previous, None)
+        metrics.inc("overlay_requests_total", kind=name)
+        return future
+
+    def _resolve(self, name, result):
+        with self._lock:
+            pending = self._pending.pop(name, None)
+        if pending:
+            self._deliver(pending, result)
+
+    def _deliver(self, pending, result):
+        future, callback = pending
+        if not future.done():
+            future.set_result(result)
+        if callback:
+            try:
+                callback(result)
+            except Exception as e:
+                logger.error("浮层回调失败: %s", e)
+
+    # 文件选择
+
+    def pick_files(self, callback=None, **options):
+        """打开文件选择对话框，结果为 FilePickerResultEvent（被新的请求取代时为 None）
+
+        options 与 ft.FilePicker.pick_files 的参数相同。
+        """
+        picker = self._get("file_picker", lambda: ft.FilePicker(on_result=lambda e: self._resolve("file_picker", e)))
+        future = self._begin("file_picker", callback)
+        picker.pick_files(**options)
+        return future
+
+    def cancel_all(self):
+        """取消所有未完成的请求（关闭窗口时调用）"""
+        for name in list(self._pending):
+            self._resolve(name, None)
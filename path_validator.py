@@ -0,0 +1,291 @@
+import logging
+import ntpath
+import threading
+from collections import OrderedDict
+
+from metrics import metrics
+from wechat_detector import SystemBackend, is_wechat_exe
+
+logger = logging.getLogger(__name__)
+
+
+class PathValidator:
+    """微信路径校验
+
+    接受 WeChat.exe 和 Weixin.exe。结果按路径和文件签名（大小、修改时间）缓存，
+    并监视所在的安装目录：目录被监视期间，有效的路径直接使用缓存，不再访问磁盘；
+    微信升级或卸载时立即更新缓存并通知订阅者，不必等到下次登录才发现。
+    无法监视时每次校验做一次 stat，签名变化同样会通知订阅者。
+    最多缓存 max_entries 个路径，超出时淘汰最久未校验的路径。
+    """
+
+    def __init__(self, backend=None, watch=True, poll_interval=2.0, max_entries=256):
+        self.backend = backend or SystemBackend()
+        self.watch = watch
+        self.poll_interval = poll_interval
+        self.max_entries = max(1, max_entries)
+        self.stats = {"cached": 0, "checked": 0, "changes": 0}
+        self._entries = OrderedDict()  # 规范化路径 -> [路径, 签名]，按最近校验排序
+        self._subscribers = []
+        self._watcher = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        return ntpath.normcase(path)
+
+    def validate(self, path):
+        """路径是否为存在的微信主程序"""
+        if not path or not is_wechat_exe(path):
+            return False
+
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            watcher = self._watcher
+        if entry and entry[1] is not None and watcher and watcher.is_watching(ntpath.dirname(key)):
+            with self._lock:
+                self.stats["cached"] += 1
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+            metrics.inc("path_validations_total", result="cached")
+            return True
+
+        signature = self.backend.stat(path)
+        with self._lock:
+            self.stats["checked"] += 1
+            previous = self._entries.get(key)
+            self._store(key, path, signature)
+        metrics.inc("path_validations_total", result="checked")
+        if previous and previous[1] != signature:
+            self._notify([(path, signature is not None)])
+        if signature is not None and self.watch:
+            self._ensure_watcher().watch(ntpath.dirname(key), ntpath.dirname(path))
+        return signature is not None
+
+    def remember(self, path, signature):
+        """记录调用方刚确认过的签名（如检测缓存的 stat 结果）并开始监视，不再访问磁盘"""
+        if not path or signature is None or not is_wechat_exe(path):
+            return
+        key = self._key(path)
+        with self._lock:
+            self._store(key, path, tuple(signature))
+        if self.watch:
+            self._ensure_watcher().watch(ntpath.dirname(key), ntpath.dirname(path))
+
+    def _store(self, key, path, signature):
+        """记录路径的签名（调用方持有锁）"""
+        self._entries[key] = [path, signature]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def subscribe(self, callback):
+        """订阅缓存路径的变化，callback(路径, 是否仍然有效)；返回取消订阅的函数"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _notify(self, changes):
+        with self._lock:
+            self.stats["changes"] += len(changes)
+            subscribers = list(self._subscribers)
+        metrics.inc("path_validator_changes_total", len(changes))
+        for path, valid in changes:
+            logger.info("微信程序%s: %s", "已更新" if valid else "已不存在", path)
+            for callback in subscribers:
+                try:
+                    callback(path, valid)
+                except Exception as e:
+                    logger.warning("路径变化通知失败: %s", e)
+
+    def refresh(self, directory=None):
+        """重新读取缓存路径的签名（directory 为规范化的目录时只检查该目录），通知变化"""
+        with self._lock:
+            entries = [
+                (key, path, signature) for key, (path, signature) in self._entries.items()
+                if directory is None or ntpath.dirname(key) == directory
+            ]
+        changes = []
+        for key, path, signature in entries:
+            current = self.backend.stat(path)
+            if current == signature:
+                continue
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key][1] = current
+            changes.append((path, current is not None))
+        if changes:
+            self._notify(changes)
+        return changes
+
+    def invalidate(self, path=None):
+        """清除缓存（不传路径时全部清除）"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(path), None)
+
+    def _ensure_watcher(self):
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = create_watcher(self, self.backend, self.poll_interval)
+            return self._watcher
+
+    def close(self):
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        if watcher:
+            watcher.close()
+
+
+class PollingWatcher:
+    """轮询监视：每隔 interval 秒检查一次缓存路径的签名
+
+    只有通过 watch() 登记过的目录算作被监视，其中的路径在校验时才直接使用缓存。
+    """
+
+    def __init__(self, validator, interval=2.0):
+        self.validator = validator
+        self.interval = interval
+        self._directories = set()  # 规范化目录
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="path-watch", daemon=True)
+        self._thread.start()
+
+    def is_watching(self, directory):
+        with self._lock:
+            if directory not in self._directories:
+                return False
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def watch(self, directory, path):
+        with self._lock:
+            self._directories.add(directory)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.validator.refresh()
+            except Exception as e:
+                logger.warning("微信路径监视失败: %s", e)
+
+    def close(self):
+        self._stop.set()
+
+
+class Win32DirectoryWatcher:
+    """Windows 目录变更通知（FindFirstChangeNotification），目录中的文件变化后立即检查
+
+    另外每隔 rescan_interval 秒做一次完整检查，并重试注册失败的目录。
+    """
+
+    NOTIFY_FILTER_NAMES = (
+        "FILE_NOTIFY_CHANGE_FILE_NAME",
+        "FILE_NOTIFY_CHANGE_DIR_NAME",
+        "FILE_NOTIFY_CHANGE_SIZE",
+        "FILE_NOTIFY_CHANGE_LAST_WRITE",
+    )
+
+    def __init__(self, validator, rescan_interval=30.0):
+        import win32con
+        import win32event
+        import win32file
+
+        self.win32event = win32event
+        self.win32file = win32file
+        self.notify_filter = 0
+        for name in self.NOTIFY_FILTER_NAMES:
+            self.notify_filter |= getattr(win32con, name)
+        self.validator = validator
+        self.rescan_interval = rescan_interval
+        self._directories = {}  # 规范化目录 -> 实际目录
+        self._handles = {}  # 规范化目录 -> 通知句柄
+        self._closed = False
+        self._lock = threading.Lock()
+        self._wakeup = win32event.CreateEvent(None, 0, 0, None)
+        self._thread = threading.Thread(target=self._run, name="path-watch", daemon=True)
+        self._thread.start()
+
+    def is_watching(self, directory):
+        with self._lock:
+            return directory in self._handles and self._thread.is_alive()
+
+    def watch(self, directory, path):
+        with self._lock:
+            if directory in self._directories:
+                return
+            self._directories[directory] = path
+        self.win32event.SetEvent(self._wakeup)
+
+    def _register(self):
+        with self._lock:
+            pending = [(key, path) for key, path in self._directories.items() if key not in self._handles]
+        for key, path in pending:
+            try:
+                handle = self.win32file.FindFirstChangeNotification(path, False, self.notify_filter)
+            except Exception as e:
+                logger.debug("无法监视目录 %s: %s", path, e)
+                continue
+            with self._lock:
+                self._handles[key] = handle
+
+    def _unregister(self, key):
+        with self._lock:
+            handle = self._handles.pop(key, None)
+        if handle is not None:
+            try:
+                self.win32file.FindCloseChangeNotification(handle)
+            except Exception:
+                pass
+
+    def _run(self):
+        win32event = self.win32event
+        while not self._closed:
+            self._register()
+            with self._lock:
+                keys = list(self._handles)
+                handles = [self._wakeup] + [self._handles[key] for key in keys]
+            try:
+                result = win32event.WaitForMultipleObjects(handles, False, int(self.rescan_interval * 1000))
+                if self._closed:
+                    break
+                if result == win32event.WAIT_TIMEOUT:
+                    self.validator.refresh()
+                    continue
+                index = result - win32event.WAIT_OBJECT_0
+                if index <= 0 or index > len(keys):
+                    continue
+                key = keys[index - 1]
+                try:
+                    self.win32file.FindNextChangeNotification(self._handles[key])
+                except Exception:
+                    # 目录已被删除，下次循环重新注册
+                    self._unregister(key)
+                self.validator.refresh(key)
+            except Exception as e:
+                logger.warning("微信路径监视失败: %s", e)
+                self._closed = True
+        for key in list(self._handles):
+            self._unregister(key)
+
+    def close(self):
+        self._closed = True
+        self.win32event.SetEvent(self._wakeup)
+
+
+def create_watcher(validator, backend, poll_interval=2.0):
+    """真实文件系统在 Windows 上使用目录变更通知，否则（或缺少 pywin32 时）轮询签名"""
+    if isinstance(backend, SystemBackend):
+        try:
+            return Win32DirectoryWatcher(validator)
+        except ImportError:
+            pass
+    return PollingWatcher(validator, poll_interval)
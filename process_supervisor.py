@@ -0,0 +1,419 @@
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+from collections import deque
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# 进程状态
+STATE_STOPPED = "stopped"    # 未启动或已停止监管
+STATE_RUNNING = "running"
+STATE_BACKOFF = "backoff"    # 已退出或卡死，等待重启
+STATE_FAILED = "failed"      # 超过最大重启次数
+
+# 视为卡死的进程状态（被暂停或已成为僵尸进程）
+HUNG_STATUSES = (psutil.STATUS_STOPPED, psutil.STATUS_ZOMBIE)
+
+
+def default_hang_check(process):
+    """默认的卡死检测：进程处于暂停或僵尸状态；Windows 下窗口无响应也视为卡死
+
+    返回 True 表示正常，在 oneshot() 中调用。
+    """
+    if process.status() in HUNG_STATUSES:
+        return False
+    if os.name == "nt":
+        try:
+            import win32gui
+            import win32process
+        except ImportError:
+            return True
+        hung = []
+
+        def check(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd) and win32process.GetWindowThreadProcessId(hwnd)[1] == process.pid:
+                hung.append(bool(win32gui.IsHungAppWindow(hwnd)))
+            return True
+
+        win32gui.EnumWindows(check, None)
+        return not hung or not all(hung)
+    return True
+
+
+class ProcessSample:
+    """进程树的一次采样"""
+
+    __slots__ = ("timestamp", "cpu_percent", "rss", "processes")
+
+    def __init__(self, timestamp, cpu_percent, rss, processes):
+        self.timestamp = timestamp
+        self.cpu_percent = cpu_percent
+        self.rss = rss
+        self.processes = processes
+
+
+class SupervisedProcess:
+    """被监管的进程
+
+    记录进程树（主进程及其所有子进程）的 CPU 和内存时间序列。进程退出或持续卡死
+    hang_timeout 秒后，按指数退避（带随机抖动）重启；稳定运行 stable_after 秒后
+    重置退避和重启计数，max_restarts 限制的是连续失败（两次失败之间未稳定运行）时的重启次数，
+    偶尔的崩溃不会累计成永久失败。adopt_existing 为 True 时优先接管已经在运行的同一程序
+    （微信是单实例程序，重复启动的新进程会立即退出）。
+    """
+
+    def __init__(self, name, command, cwd=None, env=None, hang_timeout=30.0, hang_check=default_hang_check,
+                 max_restarts=None, backoff_base=1.0, backoff_max=60.0, stable_after=60.0,
+                 history=600, adopt_existing=False):
+        self.name = name
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = env
+        self.hang_timeout = hang_timeout
+        self.hang_check = hang_check
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.adopt_existing = adopt_existing
+
+        self.state = STATE_STOPPED
+        self.popen = None
+        self.process = None
+        self.tree = {}          # pid -> psutil.Process
+        self.started_at = None
+        self.exit_code = None
+        self.restarts = 0       # 累计重启次数（只用于统计）
+        self.failures = 0       # 连续失败次数，用于计算退避和判断是否超过 max_restarts
+        self.next_start_at = 0.0
+        self.hung_since = None
+        self.last_error = None
+        self.samples = deque(maxlen=history)
+        self._cpu_times = {}    # pid -> 上次采样的 CPU 时间
+        self._last_sample_at = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process else None
+
+    @property
+    def warming_up(self):
+        """刚启动的进程子进程变化频繁，前几次采样都刷新进程树"""
+        return len(self.samples) < 3
+
+    def find_existing(self):
+        """查找已在运行的同一程序"""
+        target = os.path.normcase(os.path.abspath(self.command[0]))
+        for proc in psutil.process_iter(["exe"]):
+            exe = proc.info.get("exe")
+            if exe and os.path.normcase(exe) == target:
+                return proc
+        return None
+
+    def launch(self):
+        """启动（或接管）进程，失败时返回 False"""
+        self.exit_code = None
+        self.hung_since = None
+        self._cpu_times = {}
+        self._last_sample_at = None
+        try:
+            existing = self.find_existing() if self.adopt_existing else None
+            if existing:
+                self.popen = None
+                self.process = existing
+            else:
+                self.popen = subprocess.Popen(
+                    self.command,
+                    cwd=self.cwd,
+                    env=self.env,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                self.process = psutil.Process(self.popen.pid)
+        except (OSError, psutil.Error) as e:
+            self.last_error = f"启动失败: {e}"
+            self.process = None
+            return False
+
+        self.tree = {self.process.pid: self.process}
+        self.started_at = time.monotonic()
+        self.state = STATE_RUNNING
+        return True
+
+    def backoff_delay(self):
+        """第 failures 次连续失败后的重启等待时间"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, self.failures - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def schedule_restart(self, reason):
+        """进程退出或卡死后安排重启"""
+        now = time.monotonic()
+        if self.started_at and now - self.started_at >= self.stable_after:
+            self.failures = 0
+        self.failures += 1
+        self.last_error = reason
+        self.process = None
+        self.popen = None
+        self.tree = {}
+        # 本次失败之前，连续失败窗口内已经重启了 failures - 1 次
+        if self.max_restarts is not None and self.failures > self.max_restarts:
+            self.state = STATE_FAILED
+            return
+        self.state = STATE_BACKOFF
+        self.next_start_at = now + self.backoff_delay()
+
+    def kill_tree(self, timeout=3.0, graceful=True):
+        """结束整个进程树：先 terminate，超时后 kill；卡死的进程不响应 terminate，直接 kill"""
+        procs = list(self.tree.values())
+        if self.process:
+            try:
+                procs = [self.process] + self.process.children(recursive=True)
+            except psutil.Error:
+                pass
+        for proc in procs:
+            try:
+                proc.terminate() if graceful else proc.kill()
+            except psutil.Error:
+                pass
+        _, alive = psutil.wait_procs(procs, timeout=timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.Error:
+                pass
+        if self.popen:
+            try:
+                self.popen.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                pass
+
+    def poll_exit(self):
+        """主进程是否已退出"""
+        if self.popen is not None:
+            code = self.popen.poll()
+            if code is not None:
+                self.exit_code = code
+                return True
+            return False
+        try:
+            return not self.process.is_running() or self.process.status() == psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return True
+
+    def sample(self, now, refresh_tree):
+        """采样进程树，返回 (是否健康, 是否有明显变化)"""
+        if refresh_tree:
+            try:
+                children = self.process.children(recursive=True)
+            except psutil.Error:
+                children = []
+            self.tree = {self.process.pid: self.process}
+            self.tree.update((child.pid, child) for child in children)
+
+        healthy = True
+        rss = 0
+        cpu_times = {}
+        for pid, proc in list(self.tree.items()):
+            try:
+                with proc.oneshot():
+                    times = proc.cpu_times()
+                    cpu_times[pid] = times.user + times.system
+                    rss += proc.memory_info().rss
+                    if proc is self.process and self.hang_check:
+                        healthy = self.hang_check(proc)
+            except psutil.NoSuchProcess:
+                self.tree.pop(pid, None)
+            except psutil.AccessDenied:
+                pass
+
+        cpu_percent = 0.0
+        if self._last_sample_at is not None:
+            elapsed = now - self._last_sample_at
+            used = sum(max(0.0, cpu - self._cpu_times.get(pid, cpu)) for pid, cpu in cpu_times.items())
+            cpu_percent = used / elapsed * 100 if elapsed > 0 else 0.0
+        self._cpu_times = cpu_times
+        self._last_sample_at = now
+
+        previous = self.samples[-1] if self.samples else None
+        self.samples.append(ProcessSample(time.time(), cpu_percent, rss, len(self.tree)))
+        changed = previous is None or previous.processes != len(self.tree) or abs(previous.cpu_percent - cpu_percent) > 20
+        return healthy, changed
+
+    def get_series(self):
+        """CPU 和内存时间序列: [(时间戳, CPU%, RSS 字节, 进程数)]"""
+        return [(s.timestamp, s.cpu_percent, s.rss, s.processes) for s in self.samples]
+
+    def get_status(self):
+        latest = self.samples[-1] if self.samples else None
+        return {
+            "name": self.name,
+            "state": self.state,
+            "pid": self.pid,
+            "processes": len(self.tree),
+            "restarts": self.restarts,
+            "exit_code": self.exit_code,
+            "last_error": self.last_error,
+            "cpu_percent": latest.cpu_percent if latest else 0.0,
+            "rss": latest.rss if latest else 0,
+            "uptime": time.monotonic() - self.started_at if self.state == STATE_RUNNING and self.started_at else 0.0,
+        }
+
+
+class ProcessSupervisor:
+    """进程监管器
+
+    用一个后台线程监管任意数量的进程。每轮对每个进程树做一次批量 oneshot() 采样，
+    子进程列表每隔 tree_refresh 轮刷新一次。没有变化时采样间隔逐步放宽到 max_interval，
+    有进程启动、退出、卡死或负载突变时收紧到 min_interval。
+    """
+
+    def __init__(self, min_interval=0.5, max_interval=5.0, tree_refresh=5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.tree_refresh = tree_refresh
+        self.interval = min_interval
+        self.processes = {}
+        self.listeners = []
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.cycles = 0
+        self.cycle_time_total = 0.0  # 采样本身消耗的累计时间（秒）
+
+    def add(self, name, command, start=True, **options):
+        """添加被监管的进程，返回 SupervisedProcess"""
+        with self._lock:
+            if name in self.processes:
+                raise ValueError(f"进程 {name} 已在监管中")
+            supervised = SupervisedProcess(name, command, **options)
+            self.processes[name] = supervised
+            if start:
+                self._start_process(supervised)
+        self.ensure_running()
+        self._wake.set()
+        return supervised
+
+    def remove(self, name, kill=True):
+        """停止监管，kill 为 True 时同时结束进程树"""
+        with self._lock:
+            supervised = self.processes.pop(name, None)
+        if supervised and kill and supervised.process:
+            supervised.kill_tree()
+        if supervised:
+            supervised.state = STATE_STOPPED
+        return supervised
+
+    def get(self, name):
+        with self._lock:
+            return self.processes.get(name)
+
+    def subscribe(self, callback):
+        """订阅状态变化，callback(supervised, event)，event 为 started/exited/hung/failed"""
+        self.listeners.append(callback)
+
+    def _emit(self, supervised, event):
+        for callback in list(self.listeners):
+            try:
+                callback(supervised, event)
+            except Exception as e:
+                logger.warning("进程监管回调错误: %s", e)
+
+    def _start_process(self, supervised):
+        if supervised.launch():
+            self._emit(supervised, "started")
+        else:
+            supervised.schedule_restart(supervised.last_error)
+            self._emit(supervised, "failed" if supervised.state == STATE_FAILED else "exited")
+
+    def ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="process-supervisor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            active = self.check_all()
+            self.cycle_time_total += time.perf_counter() - start
+            self.cycles += 1
+            # 有变化时收紧采样间隔，否则逐步放宽
+            self.interval = self.min_interval if active else min(self.max_interval, self.interval * 1.5)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def check_all(self):
+        """检查所有进程一轮，返回本轮是否有需要关注的变化"""
+        now = time.monotonic()
+        refresh_tree = self.cycles % self.tree_refresh == 0
+        active = False
+        with self._lock:
+            processes = list(self.processes.values())
+
+        for supervised in processes:
+            if supervised.state == STATE_BACKOFF:
+                active = True
+                if now >= supervised.next_start_at:
+                    supervised.restarts += 1
+                    self._start_process(supervised)
+                continue
+            if supervised.state != STATE_RUNNING:
+                continue
+
+            if supervised.poll_exit():
+                # 接管模式下，新进程可能只是把启动请求交给了已有实例
+                if supervised.adopt_existing and supervised.find_existing():
+                    supervised.launch()
+                else:
+                    supervised.schedule_restart(f"进程退出 (code={supervised.exit_code})")
+                    self._emit(supervised, "failed" if supervised.state == STATE_FAILED else "exited")
+                active = True
+                continue
+
+            healthy, changed = supervised.sample(now, refresh_tree or supervised.warming_up)
+            active = active or changed
+            if healthy:
+                supervised.hung_since = None
+            elif supervised.hung_since is None:
+                supervised.hung_since = now
+                active = True
+            elif now - supervised.hung_since >= supervised.hang_timeout:
+                supervised.kill_tree(timeout=1.0, graceful=False)
+                supervised.schedule_restart(f"进程卡死超过 {supervised.hang_timeout:.0f} 秒")
+                self._emit(supervised, "failed" if supervised.state == STATE_FAILED else "hung")
+                active = True
+        return active
+
+    def stop(self, kill=False, timeout=5.0):
+        """停止监管线程，kill 为 True 时同时结束所有被监管的进程"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        if kill:
+            with self._lock:
+                processes = list(self.processes.values())
+            for supervised in processes:
+                if supervised.process:
+                    supervised.kill_tree()
+                supervised.state = STATE_STOPPED
+
+    def snapshot(self):
+        """所有进程的当前状态"""
+        with self._lock:
+            return {name: supervised.get_status() for name, supervised in self.processes.items()}
+
+    def get_overhead(self):
+        """采样开销：轮数、平均每轮耗时和当前间隔"""
+        return {
+            "cycles": self.cycles,
+            "avg_cycle_time": self.cycle_time_total / self.cycles if self.cycles else 0.0,
+            "interval": self.interval,
+        }
@@ -0,0 +1,164 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+
+from config_manager import atomic_write_json, default_config_path
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 1
+
+
+def protect_secret(secret):
+    """Windows 下用 DPAPI 把密钥绑定到当前用户，其他平台原样返回"""
+    try:
+        import win32crypt
+    except ImportError:
+        return secret, "none"
+    return win32crypt.CryptProtectData(secret, "WxQuantum", None, None, None, 0), "dpapi"
+
+
+def unprotect_secret(data, protection):
+    if protection == "dpapi":
+        import win32crypt
+        return win32crypt.CryptUnprotectData(data, None, None, None, 0)[1]
+    return data
+
+
+class SessionCipher:
+    """会话加密：HMAC-SHA256 计数器模式生成密钥流加密，再对密文做 HMAC 签名
+
+    只依赖标准库。加密密钥和签名密钥都由同一个本机密钥派生。
+    """
+
+    def __init__(self, secret):
+        self.enc_key = hmac.new(secret, b"wxq-session-enc", hashlib.sha256).digest()
+        self.mac_key = hmac.new(secret, b"wxq-session-mac", hashlib.sha256).digest()
+
+    def _keystream(self, nonce, length):
+        blocks = []
+        for counter in range((length + 31) // 32):
+            blocks.append(hmac.new(self.enc_key, nonce + counter.to_bytes(8, "big"), hashlib.sha256).digest())
+        return b"".join(blocks)[:length]
+
+    def encrypt(self, plaintext):
+        nonce = os.urandom(16)
+        ciphertext = bytes(a ^ b for a, b in zip(plaintext, self._keystream(nonce, len(plaintext))))
+        mac = hmac.new(self.mac_key, nonce + ciphertext, hashlib.sha256).digest()
+        return nonce + ciphertext + mac
+
+    def decrypt(self, data):
+        """解密，签名不匹配（被篡改或密钥不同）时返回 None"""
+        if len(data) < 48:
+            return None
+        nonce, ciphertext, mac = data[:16], data[16:-32], data[-32:]
+        expected = hmac.new(self.mac_key, nonce + ciphertext, hashlib.sha256).digest()
+        if not hmac.compare_digest(mac, expected):
+            return None
+        return bytes(a ^ b for a, b in zip(ciphertext, self._keystream(nonce, len(ciphertext))))
+
+
+class SessionStore:
+    """本地会话缓存
+
+    登录成功后保存服务器签发的会话令牌，下次启动时离线解密、校验签名和有效期，
+    通过即可跳过登录界面，再由后台向服务器复核。文件加密保存，本机密钥在 Windows 下
+    由 DPAPI 保护。会话超过服务器给出的有效期或本地最长保存时间后失效。
+    """
+
+    def __init__(self, store_file=None, key_file=None, max_age=7 * 24 * 3600):
+        directory = os.path.dirname(os.path.abspath(default_config_path()))
+        self.store_file = store_file or os.path.join(directory, "session.dat")
+        self.key_file = key_file or os.path.join(directory, "session.key")
+        self.max_age = max_age
+        self.last_error = None
+        self._cipher = None
+        self._lock = threading.Lock()
+
+    def get_cipher(self):
+        """读取本机密钥，不存在时生成"""
+        if self._cipher is None:
+            secret = None
+            try:
+                if os.path.exists(self.key_file):
+                    with open(self.key_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    secret = unprotect_secret(base64.b64decode(data["key"]), data.get("protection", "none"))
+            except Exception as e:
+                logger.warning("会话密钥读取失败，重新生成: %s", e)
+
+            if secret is None:
+                secret = os.urandom(32)
+                protected, protection = protect_secret(secret)
+                atomic_write_json(self.key_file, {
+                    "version": STORE_VERSION,
+                    "protection": protection,
+                    "key": base64.b64encode(protected).decode("ascii"),
+                })
+            self._cipher = SessionCipher(secret)
+        return self._cipher
+
+    def save(self, username, token, expires_at=None):
+        """保存会话，expires_at 为服务器给出的令牌过期时间（时间戳）"""
+        now = time.time()
+        session = {
+            "username": username,
+            "token": token,
+            "saved_at": now,
+            "expires_at": min(expires_at or now + self.max_age, now + self.max_age),
+        }
+        with self._lock:
+            try:
+                # 获取密钥（DPAPI）和加密失败同样只记录日志，不影响登录
+                data = self.get_cipher().encrypt(json.dumps(session).encode("utf-8"))
+                atomic_write_json(self.store_file, {
+                    "version": STORE_VERSION,
+                    "data": base64.b64encode(data).decode("ascii"),
+                })
+                return True
+            except Exception as e:
+                logger.warning("会话保存失败: %s", e)
+                return False
+
+    def load(self):
+        """离线读取并校验会话，无效时返回 None，原因记录在 last_error"""
+        with self._lock:
+            self.last_error = None
+            if not os.path.exists(self.store_file):
+                self.last_error = "no_session"
+                return None
+            try:
+                with open(self.store_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                plaintext = self.get_cipher().decrypt(base64.b64decode(data["data"]))
+            except Exception as e:
+                logger.warning("会话读取失败: %s", e)
+                plaintext = None
+
+            if plaintext is None:
+                self.last_error = "invalid"
+                self._remove()
+                return None
+
+            session = json.loads(plaintext)
+            if time.time() >= session["expires_at"]:
+                self.last_error = "expired"
+                self._remove()
+                return None
+            return session
+
+    def clear(self):
+        """清除会话（退出登录或服务器判定失效）"""
+        with self._lock:
+            self._remove()
+
+    def _remove(self):
+        try:
+            os.remove(self.store_file)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,225 @@
+import gzip
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 设置为文件路径时记录本次会话的界面操作（.gz 结尾时压缩）
+TRACE_ENV = "WXQ_TRACE_SESSION"
+
+TRACE_VERSION = 1
+
+# 录制时需要脱敏的字段
+PASSWORD_FIELDS = ("password", "confirm_password", "recharge_password")
+USERNAME_FIELDS = ("username", "recharge_username")
+CARD_FIELDS = ("card_key",)
+
+
+def open_trace(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class SessionRecorder:
+    """会话录制器
+
+    把界面事件（模式切换、字段编辑、提交操作、文件选择）按时间顺序写入紧凑的 JSON Lines 文件：
+    第一行是文件头，之后每行一个事件 [毫秒偏移, 类型, 数据]。
+    密码只记录长度，用户名替换为别名，卡密只记录数量，可以放心附在问题反馈里。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.start = time.monotonic()
+        self.count = 0
+        self._aliases = {}
+        self._lock = threading.Lock()
+        self._file = open_trace(path, "w")
+        self._write({"version": TRACE_VERSION, "started": time.strftime("%Y-%m-%d %H:%M:%S")})
+
+    def _write(self, item):
+        self._file.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def record(self, kind, **data):
+        offset = round((time.monotonic() - self.start) * 1000, 1)
+        with self._lock:
+            if self._file is None:
+                return
+            self._write([offset, kind, data])
+            self.count += 1
+            # 每条事件都落盘，程序异常退出时录制仍然完整
+            self._file.flush()
+
+    def record_field(self, name, value):
+        """记录字段编辑（脱敏）"""
+        value = value or ""
+        if name in PASSWORD_FIELDS:
+            self.record("field", name=name, length=len(value))
+        elif name in USERNAME_FIELDS:
+            alias = self._aliases.setdefault(value, f"user{len(self._aliases) + 1}") if value else ""
+            self.record("field", name=name, alias=alias)
+        elif name in CARD_FIELDS:
+            self.record("field", name=name, keys=len(value.split()))
+        else:
+            self.record("field", name=name, value=value)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def load_trace(path):
+    """读取录制文件，返回 (文件头, [(毫秒偏移, 类型, 数据), ...])"""
+    with open_trace(path, "r") as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"录制文件为空: {path}")
+    header = json.loads(lines[0])
+    if header.get("version") != TRACE_VERSION:
+        raise ValueError(f"不支持的录制文件版本: {header.get('version')}")
+    return header, [tuple(json.loads(line)) for line in lines[1:]]
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """获取会话录制器（未通过环境变量启用时为 None）"""
+    global _recorder
+    path = os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    with _recorder_lock:
+        if _recorder is None:
+            try:
+                _recorder = SessionRecorder(path)
+            except OSError as e:
+                logger.warning("会话录制文件无法创建: %s", e)
+                os.environ.pop(TRACE_ENV, None)
+                return None
+        return _recorder
+
+
+def percentile(values, q):
+    """分位数（最近秩法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+
+def summarize_latencies(latencies):
+    """每种事件的次数和 p50/p95/p99 延迟（秒）"""
+    return {
+        name: {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+        for name, values in latencies.items()
+    }
+
+
+class ReplayError(Exception):
+    """录制的事件无法回放（如提供的卡密不足）"""
+
+
+class SessionReplayer:
+    """会话回放器
+
+    按录制顺序驱动 LoginPage，测量每个事件从触发到界面同步完成（提交操作为任务结束）的延迟。
+    脱敏的字段用替代值回放：密码为等长的占位符，用户名为别名，卡密从 card_keys 中依次取用；
+    文件选择的结果由 picker_files 提供（target -> 文件路径）。
+    卡密不足时跳过该字段事件并记录原因，不用假卡密代替（假卡密只会测到本地拒绝的路径）。
+    """
+
+    def __init__(self, login_page, card_keys=None, picker_files=None, action_timeout=60.0, realtime=False):
+        self.login_page = login_page
+        self.card_keys = list(card_keys or [])
+        self.picker_files = dict(picker_files or {})
+        self.action_timeout = action_timeout
+        self.realtime = realtime
+        self.latencies = {}  # 事件名 -> [秒]
+        self.skipped = []  # (事件名, 原因)
+
+    def event_name(self, kind, data):
+        if kind == "mode":
+            return f"mode {data.get('mode')}"
+        if kind == "field":
+            return f"field {data.get('name')}"
+        if kind in ("action", "browse", "picker"):
+            return f"{kind} {data.get('mode') or data.get('target')}"
+        return kind
+
+    def replay(self, events):
+        start = time.monotonic()
+        for offset, kind, data in events:
+            if self.realtime:
+                delay = offset / 1000 - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            began = time.perf_counter()
+            try:
+                self.dispatch(kind, data)
+            except ReplayError as e:
+                logger.warning("跳过事件 %s: %s", self.event_name(kind, data), e)
+                self.skipped.append((self.event_name(kind, data), str(e)))
+                continue
+            except Exception as e:
+                logger.warning("回放事件失败 %s %s: %s", kind, data, e)
+                continue
+            self.latencies.setdefault(self.event_name(kind, data), []).append(time.perf_counter() - began)
+        return self.latencies
+
+    def dispatch(self, kind, data):
+        page = self.login_page
+        if kind == "mode":
+            page.switch_mode(data["mode"])
+        elif kind == "field":
+            field = page.get_trace_fields()[data["name"]]
+            if "length" in data:
+                field.value = "p" * data["length"]
+            elif "alias" in data:
+                field.value = data["alias"]
+            elif "keys" in data:
+                if len(self.card_keys) < data["keys"]:
+                    raise ReplayError(f"卡密不足：录制中有 {data['keys']} 张，剩余 {len(self.card_keys)} 张")
+                field.value = "\n".join(self.card_keys.pop() for _ in range(data["keys"]))
+            else:
+                field.value = data.get("value", "")
+        elif kind == "action":
+            page.current_mode = data["mode"]
+            future = page.handle_action(None)
+            if future is not None:
+                future.result(self.action_timeout)
+        elif kind == "browse":
+            page.browse_file(data["target"])
+        elif kind == "picker":
+            path = self.picker_files.get(data["target"]) if data.get("selected") else None
+            page.on_file_picked(data["target"], PickedFiles(path))
+        page.updater.flush()
+
+    def report(self):
+        return summarize_latencies(self.latencies)
+
+
+class PickedFile:
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+
+class PickedFiles:
+    """回放时代替 ft.FilePickerResultEvent，只提供 files"""
+
+    def __init__(self, path=None):
+        self.files = [PickedFile(path)] if path else None
@@ -0,0 +1,124 @@
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+
+# 设置为 1 时在控制台打印启动报告，设置为 .json 路径时写入文件
+PROFILE_ENV = "WXQ_PROFILE_STARTUP"
+
+
+class StartupProfiler:
+    """启动耗时分析器
+
+    记录每个模块的导入耗时（含子模块的总耗时和自身耗时）以及启动过程中的关键节点，
+    节点时间从进程启动开始计算。未启用时所有方法都是空操作。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.process_start = None
+        self.imports = {}  # 模块名 -> (总耗时, 自身耗时)
+        self.marks = []    # (节点名, 距进程启动的秒数)
+        self._local = threading.local()
+        self._original_import = None
+        self._reported = False
+
+    def start(self):
+        """启用分析并安装导入计时钩子"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.process_start = get_process_start_time()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        self.mark("profiler_start")
+
+    def stop(self):
+        """卸载导入计时钩子"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if level or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if name not in self.imports:
+                self.imports[name] = (elapsed, elapsed - children)
+            if stack:
+                stack[-1] += elapsed
+
+    def mark(self, name):
+        """记录启动节点"""
+        if self.enabled:
+            self.marks.append((name, time.time() - self.process_start))
+
+    def get_mark(self, name):
+        for mark_name, elapsed in self.marks:
+            if mark_name == name:
+                return elapsed
+        return None
+
+    def report(self, top=15):
+        """生成启动报告"""
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        return {
+            "marks": dict(self.marks),
+            "time_to_first_frame": self.get_mark("first_frame"),
+            "import_total": sum(self_time for _, self_time in self.imports.values()),
+            "imports": [
+                {"module": name, "total": total, "self": self_time}
+                for name, (total, self_time) in slowest
+            ],
+        }
+
+    def finish(self):
+        """首帧完成后输出报告并卸载钩子"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        self.stop()
+
+        report = self.report()
+        target = os.environ.get(PROFILE_ENV, "")
+        if target.endswith(".json"):
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            return
+
+        print("===== 启动耗时 =====")
+        for name, elapsed in self.marks:
+            print(f"{name:<24}{elapsed * 1000:>10.1f}ms")
+        print(f"模块导入自身耗时合计: {report['import_total'] * 1000:.1f}ms")
+        for item in report["imports"]:
+            print(f"  {item['module']:<36}{item['self'] * 1000:>8.1f}ms  (含子模块 {item['total'] * 1000:.1f}ms)")
+
+
+def get_process_start_time():
+    """获取进程启动时间，获取失败时使用当前时间"""
+    try:
+        import psutil
+        return psutil.Process().create_time()
+    except Exception:
+        return time.time()
+
+
+profiler = StartupProfiler()
+
+
+def is_enabled_by_env():
+    """是否通过环境变量启用了启动分析"""
+    return bool(os.environ.get(PROFILE_ENV))
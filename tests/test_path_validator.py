@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+路径校验缓存的正确性测试（使用模拟后端，任意平台可运行）
+
+用法: python -m pytest tests 或 python -m unittest discover tests
+"""
+
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from path_validator import PathValidator, PollingWatcher  # noqa: E402
+from wechat_detector import FakeBackend  # noqa: E402
+
+WEIXIN = r"C:\Program Files\Tencent\Weixin\Weixin.exe"
+WECHAT = r"D:\Apps\WeChat\WeChat.exe"
+OTHER = r"C:\Tools\other.exe"
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class PathValidatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeBackend(files={WEIXIN: (1024, 1), WECHAT: (2048, 1), OTHER: (10, 1)})
+        self.validator = PathValidator(self.backend, poll_interval=0.05)
+        self.changes = []
+        self.validator.subscribe(lambda path, valid: self.changes.append((path, valid)))
+
+    def tearDown(self):
+        self.validator.close()
+
+    def test_accepts_wechat_and_weixin(self):
+        self.assertTrue(self.validator.validate(WEIXIN))
+        self.assertTrue(self.validator.validate(WECHAT))
+        self.assertFalse(self.validator.validate(OTHER))
+        self.assertFalse(self.validator.validate(r"C:\Missing\Weixin.exe"))
+        self.assertFalse(self.validator.validate(""))
+
+    def test_cache_hit_skips_disk(self):
+        self.validator.validate(WEIXIN)
+        # 监视线程自己的 stat 不算在内，只统计校验时访问磁盘的次数
+        checked = self.validator.stats["checked"]
+        for _ in range(100):
+            self.assertTrue(self.validator.validate(WEIXIN))
+        self.assertEqual(self.validator.stats["checked"], checked)
+        self.assertEqual(self.validator.stats["cached"], 100)
+
+    def test_upgrade_notifies_still_valid(self):
+        self.validator.validate(WEIXIN)
+        self.backend.add_file(WEIXIN, size=4096, mtime=2)
+        self.assertTrue(wait_for(lambda: (WEIXIN, True) in self.changes))
+        self.assertTrue(self.validator.validate(WEIXIN))
+
+    def test_uninstall_notifies_and_invalidates(self):
+        self.validator.validate(WEIXIN)
+        self.backend.remove_file(WEIXIN)
+        self.assertTrue(wait_for(lambda: (WEIXIN, False) in self.changes))
+        self.assertFalse(self.validator.validate(WEIXIN))
+
+    def test_remember_uses_given_signature(self):
+        self.validator.remember(WEIXIN, (1024, 1))
+        stat_calls = self.backend.stat_calls
+        self.assertTrue(self.validator.validate(WEIXIN))
+        self.assertEqual(self.validator.stats["checked"], 0)
+        self.assertEqual(self.backend.stat_calls, stat_calls)
+
+    def test_entries_are_bounded(self):
+        validator = PathValidator(self.backend, watch=False, max_entries=2)
+        paths = [rf"C:\Apps\{i}\WeChat.exe" for i in range(5)]
+        for path in paths:
+            self.backend.add_file(path)
+            validator.validate(path)
+        self.assertEqual(len(validator._entries), 2)
+        self.assertEqual([entry[0] for entry in validator._entries.values()], paths[-2:])
+
+
+class PollingWatcherTest(unittest.TestCase):
+
+    def test_watches_only_registered_directories(self):
+        validator = PathValidator(FakeBackend(), watch=False)
+        watcher = PollingWatcher(validator, interval=0.05)
+        try:
+            self.assertFalse(watcher.is_watching(r"c:\apps\wechat"))
+            watcher.watch(r"c:\apps\wechat", r"C:\Apps\WeChat")
+            self.assertTrue(watcher.is_watching(r"c:\apps\wechat"))
+            self.assertFalse(watcher.is_watching(r"d:\other"))
+        finally:
+            watcher.close()
+        self.assertFalse(watcher.is_watching(r"c:\apps\wechat"))
+
+    def test_unwatched_directory_is_checked_on_disk(self):
+        backend = FakeBackend(files={WEIXIN: (1024, 1), WECHAT: (2048, 1)})
+        validator = PathValidator(backend, poll_interval=0.05)
+        try:
+            validator.validate(WEIXIN)
+            # 另一个目录中的路径未被监视，第一次校验必须访问磁盘
+            checked = validator.stats["checked"]
+            self.assertTrue(validator.validate(WECHAT))
+            self.assertEqual(validator.stats["checked"], checked + 1)
+        finally:
+            validator.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import atexit
+import functools
+import inspect
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 设置为 .json 文件路径时记录本次运行的耗时区间，退出时导出为 Chrome trace 格式
+TRACE_ENV = "WXQ_TRACE"
+
+
+class _NullSpan:
+    """未启用追踪时的空区间"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一个耗时区间，同一线程中的区间按时间自然嵌套"""
+
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_complete(self.name, self.cat, self.start, end, self.args)
+        return False
+
+    def set(self, **args):
+        """补充区间参数（如结果）"""
+        self.args.update(args)
+
+
+class AsyncSpan(Span):
+    """协程中的耗时区间
+
+    同一事件循环线程中的多个协程交替执行，区间之间不是嵌套关系，不能记录为线程上的 X 事件。
+    导出为带 id 的异步事件（b/e），每次调用在查看器中单独显示为一条轨道。
+    """
+
+    __slots__ = ()
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_async(self.name, self.cat, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    """轻量的耗时追踪
+
+    span() 上下文管理器和 traced 装饰器记录带线程信息的区间，可以嵌套；协程函数的区间记录为异步事件，
+    导出为 Chrome trace-event JSON（chrome://tracing 或 Perfetto 打开）。
+    未启用时 span() 返回共享的空区间，装饰器只多一次属性判断。事件数有上限。
+    """
+
+    def __init__(self, max_events=200_000):
+        self.enabled = False
+        self.max_events = max_events
+        self.path = None
+        self.events = []
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self._threads = {}  # 线程 ident -> 线程名
+        self._async_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, path=None):
+        """开始追踪，path 不为空时在退出时导出"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.path = path
+        self.origin = time.perf_counter()
+        if path:
+            atexit.register(self.save)
+
+    def stop(self):
+        self.enabled = False
+
+    def span(self, name, cat="app", **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, cat, args)
+
+    def instant(self, name, cat="app", **args):
+        """记录一个时间点"""
+        if not self.enabled:
+            return
+        self._append({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": self._us(time.perf_counter()), "args": args})
+
+    def add_complete(self, name, cat, start, end, args):
+        self._append({
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": self._us(start),
+            "dur": round((end - start) * 1_000_000, 1),
+            "args": args,
+        })
+
+    def add_async(self, name, cat, start, end, args):
+        span_id = hex(next(self._async_ids))
+        self._append({"name": name, "cat": cat, "ph": "b", "id": span_id, "ts": self._us(start), "args": args})
+        self._append({"name": name, "cat": cat, "ph": "e", "id": span_id, "ts": self._us(end)})
+
+    def _us(self, moment):
+        return round((moment - self.origin) * 1_000_000, 1)
+
+    def _append(self, event):
+        thread = threading.current_thread()
+        event["pid"] = self.pid
+        event["tid"] = thread.ident
+        with self._lock:
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._threads[thread.ident] = thread.name
+            self.events.append(event)
+
+    def export(self):
+        """Chrome trace-event 格式"""
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        metadata = [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "WxQuantum"}}]
+        metadata += [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": ident, "args": {"name": name}}
+            for ident, name in threads.items()
+        ]
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped": self.dropped},
+        }
+
+    def save(self, path=None):
+        """导出到文件，返回文件路径"""
+        path = path or self.path
+        if not path or not self.events:
+            return None
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.export(), f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning("追踪文件保存失败: %s", e)
+            return None
+        return path
+
+
+tracer = Tracer()
+
+
+def traced(name=None, cat="app"):
+    """把函数调用记录为区间，支持普通函数和协程函数
+
+    区间名默认为函数的限定名。协程函数记录为异步区间，并发执行的调用互不嵌套。
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with AsyncSpan(tracer, span_name, cat, {}):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(tracer, span_name, cat, {}):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def start_from_env():
+    """环境变量指定了导出路径时开始追踪"""
+    path = os.environ.get(TRACE_ENV)
+    if path:
+        tracer.start(path)
+    return tracer.enabled
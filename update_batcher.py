@@ -0,0 +1,122 @@
+import logging
+import threading
+import time
+import weakref
+
+from metrics import caller_name, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateBatcher:
+    """页面更新合并器
+
+    各线程只标记需要更新的控件，后台线程每帧最多调用一次 page.update，
+    同一帧内的多次写入合并为一次差异同步。
+    """
+
+    def __init__(self, page, frame_interval=1 / 60):
+        self._page_ref = weakref.ref(page)
+        self.frame_interval = frame_interval
+        self.requested = 0  # 请求更新次数
+        self.flushed = 0    # 实际调用 page.update 次数
+        self._dirty = []
+        self._dirty_ids = set()
+        self._full = False
+        self._callers = set()  # 启用运行指标时记录本帧提交变更的调用方
+        self._last_flush = 0
+        self._lock = threading.Lock()
+        self._pending = threading.Event()
+        self._thread = None
+
+    @property
+    def page(self):
+        return self._page_ref()
+
+    def request(self, *controls):
+        """标记控件待更新，不传控件表示整页更新"""
+        caller = caller_name() if metrics.enabled else None
+        if caller:
+            metrics.inc("ui_update_requests_total", caller=caller)
+        with self._lock:
+            self.requested += 1
+            if caller:
+                self._callers.add(caller)
+            if not controls:
+                self._full = True
+            for control in controls:
+                if id(control) not in self._dirty_ids:
+                    self._dirty_ids.add(id(control))
+                    self._dirty.append(control)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="update-batcher", daemon=True
+                )
+                self._thread.start()
+        self._pending.set()
+
+    def flush(self):
+        """立即同步所有待更新的控件，用于对延迟敏感的路径"""
+        with self._lock:
+            controls = self._dirty
+            full = self._full
+            callers = self._callers
+            self._dirty = []
+            self._dirty_ids = set()
+            self._full = False
+            self._callers = set()
+            if not controls and not full:
+                return False
+            self.flushed += 1
+            self._last_flush = time.monotonic()
+
+        page = self.page
+        if page is None:
+            return False
+        try:
+            start = time.perf_counter()
+            if full:
+                page.update()
+            else:
+                page.update(*controls)
+            if metrics.enabled:
+                metrics.observe("page_update_seconds", time.perf_counter() - start)
+                metrics.observe("page_update_controls", len(controls))
+                for caller in callers or ("unknown",):
+                    metrics.inc("page_updates_total", caller=caller)
+        except Exception as e:
+            logger.warning("页面更新失败: %s", e)
+        return True
+
+    def stats(self):
+        """更新请求与实际同步次数"""
+        with self._lock:
+            return {
+                "requested": self.requested,
+                "flushed": self.flushed,
+                "pending": len(self._dirty) + (1 if self._full else 0),
+            }
+
+    def _run(self):
+        """后台同步循环 - 每帧最多同步一次"""
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            delay = self._last_flush + self.frame_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.flush()
+
+
+_batchers = weakref.WeakKeyDictionary()
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(page):
+    """获取页面对应的更新合并器（每个页面一个）"""
+    with _batchers_lock:
+        batcher = _batchers.get(page)
+        if batcher is None:
+            batcher = UpdateBatcher(page)
+            _batchers[page] = batcher
+        return batcher
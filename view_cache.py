@@ -0,0 +1,42 @@
+class ViewCache:
+    """视图缓存 - 每个子树只构建一次，之后直接复用"""
+
+    def __init__(self):
+        self._views = {}
+        self.builds = 0
+
+    def get(self, key, builder):
+        """获取缓存的视图，不存在时调用 builder 构建"""
+        view = self._views.get(key)
+        if view is None:
+            view = builder()
+            self._views[key] = view
+            self.builds += 1
+        return view
+
+    def peek(self, key):
+        """获取已构建的视图，不触发构建"""
+        return self._views.get(key)
+
+    def invalidate(self, key=None):
+        """使缓存失效，key 为空时清空全部"""
+        if key is None:
+            self._views.clear()
+        else:
+            self._views.pop(key, None)
+
+
+def patch(control, changed=None, **props):
+    """只在属性值变化时赋值
+
+    返回控件是否发生变化；传入 changed 列表时，变化的控件会被追加进去，
+    便于最后用 page.update(*changed) 只同步这些控件。
+    """
+    dirty = False
+    for name, value in props.items():
+        if getattr(control, name) != value:
+            setattr(control, name, value)
+            dirty = True
+    if dirty and changed is not None and control not in changed:
+        changed.append(control)
+    return dirty
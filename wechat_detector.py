@@ -0,0 +1,446 @@
+import concurrent.futures
+import fnmatch
+import logging
+import ntpath
+import os
+import threading
+import time
+
+from metrics import metrics
+from tracing import traced, tracer
+
+logger = logging.getLogger(__name__)
+
+# 微信主程序文件名（旧版 WeChat.exe，新版 Weixin.exe）
+WECHAT_EXE_NAMES = ("WeChat.exe", "Weixin.exe")
+
+HKEY_LOCAL_MACHINE = "HKLM"
+HKEY_CURRENT_USER = "HKCU"
+
+
+class SystemBackend:
+    """真实系统后端 - 注册表、文件系统、快捷方式和进程访问
+
+    winreg、win32com、psutil 都在用到时才导入，非 Windows 平台上
+    对应的探测直接返回空结果。
+    """
+
+    def read_registry(self, hive, key_path, value_name):
+        """读取注册表值，不存在时返回 None"""
+        try:
+            import winreg
+        except ImportError:
+            return None
+
+        root = winreg.HKEY_LOCAL_MACHINE if hive == HKEY_LOCAL_MACHINE else winreg.HKEY_CURRENT_USER
+        try:
+            with winreg.OpenKey(root, key_path) as key:
+                value, _ = winreg.QueryValueEx(key, value_name)
+                return value
+        except OSError:
+            return None
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def is_file(self, path):
+        return os.path.isfile(path)
+
+    def stat(self, path):
+        """返回 (文件大小, 修改时间)，文件不存在时返回 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def file_version(self, path):
+        """读取可执行文件的版本号"""
+        try:
+            import win32api
+        except ImportError:
+            return None
+        try:
+            info = win32api.GetFileVersionInfo(path, "\\")
+            ms, ls = info["FileVersionMS"], info["FileVersionLS"]
+            return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+        except Exception:
+            return None
+
+    def list_dir(self, path):
+        """列出目录下的文件（递归），目录不存在时返回空列表"""
+        result = []
+        for root, _, files in os.walk(path):
+            for name in files:
+                result.append(os.path.join(root, name))
+        return result
+
+    def resolve_shortcut(self, path):
+        """解析 .lnk 快捷方式的目标路径"""
+        try:
+            import win32com.client
+        except ImportError:
+            return None
+        try:
+            shell = win32com.client.Dispatch("WScript.Shell")
+            return shell.CreateShortCut(path).Targetpath or None
+        except Exception:
+            return None
+
+    def running_executables(self):
+        """获取正在运行的进程的可执行文件路径"""
+        try:
+            import psutil
+        except ImportError:
+            return []
+
+        result = []
+        for proc in psutil.process_iter(["name", "exe"]):
+            try:
+                if proc.info["exe"]:
+                    result.append(proc.info["exe"])
+            except (psutil.Error, KeyError):
+                continue
+        return result
+
+
+class FakeBackend:
+    """模拟后端 - 用内存中的注册表和文件系统代替真实系统
+
+    用于在 Linux 上测试和压测检测流程。files 可以是路径列表，也可以是
+    {路径: (大小, 修改时间)} 字典；delays 按路径前缀模拟慢速磁盘，
+    例如 {"D:": 3} 表示访问 D 盘的每次 stat 都阻塞 3 秒。
+    """
+
+    def __init__(self, registry=None, files=None, shortcuts=None, processes=None, delays=None, versions=None):
+        self.registry = registry or {}    # (hive, key_path, value_name) -> value
+        if isinstance(files, dict):
+            self.file_stats = dict(files)
+        else:
+            self.file_stats = {path: (1024, 0) for path in files or []}
+        self.versions = versions or {}
+        self.shortcuts = shortcuts or {}  # .lnk 路径 -> 目标路径
+        self.processes = list(processes or [])
+        self.delays = delays or {}
+        self.stat_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def files(self):
+        return set(self.file_stats)
+
+    def add_file(self, path, size=1024, mtime=0, version=None):
+        """添加或修改文件（模拟安装、升级）"""
+        self.file_stats[path] = (size, mtime)
+        if version:
+            self.versions[path] = version
+
+    def remove_file(self, path):
+        """删除文件（模拟卸载）"""
+        self.file_stats.pop(path, None)
+
+    def _delay(self, path):
+        for prefix, seconds in self.delays.items():
+            if path.lower().startswith(prefix.lower()):
+                time.sleep(seconds)
+                return
+
+    def read_registry(self, hive, key_path, value_name):
+        return self.registry.get((hive, key_path, value_name))
+
+    def exists(self, path):
+        with self._lock:
+            self.stat_calls += 1
+        self._delay(path)
+        lowered = path.lower().rstrip("\\/")
+        return any(
+            f.lower() == lowered or f.lower().startswith(lowered + "\\")
+            for f in list(self.files) + list(self.shortcuts)
+        )
+
+    def is_file(self, path):
+        with self._lock:
+            self.stat_calls += 1
+        self._delay(path)
+        return path.lower() in {f.lower() for f in self.files}
+
+    def stat(self, path):
+        with self._lock:
+            self.stat_calls += 1
+        self._delay(path)
+        return self.file_stats.get(path)
+
+    def file_version(self, path):
+        return self.versions.get(path)
+
+    def list_dir(self, path):
+        self._delay(path)
+        prefix = path.lower().rstrip("\\") + "\\"
+        return [f for f in list(self.files) + list(self.shortcuts) if f.lower().startswith(prefix)]
+
+    def resolve_shortcut(self, path):
+        return self.shortcuts.get(path)
+
+    def running_executables(self):
+        return list(self.processes)
+
+
+def is_wechat_exe(path):
+    """文件名是否为微信主程序"""
+    return ntpath.basename(path).lower() in {n.lower() for n in WECHAT_EXE_NAMES}
+
+
+class PathProbe:
+    """检测策略基类"""
+
+    name = "probe"
+    timeout = 2.0
+
+    def find(self, backend, cancel):
+        """返回检测到的微信路径，cancel 被设置时应尽快返回"""
+        raise NotImplementedError
+
+
+class RegistryProbe(PathProbe):
+    """从注册表的安装路径检测"""
+
+    name = "registry"
+    timeout = 1.0
+
+    KEYS = [
+        (HKEY_LOCAL_MACHINE, r"SOFTWARE\Tencent\WeChat"),
+        (HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Tencent\WeChat"),
+        (HKEY_LOCAL_MACHINE, r"SOFTWARE\Tencent\Weixin"),
+        (HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Tencent\Weixin"),
+        (HKEY_CURRENT_USER, r"SOFTWARE\Tencent\WeChat"),
+        (HKEY_CURRENT_USER, r"SOFTWARE\Tencent\Weixin"),
+    ]
+
+    def find(self, backend, cancel):
+        for hive, key_path in self.KEYS:
+            if cancel.is_set():
+                return None
+            install_path = backend.read_registry(hive, key_path, "InstallPath")
+            if not install_path:
+                continue
+            for exe_name in WECHAT_EXE_NAMES:
+                wechat_exe = ntpath.join(install_path, exe_name)
+                if backend.is_file(wechat_exe):
+                    return wechat_exe
+        return None
+
+
+class CandidatePathProbe(PathProbe):
+    """逐个检查候选路径"""
+
+    name = "candidates"
+
+    def __init__(self, paths, name=None):
+        self.paths = list(paths)
+        if name:
+            self.name = name
+
+    def find(self, backend, cancel):
+        for path in self.paths:
+            if cancel.is_set():
+                return None
+            if backend.is_file(path):
+                return path
+        return None
+
+
+class OverrideProbe(CandidatePathProbe):
+    """用户手动指定的路径（环境变量或配置）"""
+
+    name = "override"
+    timeout = 0.5
+
+
+class StartMenuProbe(PathProbe):
+    """从开始菜单的微信快捷方式检测"""
+
+    name = "start_menu"
+
+    PATTERNS = ("*微信*.lnk", "*wechat*.lnk", "*weixin*.lnk")
+
+    def __init__(self, directories=None):
+        if directories is None:
+            directories = [
+                os.path.join(os.environ.get("ProgramData", r"C:\ProgramData"), r"Microsoft\Windows\Start Menu\Programs"),
+                os.path.join(os.environ.get("APPDATA", ""), r"Microsoft\Windows\Start Menu\Programs"),
+            ]
+        self.directories = [d for d in directories if d]
+
+    def find(self, backend, cancel):
+        for directory in self.directories:
+            for path in backend.list_dir(directory):
+                if cancel.is_set():
+                    return None
+                name = ntpath.basename(path).lower()
+                if not any(fnmatch.fnmatch(name, p) for p in self.PATTERNS):
+                    continue
+                target = backend.resolve_shortcut(path)
+                if target and is_wechat_exe(target) and backend.is_file(target):
+                    return target
+        return None
+
+
+class ProcessProbe(PathProbe):
+    """从正在运行的微信进程检测"""
+
+    name = "process"
+
+    def find(self, backend, cancel):
+        for exe in backend.running_executables():
+            if cancel.is_set():
+                return None
+            if is_wechat_exe(exe):
+                return exe
+        return None
+
+
+class DetectionPipeline:
+    """并发检测流程
+
+    所有检测策略同时运行，各自有超时时间，返回第一个有效结果并通知其余策略退出。
+    超时的策略不再等待（其线程会在检查 cancel 后自行结束）。
+    """
+
+    def __init__(self, probes, backend=None, max_workers=None):
+        self.probes = list(probes)
+        self.backend = backend or SystemBackend()
+        self.max_workers = max_workers or max(len(self.probes), 1)
+        self.last_hit = None      # 命中的策略名称
+        self.last_timings = {}    # 策略名称 -> 耗时（秒），超时为 None
+
+    def run(self):
+        """运行检测，返回第一个有效路径"""
+        self.last_hit = None
+        self.last_timings = {}
+        if not self.probes:
+            return None
+
+        cancel = threading.Event()
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="wechat-probe"
+        )
+        start = time.monotonic()
+        futures = {}
+        for probe in self.probes:
+            futures[executor.submit(self._run_probe, probe, cancel)] = probe
+
+        result = None
+        pending = set(futures)
+        try:
+            while pending and result is None:
+                now = time.monotonic()
+                # 移除已超时的策略
+                for future in list(pending):
+                    probe = futures[future]
+                    if now - start >= probe.timeout:
+                        pending.discard(future)
+                        self.last_timings.setdefault(probe.name, None)
+                        metrics.inc("detection_probe_timeouts_total", probe=probe.name)
+                if not pending:
+                    break
+
+                wait_time = min(futures[f].timeout for f in pending) - (now - start)
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=max(wait_time, 0), return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    pending.discard(future)
+                    probe = futures[future]
+                    path, elapsed = future.result()
+                    self.last_timings[probe.name] = elapsed
+                    if metrics.enabled:
+                        metrics.observe("detection_probe_seconds", elapsed, probe=probe.name)
+                    if path and result is None:
+                        result = path
+                        self.last_hit = probe.name
+        finally:
+            cancel.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return result
+
+    def _run_probe(self, probe, cancel):
+        start = time.monotonic()
+        with tracer.span(f"probe {probe.name}", cat="detection") as span:
+            try:
+                path = probe.find(self.backend, cancel)
+            except Exception as e:
+                logger.warning("微信路径检测失败(%s): %s", probe.name, e)
+                path = None
+            span.set(found=bool(path))
+        return path, time.monotonic() - start
+
+
+class WeChatPathDetector:
+    """微信路径检测器"""
+
+    def __init__(self, backend=None, overrides=None, start_menu_dirs=None):
+        self.backend = backend or SystemBackend()
+        self.overrides = list(overrides or [])
+        self.start_menu_dirs = start_menu_dirs
+        env_override = os.environ.get("WXQ_WECHAT_PATH")
+        if env_override:
+            self.overrides.insert(0, env_override)
+
+        self.common_paths = [
+            r"C:\Program Files\Tencent\WeChat\WeChat.exe",
+            r"C:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
+            r"D:\Program Files\Tencent\WeChat\WeChat.exe",
+            r"D:\Program Files (x86)\Tencent\WeChat\WeChat.exe",
+            r"C:\Program Files\Tencent\Weixin\Weixin.exe",
+            r"C:\Program Files (x86)\Tencent\Weixin\Weixin.exe",
+            r"D:\Program Files\Tencent\Weixin\Weixin.exe",
+            r"D:\Program Files (x86)\Tencent\Weixin\Weixin.exe",
+        ]
+        self.pipeline = None
+        self.validator = None  # 首次校验路径时创建
+
+    def build_probes(self):
+        """构建检测策略列表"""
+        probes = []
+        if self.overrides:
+            probes.append(OverrideProbe(self.overrides))
+        probes.append(RegistryProbe())
+
+        # 候选路径按盘符分组，某个盘休眠或是网络驱动器时不影响其他盘
+        drives = {}
+        for path in self.common_paths:
+            drive = ntpath.splitdrive(path)[0].upper()
+            drives.setdefault(drive, []).append(path)
+        for drive, paths in drives.items():
+            probes.append(CandidatePathProbe(paths, name=f"candidates:{drive}"))
+
+        probes.append(StartMenuProbe(self.start_menu_dirs))
+        probes.append(ProcessProbe())
+        return probes
+
+    @traced(cat="detection")
+    def auto_detect(self):
+        """自动检测微信路径"""
+        self.pipeline = DetectionPipeline(self.build_probes(), backend=self.backend)
+        return self.pipeline.run()
+
+    def get_validator(self):
+        """获取路径校验器（缓存校验结果并监视安装目录）"""
+        if self.validator is None:
+            from path_validator import PathValidator
+            self.validator = PathValidator(self.backend)
+        return self.validator
+
+    def validate_path(self, path):
+        """验证微信路径是否有效（WeChat.exe 或 Weixin.exe）"""
+        return self.get_validator().validate(path)
+
+    def remember_path(self, path, signature):
+        """记录已确认有效的路径及其签名，开始监视安装目录"""
+        self.get_validator().remember(path, signature)
+
+    def close(self):
+        """停止监视安装目录"""
+        if self.validator is not None:
+            self.validator.close()